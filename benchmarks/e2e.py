@@ -0,0 +1,193 @@
+"""
+End-to-end throughput of the operator handlers.
+
+The create handler of `controller.py` is run for batches of concurrent
+experiments against the in-process `FakeApiServer`, through the real
+Kubernetes clients. For each batch size, the benchmark reports the number
+of experiments created per second and the p50 and p99 latency from the
+start of the handler to the creation of the experiment pod.
+
+    $ pdm run bench-e2e --latency 0.005 --counts 10,100,1000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+import uuid
+from typing import Any, Dict, List
+
+import kopf
+import yaml
+
+import controller
+from benchmarks.fakeapi import FakeApiServer
+
+__all__ = ["run_batch", "main"]
+
+TOPDIR = os.path.join(os.path.dirname(__file__), "..")
+OPERATOR_NS = "chaostoolkit-crd"
+
+
+def load_templates_configmap() -> Dict[str, Any]:
+    path = os.path.join(TOPDIR, "manifests", "base", "common", "configmap.yaml")
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def experiment(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "apiVersion": "chaostoolkit.org/v1",
+        "kind": "ChaosToolkitExperiment",
+        "metadata": {
+            "name": f"exp-{uuid.uuid4().hex[:8]}",
+            "namespace": OPERATOR_NS,
+            "uid": str(uuid.uuid4()),
+            "labels": {"benchmark": "e2e"},
+        },
+        "spec": spec,
+    }
+
+
+async def run_batch(
+    server: FakeApiServer,
+    memo: kopf.Memo,
+    count: int,
+    spec: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    """
+    Create `count` experiments concurrently and measure how long it took
+    """
+    logger = logging.getLogger("benchmark")
+    bodies = [experiment(spec or {}) for _ in range(count)]
+    started = {}
+
+    async def create(body: Dict[str, Any]) -> None:
+        suffix = controller.generate_name_suffix(body)
+        started[suffix] = time.perf_counter()
+        await controller.create_chaos_experiment(
+            meta=body["metadata"],
+            body=body,
+            spec=body["spec"],
+            namespace=OPERATOR_NS,
+            logger=logger,
+            memo=memo,
+            patch=kopf.Patch(),
+        )
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *[create(b) for b in bodies], return_exceptions=True
+    )
+    elapsed = time.perf_counter() - start
+
+    latencies = []
+    for (ns, name), created_at in server.created("pods").items():
+        pod = server.objects[("pods", ns, name)]
+        suffix = pod["metadata"]["labels"][controller.EXPERIMENT_LABEL]
+        if suffix in started:
+            latencies.append(created_at - started.pop(suffix))
+    latencies.sort()
+    failures = [o for o in outcomes if isinstance(o, BaseException)]
+
+    return {
+        "count": count,
+        "failures": len(failures),
+        "elapsed": elapsed,
+        "throughput": (count - len(failures)) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    for count in args.counts:
+        # a fresh server per batch, so batches do not share objects
+        server = FakeApiServer(
+            latency=args.latency,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+        )
+        await server.start()
+        server.add("configmaps", OPERATOR_NS, load_templates_configmap())
+
+        memo = kopf.Memo()
+        memo.api_clients = controller.ApiClients(
+            mode=args.api_mode,
+            pool_size=args.pool_size,
+            config_file=server.kubeconfig,
+        )
+        memo.admission = controller.Admission()
+        memo.warm_pool = controller.WarmPool()
+        memo.shards = controller.Shards(memo.api_clients, "")
+        try:
+            await memo.api_clients.open()
+            results.append(await run_batch(server, memo, count))
+        finally:
+            await memo.api_clients.close()
+            await server.stop()
+    return results
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--counts",
+        type=lambda v: [int(c) for c in v.split(",")],
+        default=[10, 100, 1000],
+        help="comma-separated numbers of concurrent experiments",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="latency of every API request, in seconds",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="probability that an API request fails",
+    )
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument(
+        "--api-mode",
+        choices=[controller.API_MODE_ASYNCIO, controller.API_MODE_THREAD],
+        default=controller.API_MODE,
+    )
+    parser.add_argument(
+        "--pool-size", type=int, default=controller.API_POOL_SIZE
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.CRITICAL)
+    results = asyncio.run(run(args))
+
+    print(
+        f"api mode: {args.api_mode}, latency: {args.latency * 1000:.1f}ms, "
+        f"error rate: {args.error_rate:.1%}"
+    )
+    print(
+        f"{'experiments':>11} {'failures':>8} {'exp/s':>9} "
+        f"{'p50 (ms)':>9} {'p99 (ms)':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['count']:>11} {r['failures']:>8} {r['throughput']:>9.1f} "
+            f"{r['p50'] * 1000:>9.1f} {r['p99'] * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+In-process stand-in for the Kubernetes API server.
+
+It serves the endpoints the operator calls for namespaces, service
+accounts, roles, role bindings, configmaps, pods, cron jobs and leases,
+keeping objects in memory, as well as the logs of pods. Every request can
+be slowed down by a fixed latency and fail at a given rate, to see how the
+operator behaves under a slow or flaky API server.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+from aiohttp import web
+
+__all__ = ["FakeApiServer"]
+
+# resources served, with the prefix of their path
+RESOURCES = [
+    ("api/v1", "namespaces"),
+    ("api/v1", "serviceaccounts"),
+    ("api/v1", "configmaps"),
+    ("api/v1", "pods"),
+    ("apis/rbac.authorization.k8s.io/v1", "roles"),
+    ("apis/rbac.authorization.k8s.io/v1", "rolebindings"),
+    ("apis/batch/v1", "cronjobs"),
+    ("apis/coordination.k8s.io/v1", "leases"),
+    ("apis/chaostoolkit.org/v1", "chaosexperiments"),
+]
+
+
+class FakeApiServer:
+    """
+    Kubernetes API stand-in listening on a local port.
+
+    `latency` is the delay, in seconds, of every request. `error_rate` is
+    the probability that a request fails with `error_status`, optionally
+    only for the resources listed in `error_resources`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        error_resources: Optional[List[str]] = None,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.error_resources = error_resources
+        self.random = random.Random(seed)
+        # objects by resource, namespace and name
+        self.objects: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        # `time.perf_counter()` of the creation of every object
+        self.created_at: Dict[Tuple[str, str, str], float] = {}
+        self.requests: Dict[Tuple[str, str], int] = {}
+        # logs of pods by namespace and name
+        self.logs: Dict[Tuple[str, str], bytes] = {}
+        self.versions = itertools.count(1)
+        self.runner = None
+        self.port = None
+        self.kubeconfig = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.kubeconfig = self.write_kubeconfig()
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+        if self.kubeconfig:
+            os.unlink(self.kubeconfig)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def write_kubeconfig(self) -> str:
+        """
+        Write a kubeconfig pointing at the server, for both Kubernetes
+        clients to load as usual
+        """
+        kubeconfig = {
+            "apiVersion": "v1",
+            "kind": "Config",
+            "clusters": [{"name": "fake", "cluster": {"server": self.url}}],
+            "users": [{"name": "fake", "user": {"token": "fake"}}],
+            "contexts": [
+                {"name": "fake", "context": {"cluster": "fake", "user": "fake"}}
+            ],
+            "current-context": "fake",
+        }
+        fd, path = tempfile.mkstemp(suffix=".yaml", prefix="kubeconfig-")
+        with os.fdopen(fd, "w") as f:
+            yaml.safe_dump(kubeconfig, f)
+        return path
+
+    def add(self, resource: str, namespace: str, obj: Dict[str, Any]) -> None:
+        """
+        Store an object, such as the templates configmap, as if it had been
+        created by someone else
+        """
+        name = obj["metadata"]["name"]
+        obj["metadata"]["resourceVersion"] = str(next(self.versions))
+        self.objects[(resource, namespace, name)] = obj
+
+    def created(self, resource: str) -> Dict[Tuple[str, str], float]:
+        """
+        Creation times of the objects of a resource, by namespace and name
+        """
+        return {
+            (ns, name): t
+            for (r, ns, name), t in self.created_at.items()
+            if r == resource
+        }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        path = request.match_info["path"]
+        subresource = None
+        if path.endswith("/log"):
+            path, subresource = path[: -len("/log")], "log"
+        route = self.route(path)
+        if route is None or (subresource and not route[2]):
+            return self.status(404, "NotFound", "unknown path")
+        resource, namespace, name = route
+        if subresource:
+            resource = f"{resource}/{subresource}"
+        key = (request.method, resource)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.should_fail(resource):
+            return self.status(self.error_status, "Injected", "injected error")
+
+        if resource == "pods/log" and request.method == "GET":
+            return await self.log(request, namespace, name)
+        if request.method == "POST":
+            return self.create(resource, namespace, await request.read())
+        if request.method == "GET" and name:
+            return self.read(resource, namespace, name)
+        if request.method == "GET":
+            return self.list(
+                resource, namespace, request.query.get("labelSelector", "")
+            )
+        if request.method == "PUT" and name:
+            return self.replace(resource, namespace, name, await request.read())
+        if request.method == "PATCH" and name:
+            return self.apply(
+                resource,
+                namespace,
+                name,
+                await request.read(),
+                request.content_type,
+            )
+        if request.method == "DELETE" and name:
+            return self.delete(resource, namespace, name)
+        if request.method == "DELETE":
+            return self.delete_collection(
+                resource, namespace, request.query.get("labelSelector", "")
+            )
+        return self.status(405, "MethodNotAllowed", request.method)
+
+    def route(self, path: str) -> Optional[Tuple[str, str, Optional[str]]]:
+        """
+        Resource, namespace and name of the object a path points to
+        """
+        for prefix, resource in RESOURCES:
+            if not path.startswith(prefix + "/"):
+                continue
+            parts = path[len(prefix) + 1 :].split("/")
+            if resource == "namespaces" and parts[0] == "namespaces":
+                if len(parts) == 1:
+                    return resource, "", None
+                if len(parts) == 2:
+                    return resource, "", parts[1]
+            if (
+                len(parts) >= 3
+                and parts[0] == "namespaces"
+                and parts[2] == resource
+            ):
+                return resource, parts[1], parts[3] if len(parts) > 3 else None
+        return None
+
+    def should_fail(self, resource: str) -> bool:
+        if not self.error_rate:
+            return False
+        if self.error_resources and resource not in self.error_resources:
+            return False
+        return self.random.random() < self.error_rate
+
+    def create(self, resource: str, namespace: str, data: bytes):
+        obj = json.loads(data)
+        name = obj["metadata"]["name"]
+        key = (resource, namespace, name)
+        if key in self.objects:
+            return self.status(409, "AlreadyExists", f"{name} already exists")
+        self.store(key, obj)
+        return web.json_response(obj, status=201)
+
+    def read(self, resource: str, namespace: str, name: str):
+        obj = self.objects.get((resource, namespace, name))
+        if obj is None:
+            return self.status(404, "NotFound", f"{name} not found")
+        return web.json_response(obj)
+
+    def list(self, resource: str, namespace: str, selector: str):
+        items = [
+            obj
+            for key, obj in self.objects.items()
+            if key[0] == resource
+            and key[1] == namespace
+            and matches(obj, selector)
+        ]
+        return web.json_response(
+            {"kind": "List", "apiVersion": "v1", "metadata": {}, "items": items}
+        )
+
+    def replace(self, resource: str, namespace: str, name: str, data: bytes):
+        key = (resource, namespace, name)
+        if key not in self.objects:
+            return self.status(404, "NotFound", f"{name} not found")
+        obj = json.loads(data)
+        self.store(key, obj)
+        return web.json_response(obj)
+
+    def apply(
+        self,
+        resource: str,
+        namespace: str,
+        name: str,
+        data: bytes,
+        content_type: str = "application/apply-patch+yaml",
+    ):
+        """
+        Server-side apply, which creates missing objects, or merge patch
+        """
+        obj = yaml.safe_load(data)
+        key = (resource, namespace, name)
+        if key not in self.objects and content_type.endswith(
+            "merge-patch+json"
+        ):
+            return self.status(404, "NotFound", f"{name} not found")
+        status = 200 if key in self.objects else 201
+        if key in self.objects:
+            version = obj.get("metadata", {}).pop("resourceVersion", None)
+            current = self.objects[key]["metadata"]["resourceVersion"]
+            if version is not None and version != current:
+                return self.status(409, "Conflict", f"{name} was modified")
+            merge(self.objects[key], obj)
+            obj = self.objects[key]
+        self.store(key, obj)
+        return web.json_response(obj, status=status)
+
+    async def log(self, request: web.Request, namespace: str, name: str):
+        """
+        Stream the log of a pod in small chunks, as the kubelet would
+        """
+        log = self.logs.get((namespace, name))
+        if log is None:
+            return self.status(404, "NotFound", f"{name} not found")
+        response = web.StreamResponse(headers={"Content-Type": "text/plain"})
+        await response.prepare(request)
+        for i in range(0, len(log), 1024):
+            await response.write(log[i : i + 1024])
+        await response.write_eof()
+        return response
+
+    def delete(self, resource: str, namespace: str, name: str):
+        if self.objects.pop((resource, namespace, name), None) is None:
+            return self.status(404, "NotFound", f"{name} not found")
+        return self.status(200, "", "deleted")
+
+    def delete_collection(self, resource: str, namespace: str, selector: str):
+        for key, obj in list(self.objects.items()):
+            if (
+                key[0] == resource
+                and key[1] == namespace
+                and matches(obj, selector)
+            ):
+                del self.objects[key]
+        return self.status(200, "", "deleted")
+
+    def store(self, key: Tuple[str, str, str], obj: Dict[str, Any]) -> None:
+        resource, namespace, name = key
+        meta = obj.setdefault("metadata", {})
+        if namespace:
+            meta["namespace"] = namespace
+        meta.setdefault("uid", f"uid-{resource}-{namespace}-{name}")
+        meta["resourceVersion"] = str(next(self.versions))
+        self.objects[key] = obj
+        self.created_at.setdefault(key, time.perf_counter())
+
+    @staticmethod
+    def status(code: int, reason: str, message: str) -> web.Response:
+        return web.json_response(
+            {
+                "kind": "Status",
+                "apiVersion": "v1",
+                "status": "Success" if code < 400 else "Failure",
+                "reason": reason,
+                "message": message,
+                "code": code,
+            },
+            status=code,
+        )
+
+
+def matches(obj: Dict[str, Any], selector: str) -> bool:
+    """
+    Tell whether an object matches a selector of `key=value` and `key`
+    requirements
+    """
+    labels = obj["metadata"].get("labels") or {}
+    for requirement in filter(None, selector.split(",")):
+        key, _, value = requirement.partition("=")
+        if key not in labels or ("=" in requirement and labels[key] != value):
+            return False
+    return True
+
+
+def merge(obj: Dict[str, Any], changes: Dict[str, Any]) -> None:
+    for key, value in changes.items():
+        if value is None:
+            obj.pop(key, None)
+        elif isinstance(value, dict) and isinstance(obj.get(key), dict):
+            merge(obj[key], value)
+        else:
+            obj[key] = value
@@ -0,0 +1,348 @@
+"""
+Cost of the template transformations run on every event.
+
+Each transformation of `controller.py`, from applying the overrides of an
+experiment with `PodTemplateBuilder` to rendering a whole pod with
+`create_pod(..., apply=False)`, is timed on the default templates of the
+operator and on a large pod template, with many containers, volumes and
+env entries.
+
+Timings are divided by the time it takes to `copy.deepcopy` the default pod
+template on the same machine, so they can be compared with the baselines
+stored in `baselines.json`, measured elsewhere. The benchmark fails when a
+transformation got slower than its baseline by more than the tolerance.
+
+    $ pdm run bench-transforms
+    $ pdm run bench-transforms --update
+"""
+
+import argparse
+import asyncio
+import copy
+import gc
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+import controller
+from benchmarks.e2e import load_templates_configmap
+
+__all__ = ["CASES", "run_cases", "compare", "main"]
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+TOLERANCE = 0.5
+NUMBER = 500
+REPEAT = 10
+RETRIES = 2
+# calls of a round on the large templates, by call on the default ones
+LARGE_RATIO = 0.1
+
+SPEC = controller.ExperimentSpec.from_dict({})
+OVERRIDES_SPEC = controller.ExperimentSpec.from_dict(
+    {
+        "verbose": True,
+        "pod": {
+            "image": "chaostoolkit/chaostoolkit:latest",
+            "env": {"configMapName": "my-env", "secretName": "my-secret"},
+            "settings": {"enabled": False},
+            "experiment": {"asFile": False},
+            "chaosArgs": ["run", "--journal-path", "/tmp/journal.json"],
+        },
+    }
+)
+TARGET = controller.Target("zone-a", {"ZONE": "a", "REPLICAS": "3"})
+CRO_META = {"name": "my-experiment", "labels": {"app": "chaos"}}
+
+
+def default_templates() -> controller.ResourceTemplates:
+    configmap = load_templates_configmap()
+    return controller.ResourceTemplates("1", configmap["data"])
+
+
+def large_templates(
+    containers: int = 10, env: int = 50, volumes: int = 20
+) -> controller.ResourceTemplates:
+    """
+    Default templates with a pod running `containers` sidecars before the
+    `chaostoolkit` container, each with `env` env entries and `volumes`
+    volume mounts, the operator volumes coming last
+    """
+    templates = default_templates()
+    pod = templates.get("chaostoolkit-pod.yaml")
+    spec = pod["spec"]
+    chaostoolkit = spec["containers"][0]
+
+    def sidecar(index: int) -> Dict[str, Any]:
+        return {
+            "name": f"sidecar-{index}",
+            "image": f"example.org/sidecar-{index}:1.0",
+            "command": ["sidecar"],
+            "args": [f"--index={index}"],
+            "env": [{"name": f"VAR_{i}", "value": str(i)} for i in range(env)],
+            "envFrom": [{"configMapRef": {"name": f"sidecar-{index}"}}],
+            "volumeMounts": [
+                {"name": f"data-{i}", "mountPath": f"/data/{i}"}
+                for i in range(volumes)
+            ],
+        }
+
+    spec["containers"] = [sidecar(i) for i in range(containers)]
+    spec["containers"].append(chaostoolkit)
+    chaostoolkit["env"] = [
+        {"name": f"VAR_{i}", "value": str(i)} for i in range(env)
+    ] + chaostoolkit["env"]
+    chaostoolkit["volumeMounts"] = [
+        {"name": f"data-{i}", "mountPath": f"/data/{i}"} for i in range(volumes)
+    ] + chaostoolkit["volumeMounts"]
+    spec["volumes"] = [
+        {"name": f"data-{i}", "emptyDir": {}} for i in range(volumes)
+    ] + spec["volumes"]
+
+    data = dict(templates.data)
+    data["chaostoolkit-pod.yaml"] = yaml.safe_dump(pod)
+    return controller.ResourceTemplates("1", data)
+
+
+def create_pod_case(
+    cro_spec: controller.ExperimentSpec, target: controller.Target = None
+) -> Callable[[controller.ResourceTemplates], Tuple]:
+    def render(templates: controller.ResourceTemplates) -> Any:
+        return controller.create_pod(
+            None,
+            templates,
+            cro_spec,
+            "chaostoolkit-run",
+            "abcde12345",
+            CRO_META,
+            apply=False,
+            target=target,
+        )
+
+    def prepare(templates: controller.ResourceTemplates) -> Tuple:
+        return (render, templates)
+
+    return prepare
+
+
+def cron_job_case(
+    templates: controller.ResourceTemplates,
+) -> Tuple:
+    return (
+        controller.set_cron_job_template_spec,
+        templates.get("chaostoolkit-cronjob.yaml"),
+        templates.get("chaostoolkit-pod.yaml")["spec"],
+    )
+
+
+def builder_case(templates: controller.ResourceTemplates) -> Tuple:
+    def apply_overrides(pod_tpl: Dict[str, Any]) -> None:
+        builder = controller.PodTemplateBuilder(pod_tpl)
+        builder.apply_overrides(OVERRIDES_SPEC.pod, verbose=True)
+
+    return (apply_overrides, templates.get("chaostoolkit-pod.yaml"))
+
+
+# every case turns templates into the arguments of a single call, the first
+# one being the callable; calls returning a coroutine are awaited
+CASES: Dict[str, Callable[[controller.ResourceTemplates], Tuple]] = {
+    "create_pod": create_pod_case(SPEC),
+    "create_pod_overrides": create_pod_case(OVERRIDES_SPEC),
+    "create_pod_target": create_pod_case(SPEC, TARGET),
+    "apply_overrides": builder_case,
+    "set_cron_job_template_spec": cron_job_case,
+    "clone_template": lambda templates: (
+        templates.get,
+        "chaostoolkit-pod.yaml",
+    ),
+}
+
+
+def measure(
+    loop: asyncio.AbstractEventLoop,
+    calls: Callable[[], List[Tuple]],
+    repeat: int,
+) -> float:
+    """
+    Best time, in seconds, of a single call among `repeat` rounds of the
+    calls returned by `calls`, which are prepared outside of the timing
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        batch = calls()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for f, *args in batch:
+                result = f(*args)
+                if asyncio.iscoroutine(result):
+                    loop.run_until_complete(result)
+            elapsed = time.perf_counter() - start
+        finally:
+            if gc_enabled:
+                gc.enable()
+        best = min(best, elapsed / len(batch))
+    return best
+
+
+def run_cases(
+    number: int = NUMBER,
+    repeat: int = REPEAT,
+    names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Time every case on the default and large templates
+
+    Return the time of the reference `copy.deepcopy` and, by case, the
+    absolute and relative times of a call.
+    """
+    templates = {
+        "default": (default_templates(), number),
+        "large": (large_templates(), max(1, int(number * LARGE_RATIO))),
+    }
+    reference_tpl = templates["default"][0].get("chaostoolkit-pod.yaml")
+    loop = asyncio.new_event_loop()
+
+    def reference() -> float:
+        return measure(
+            loop,
+            lambda: [(copy.deepcopy, reference_tpl)] * number,
+            repeat * 2,
+        )
+
+    try:
+        # the reference is the best before and after all the cases, which
+        # also warms the interpreter up
+        before = reference()
+        results = {}
+        for name, case in CASES.items():
+            if names and name not in names:
+                continue
+            for size, (tpls, calls) in templates.items():
+                seconds = measure(
+                    loop, lambda: [case(tpls) for _ in range(calls)], repeat
+                )
+                results[f"{name}[{size}]"] = {"seconds": seconds}
+        best = min(before, reference())
+        for result in results.values():
+            result["relative"] = result["seconds"] / best
+    finally:
+        loop.close()
+    return {"reference": best, "cases": results}
+
+
+def compare(
+    results: Dict[str, Any],
+    baselines: Dict[str, float],
+    tolerance: float = TOLERANCE,
+) -> List[str]:
+    """
+    Names of the cases slower than their baseline by more than `tolerance`
+    """
+    return [
+        name
+        for name, result in results["cases"].items()
+        if name in baselines
+        and result["relative"] > baselines[name] * (1 + tolerance)
+    ]
+
+
+def load_baselines(path: str = BASELINES) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(results: Dict[str, Any], path: str = BASELINES) -> None:
+    baselines = {
+        name: round(result["relative"], 3)
+        for name, result in results["cases"].items()
+    }
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=NUMBER)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=TOLERANCE,
+        help="slowdown relative to the baseline that fails the benchmark",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=RETRIES,
+        help="times the cases slower than their baseline are run again",
+    )
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="store the timings as the new baselines",
+    )
+    parser.add_argument("cases", nargs="*", help="cases to run, all if empty")
+    args = parser.parse_args(argv)
+
+    # the transformations log every override they apply
+    logging.basicConfig(level=logging.CRITICAL)
+    results = run_cases(args.number, args.repeat, args.cases)
+    baselines = load_baselines(args.baselines)
+    regressions = compare(results, baselines, args.tolerance)
+    # a slowdown must hold over several runs to tell it from noise
+    for _ in range(args.retries):
+        if not regressions or args.update:
+            break
+        rerun = run_cases(
+            args.number,
+            args.repeat,
+            sorted({name.split("[")[0] for name in regressions}),
+        )
+        for name, result in rerun["cases"].items():
+            if result["relative"] < results["cases"][name]["relative"]:
+                results["cases"][name] = result
+        regressions = compare(results, baselines, args.tolerance)
+
+    print(f"reference: {results['reference'] * 1e6:.2f}us")
+    print(
+        f"{'case':<45} {'us/call':>9} {'relative':>9} {'baseline':>9} "
+        f"{'change':>8}"
+    )
+    for name, result in results["cases"].items():
+        baseline = baselines.get(name)
+        change = (
+            f"{result['relative'] / baseline - 1:>+8.0%}"
+            if baseline
+            else f"{'new':>8}"
+        )
+        print(
+            f"{name:<45} {result['seconds'] * 1e6:>9.2f} "
+            f"{result['relative']:>9.3f} {baseline or float('nan'):>9.3f} "
+            f"{change}{' !' if name in regressions else ''}"
+        )
+
+    if args.update:
+        save_baselines(results, args.baselines)
+        print(f"baselines stored in {args.baselines}")
+        return 0
+    if regressions:
+        print(
+            f"{len(regressions)} case(s) slower than their baseline by more "
+            f"than {args.tolerance:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
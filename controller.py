@@ -1,127 +1,3428 @@
 import asyncio
+import base64
+import bisect
+import contextvars
+import datetime
+import gzip
 import hashlib
+import heapq
+import importlib
+import json
 import logging
-from typing import Any, Callable, Dict, List, Union
+import os
+import random
+import re
+import secrets
+import shlex
+import time
+from collections.abc import Mapping
+from contextlib import contextmanager
+from functools import partial, wraps
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import kopf
 from kopf._cogs.structs import bodies
-from kubernetes import client
+from kubernetes import client, config
+from kubernetes.client.exceptions import ApiTypeError
 from kubernetes.client.rest import ApiException
 import yaml
 
+try:
+    from kubernetes_asyncio import client as aio_client
+    from kubernetes_asyncio import config as aio_config
+    from kubernetes_asyncio.client.rest import ApiException as AioApiException
+
+    HAS_ASYNCIO_CLIENT = True
+except ImportError:  # pragma: no cover
+    HAS_ASYNCIO_CLIENT = False
+
+try:
+    import prometheus_client
+
+    HAS_PROMETHEUS_CLIENT = True
+except ImportError:  # pragma: no cover
+    HAS_PROMETHEUS_CLIENT = False
+
 
 Resource = Dict[str, Any]
 ResourceChunk = Dict[str, Any]
 
+# keys of the templates configmap, see `chaostoolkit-resources-templates`
+TEMPLATE_KEYS = frozenset(
+    [
+        "chaostoolkit-ns.yaml",
+        "chaostoolkit-sa.yaml",
+        "chaostoolkit-role.yaml",
+        "chaostoolkit-role-binding.yaml",
+        "chaostoolkit-pod.yaml",
+        "chaostoolkit-cronjob.yaml",
+    ]
+)
+
+# label set on every object created for an experiment, to its name suffix
+EXPERIMENT_LABEL = "chaostoolkit.org/experiment"
+# API and method deleting every object of a kind matching a label selector
+COLLECTION_DELETERS = {
+    "pods": ("core", "delete_collection_namespaced_pod"),
+    "cronjobs": ("batch", "delete_collection_namespaced_cron_job"),
+    "configmaps": ("core", "delete_collection_namespaced_config_map"),
+    "serviceaccounts": ("core", "delete_collection_namespaced_service_account"),
+    "rolebindings": ("rbac", "delete_collection_namespaced_role_binding"),
+    "roles": ("rbac", "delete_collection_namespaced_role"),
+}
+WORKLOAD_KINDS = ["pods", "cronjobs", "configmaps"]
+# label set on the configmaps named after a hash of their content, to that
+# hash
+CONTENT_LABEL = "chaostoolkit.org/content"
+# annotations of the configmaps recording the users of an object shared
+# between experiments: one per experiment using the object, named after its
+# uid, and its state, `ready` once provisioned or `deleting`
+SHARED_USER_PREFIX = "users.chaostoolkit.org/"
+SHARED_STATE_ANNOTATION = "chaostoolkit.org/shared"
+# label set on the runs of a batch experiment, to the name of their target
+TARGET_LABEL = "chaostoolkit.org/target"
+TARGET_NAME_RE = re.compile(r"^[a-z0-9]([-a-z0-9]{0,30}[a-z0-9])?$")
+# annotation set on the pods and jobs running an experiment, to the
+# `<namespace>/<name>` of the experiment whose status tracks them
+EXPERIMENT_REF_ANNOTATION = "chaostoolkit.org/experiment-ref"
+# label set on the namespaces the operator creates, the only ones it watches
+NAMESPACE_LABEL = "chaostoolkit.org/namespace"
+# namespace of the operator, the only one whose experiments and templates
+# configmaps it handles: users of other namespaces can neither run
+# experiments nor change the pods and RBAC the operator creates
+OPERATOR_NAMESPACE = os.getenv("CHAOSTOOLKIT_CRD_NAMESPACE", "chaostoolkit-crd")
+
+# "create" posts objects and treats conflicts as already existing objects,
+# "server-side" applies them with a dedicated field manager
+APPLY_MODE_CREATE = "create"
+APPLY_MODE_SERVER_SIDE = "server-side"
+APPLY_MODE = os.getenv("CHAOSTOOLKIT_CRD_APPLY_MODE", APPLY_MODE_CREATE).lower()
+FIELD_MANAGER = "chaostoolkit-crd"
+
+# "experiment" gives every experiment its own service account, role and role
+# binding, "shared" shares them between the experiments that would get
+# identical ones, until the last of these experiments is deleted
+RBAC_MODE_EXPERIMENT = "experiment"
+RBAC_MODE_SHARED = "shared"
+RBAC_MODE = os.getenv(
+    "CHAOSTOOLKIT_CRD_RBAC_MODE", RBAC_MODE_EXPERIMENT
+).lower()
+RBAC_TEMPLATE_KEYS = [
+    "chaostoolkit-sa.yaml",
+    "chaostoolkit-role.yaml",
+    "chaostoolkit-role-binding.yaml",
+]
+
+# "asyncio" talks to the Kubernetes API natively from the event loop, over
+# a shared pool of keep-alive connections, when `kubernetes_asyncio` is
+# installed. "thread" is the fallback: the synchronous client is called
+# through `asyncio.to_thread`.
+API_MODE_ASYNCIO = "asyncio"
+API_MODE_THREAD = "thread"
+API_MODE = os.getenv(
+    "CHAOSTOOLKIT_CRD_API_MODE",
+    API_MODE_ASYNCIO if HAS_ASYNCIO_CLIENT else API_MODE_THREAD,
+).lower()
+# maximum number of connections kept open to the Kubernetes API server
+API_POOL_SIZE = int(os.getenv("CHAOSTOOLKIT_CRD_API_POOL_SIZE", "20"))
+# sustained rate and burst of calls to the Kubernetes API, per second, which
+# is not limited when the rate is 0
+API_QPS = float(os.getenv("CHAOSTOOLKIT_CRD_API_QPS", "50"))
+API_BURST = int(os.getenv("CHAOSTOOLKIT_CRD_API_BURST", "100"))
+# retries of the calls throttled by the API server or failing with a server
+# error, after a jittered exponential backoff starting at `API_BACKOFF`
+# seconds, or after the delay the API server asks for
+API_RETRIES = int(os.getenv("CHAOSTOOLKIT_CRD_API_RETRIES", "5"))
+API_BACKOFF = float(os.getenv("CHAOSTOOLKIT_CRD_API_BACKOFF", "0.5"))
+API_BACKOFF_MAX = 30.0
+# priority of the calls waiting for the rate limiter by verb, the lowest
+# first: deletions and status updates free or report on resources, so they
+# go before reads and creations
+API_PRIORITY_HIGH = 0
+API_PRIORITIES = {
+    "delete": API_PRIORITY_HIGH,
+    "delete_collection": API_PRIORITY_HIGH,
+    "read": 1,
+    "list": 1,
+    "create": 2,
+    "patch": 2,
+    "replace": 2,
+}
+# maximum number of namespaces from `role.binds_to_namespaces` processed
+# concurrently for a single experiment
+NAMESPACES_CONCURRENCY = int(
+    os.getenv("CHAOSTOOLKIT_CRD_NAMESPACES_CONCURRENCY", "10")
+)
+# maximum number of experiment runs going on at once across the cluster
+# and in each namespace, none when 0. The experiments beyond are queued.
+MAX_RUNS = int(os.getenv("CHAOSTOOLKIT_CRD_MAX_RUNS", "0"))
+MAX_RUNS_PER_NAMESPACE = int(
+    os.getenv("CHAOSTOOLKIT_CRD_MAX_RUNS_PER_NAMESPACE", "0")
+)
+# annotation set on the queued experiments once admitted, to the time of
+# their admission, which starts them
+ADMITTED_ANNOTATION = "chaostoolkit.org/admitted"
+# phases of the pods whose run is over
+FINISHED_PHASES = frozenset(["Succeeded", "Failed"])
+# identity, such as its pod name, of this replica of the operator among
+# those sharing the experiments by hash of their uid. The replica handles
+# every experiment when unset.
+SHARD_ID = os.getenv("CHAOSTOOLKIT_CRD_SHARD_ID", "")
+# namespace of the leases the replicas sharing the experiments hold
+SHARD_NAMESPACE = os.getenv(
+    "CHAOSTOOLKIT_CRD_SHARD_NAMESPACE", OPERATOR_NAMESPACE
+)
+# seconds after which a replica which stopped renewing its lease loses its
+# share of the experiments
+SHARD_LEASE_DURATION = int(
+    os.getenv("CHAOSTOOLKIT_CRD_SHARD_LEASE_DURATION", "15")
+)
+# points of each replica on the hash ring, evening out their shares
+SHARD_VIRTUAL_NODES = 64
+# label of the shard leases and annotation of the experiments claimed by a
+# replica when the shares change
+SHARD_LABEL = "chaostoolkit.org/shard"
+# finalizer with which the replica owning an experiment holds it until its
+# objects are deleted, when replicas share the experiments
+SHARD_FINALIZER = "chaostoolkit.org/experiment"
+# where kopf stores the last handled spec, once the creation is done
+LAST_HANDLED_ANNOTATION = "kopf.zalando.org/last-handled-configuration"
+# idle runner pods kept started per namespace and warm pool, none when 0
+WARM_POOL_SIZE = int(os.getenv("CHAOSTOOLKIT_CRD_WARM_POOL_SIZE", "0"))
+# seconds after which the idle pods of a warm pool no run claimed are
+# deleted, when its newest idle pod is that old
+WARM_POOL_IDLE_TIMEOUT = float(
+    os.getenv("CHAOSTOOLKIT_CRD_WARM_POOL_IDLE_TIMEOUT", "1800")
+)
+# label of the idle pods of a warm pool, set to the key of their pool
+WARM_POOL_LABEL = "chaostoolkit.org/warm-pool"
+# where the idle pods of a warm pool find the run handed over to them
+WARM_TRIGGER_VOLUME = "chaostoolkit-trigger"
+WARM_TRIGGER_PATH = "/home/svc/trigger"
+WARM_RUN_SCRIPT = "chaostoolkit-run.sh"
+# environment variable names a shell can export
+ENV_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# maximum number of logs of finished runs streamed at once to summarize
+# their results on the experiment status, none are when 0
+RESULTS_STREAMS = int(os.getenv("CHAOSTOOLKIT_CRD_RESULTS_STREAMS", "0"))
+# bytes read from a log at once, and kept of a line at most
+RESULTS_CHUNK_SIZE = 64 * 1024
+RESULTS_MAX_LINE = 16 * 1024
+# deviated probes reported at most for a run
+RESULTS_MAX_PROBES = 20
+# annotation of the pods whose result was collected
+RESULT_ANNOTATION = "chaostoolkit.org/result"
+# lines of the chaostoolkit log, and those telling the result of a run
+LOG_LINE_RE = re.compile(
+    rb"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)(?:,\d+)? \w+\] (.*)$"
+)
+LOG_STATUS_RE = re.compile(rb"^Experiment ended with status: (\w+)")
+LOG_DEVIATED_RE = re.compile(
+    rb"^Steady state probe '(.*)' is not in the given tolerance"
+)
+# size in bytes from which the experiments given as `content` are stored
+# gzipped in the `binaryData` of their configmap and decompressed by an
+# init container of their pod, never when 0
+EXPERIMENT_GZIP_MIN_SIZE = int(
+    os.getenv("CHAOSTOOLKIT_CRD_EXPERIMENT_GZIP_MIN_SIZE", "16384")
+)
+# volume the init container decompresses the experiment into
+EXPERIMENT_UNPACKED_VOLUME = "chaostoolkit-experiment-unpacked"
+# image of that init container, which must ship `sh` and `gunzip`, rather
+# than the chaostoolkit image a pod template may override with any other
+EXPERIMENT_UNPACK_IMAGE = os.getenv(
+    "CHAOSTOOLKIT_CRD_EXPERIMENT_UNPACK_IMAGE", "busybox:1.36.1"
+)
+# maximum number of runs of a batch experiment created concurrently
+RUNS_CONCURRENCY = int(os.getenv("CHAOSTOOLKIT_CRD_RUNS_CONCURRENCY", "10"))
+# seconds during which the status changes of an experiment are gathered
+# before being sent as a single patch
+STATUS_UPDATE_DELAY = float(
+    os.getenv("CHAOSTOOLKIT_CRD_STATUS_UPDATE_DELAY", "2")
+)
+# port of the Prometheus `/metrics` endpoint, which is not served when unset
+METRICS_PORT = int(os.getenv("CHAOSTOOLKIT_CRD_METRICS_PORT", "0"))
+# where finished spans go: "log" or the `module:callable` of a factory of
+# span exporters. Nothing is traced when unset.
+SPAN_EXPORTER = os.getenv("CHAOSTOOLKIT_CRD_SPAN_EXPORTER", "")
+API_METHOD_RE = re.compile(
+    r"^(create|read|patch|replace|list|delete_collection|delete)_"
+    r"(?:namespaced_)?(\w+?)(?:_with_http_info)?$"
+)
+
+# names of the types of the spec fields, as in the CRD schema
+SPEC_TYPE_NAMES = {
+    str: "string",
+    bool: "boolean",
+    int: "integer",
+    list: "array",
+    Mapping: "object",
+}
+
+
+@kopf.on.startup()
+async def open_api_clients(
+    memo: kopf.Memo, logger: logging.Logger, **kwargs
+) -> None:
+    """
+    Create the Kubernetes API clients shared by all handlers.
+    """
+    if SHARD_ID and (MAX_RUNS or MAX_RUNS_PER_NAMESPACE):
+        # each replica would only count the runs of its own experiments
+        raise kopf.PermanentError(
+            "The caps on runs, CHAOSTOOLKIT_CRD_MAX_RUNS and "
+            "CHAOSTOOLKIT_CRD_MAX_RUNS_PER_NAMESPACE, cannot be set with "
+            "CHAOSTOOLKIT_CRD_SHARD_ID"
+        )
+
+    memo.api_clients = ApiClients()
+    await memo.api_clients.open()
+    memo.status_updates = StatusUpdates(memo.api_clients)
+    memo.shared_objects = SharedObjects(memo.api_clients.core)
+    memo.admission = Admission(on_admit=memo.status_updates.admitted)
+    memo.warm_pool = WarmPool()
+    memo.warm_pool.start(memo.api_clients.core)
+    memo.results = ResultCollector(memo.api_clients)
+    logger.info(
+        f"Kubernetes API clients ready in '{memo.api_clients.mode}' mode "
+        f"with a pool of {memo.api_clients.pool_size} connections"
+    )
+
+    memo.shards = Shards(memo.api_clients, on_lost=memo.admission.forget)
+    if memo.shards.shard_id:
+        await memo.shards.join()
+        logger.info(
+            f"Handling the share of shard '{memo.shards.shard_id}' among "
+            f"{sorted(memo.shards.ring.members)}"
+        )
+
+
+@kopf.on.startup()
+async def configure_persistence(
+    settings: kopf.OperatorSettings, **kwargs
+) -> None:
+    """
+    Leave the experiments given inline out of the last handled spec, which
+    kopf keeps in an annotation: annotations are limited to 256 KiB in total
+    and these experiments can be much larger, see `EXPERIMENT_GZIP_MIN_SIZE`
+    """
+    settings.persistence.diffbase_storage = kopf.AnnotationsDiffBaseStorage(
+        ignored_fields=["spec.pod.experiment.content"]
+    )
+
+
+@kopf.on.startup()
+async def serve_metrics(logger: logging.Logger, **kwargs) -> None:
+    """
+    Serve the Prometheus metrics of the operator when a port is configured
+    """
+    if not METRICS_PORT:
+        return
+    if not HAS_PROMETHEUS_CLIENT:
+        logger.warning(
+            "Metrics are not served: install the `metrics` extra to get "
+            "'prometheus_client'"
+        )
+        return
+    prometheus_client.start_http_server(METRICS_PORT, registry=METRICS.registry)
+    logger.info(f"Serving Prometheus metrics on port {METRICS_PORT}")
+
+
+@kopf.on.startup()
+async def configure_tracing(logger: logging.Logger, **kwargs) -> None:
+    """
+    Export the spans of the handlers when an exporter is configured
+    """
+    if SPAN_EXPORTER:
+        TRACER.add_exporter(load_span_exporter(SPAN_EXPORTER))
+        logger.info(f"Exporting spans with '{SPAN_EXPORTER}'")
+
+
+@kopf.on.cleanup()
+async def close_api_clients(
+    memo: kopf.Memo, logger: logging.Logger, **kwargs
+) -> None:
+    shards = getattr(memo, "shards", None)
+    if shards is not None and shards.shard_id:
+        logger.debug("Handing the share of this replica over")
+        await shards.leave()
+
+    results = getattr(memo, "results", None)
+    if results is not None:
+        logger.debug("Stopping the collection of run results")
+        await results.close()
+
+    warm_pool = getattr(memo, "warm_pool", None)
+    if warm_pool is not None:
+        await warm_pool.close()
+
+    status_updates = getattr(memo, "status_updates", None)
+    if status_updates is not None:
+        logger.debug("Sending the pending experiment status updates")
+        await status_updates.close()
+
+    api_clients = getattr(memo, "api_clients", None)
+    if api_clients is not None:
+        logger.debug("Closing the Kubernetes API connection pool")
+        await api_clients.close()
+
+
+@kopf.on.create(
+    "chaostoolkit.org",
+    "v1",
+    "chaosexperiments",
+    when=lambda **kwargs: owns_experiment(**kwargs),
+)
+async def create_chaos_experiment(  # noqa: C901
+    meta: ResourceChunk,
+    body: bodies.Body,
+    spec: ResourceChunk,
+    namespace: str,
+    logger: logging.Logger,
+    memo: kopf.Memo,
+    patch: kopf.Patch,
+    templates_index: kopf.Index = None,
+    namespaces_index: kopf.Index = None,
+    runs_index: kopf.Index = None,
+    warm_pods_index: kopf.Index = None,
+    **kwargs,
+) -> None:
+    """
+    Create a new pod running a Chaos Toolkit instance until it terminates.
+
+    If experiment is scheduled, create a new cronJob that will
+    periodically create a Chaos Toolkit instance.
+
+    All the objects the operator creates are labelled with the name suffix
+    of the experiment and their kinds are recorded, per namespace, in the
+    `inventory` of the experiment status, so they can be deleted in bulk.
+
+    When the runs going on reach their cap, the experiment is `Queued` and
+    nothing is created until it is admitted, as other runs finish, see
+    `start_admitted_experiment`.
+
+    With a warm pool, the run is handed over to an idle pod of the pool, when
+    there is one, instead of starting a new pod.
+
+    In shared RBAC mode, the service account, roles and role bindings are
+    those of a set shared with similar experiments instead, whose key is
+    recorded as `rbac` in the experiment status. The env variables and the
+    experiment given in the spec are stored in configmaps named after a hash
+    of their content, shared as well and recorded as `configmaps`.
+    """
+    name_suffix = generate_name_suffix(body)
+    with observe_handler("create", name_suffix):
+        if memo.shards.shard_id:
+            await hold_experiment(memo.api_clients, body)
+
+        v1 = memo.api_clients.core
+        v1rbac = memo.api_clients.rbac
+        v1cron = memo.api_clients.batch
+
+        # an invalid spec fails here, before anything is created
+        spec = ExperimentSpec.from_dict(spec)
+        ns = spec.namespace
+
+        ref = f"{meta.get('namespace')}/{meta.get('name')}"
+        if not spec.is_scheduled and not memo.admission.admit(
+            ref, ns, spec.priority, len(spec.targets) or 1, runs_index
+        ):
+            patch.status["phase"] = "Queued"
+            logger.info(
+                f"Queued until fewer runs are going on in ns '{ns}' or in "
+                "the cluster"
+            )
+            return
+        # the runs of an experiment which fails for good never start
+        with memo.admission.releasing_on_failure(ref, runs_index):
+            patch.status["inventory"] = experiment_inventory(
+                spec, RBAC_MODE == RBAC_MODE_SHARED
+            )
+
+            def rbac_step(
+                f: Callable[[Dict[str, Any], str], Awaitable],
+            ) -> Callable[[Dict[str, Any]], Awaitable]:
+                # RBAC objects are named with the suffix of their set, and
+                # not created again when the shared set is already there
+                async def step(r: Dict[str, Any]) -> Any:
+                    rbac_suffix, provision = r["rbac"]
+                    if provision:
+                        return await f(r, rbac_suffix)
+
+                return step
+
+            async def acquire(r: Dict[str, Any]) -> Tuple[str, bool]:
+                rbac_suffix, provision = await acquire_rbac(
+                    memo, r["cm"], spec, body["metadata"]["uid"], name_suffix
+                )
+                if rbac_suffix != name_suffix:
+                    # recorded even if the creation fails later on
+                    patch.status["rbac"] = rbac_suffix
+                return rbac_suffix, provision
+
+            shared_config_maps = []
+
+            async def config_map_step(
+                provision: Callable[..., Awaitable[Tuple[Optional[str], bool]]],
+            ) -> Optional[str]:
+                cm_name, shared = await provision(
+                    memo, v1, ns, spec, body["metadata"]["uid"]
+                )
+                if shared:
+                    # recorded even if the creation fails later on
+                    shared_config_maps.append(f"{ns}/{cm_name}")
+                    patch.status["configmaps"] = sorted(shared_config_maps)
+                return cm_name
+
+            # each step runs as soon as the steps it depends on are done
+            provisioned = await run_dependency_graph(
+                {
+                    "cm": (
+                        [],
+                        lambda r: get_config_map(
+                            v1, spec, namespace, templates_index
+                        ),
+                    ),
+                    "ns": (
+                        ["cm"],
+                        lambda r: create_ns(
+                            v1, r["cm"], spec, namespaces_index
+                        ),
+                    ),
+                    "rbac": (["cm", "ns"], acquire),
+                    "sa": (
+                        ["cm", "ns", "rbac"],
+                        rbac_step(
+                            lambda r, sfx: create_sa(v1, r["cm"], spec, ns, sfx)
+                        ),
+                    ),
+                    "role": (
+                        ["cm", "ns", "rbac"],
+                        rbac_step(
+                            lambda r, sfx: create_role(
+                                v1rbac, r["cm"], spec, ns, sfx
+                            )
+                        ),
+                    ),
+                    "role_binding": (
+                        ["cm", "sa", "role", "rbac"],
+                        rbac_step(
+                            lambda r, sfx: create_role_binding(
+                                v1rbac, r["cm"], spec, ns, ns, sfx
+                            )
+                        ),
+                    ),
+                    "bindings": (
+                        ["cm", "rbac"],
+                        rbac_step(
+                            lambda r, sfx: bind_role_to_namespaces(
+                                v1rbac, r["cm"], spec, ns, sfx
+                            )
+                        ),
+                    ),
+                    "env_cm": (
+                        ["ns"],
+                        lambda r: config_map_step(provision_env_config_map),
+                    ),
+                    "experiment_cm": (
+                        ["ns"],
+                        lambda r: config_map_step(
+                            provision_experiment_config_map
+                        ),
+                    ),
+                }
+            )
+            cm = provisioned["cm"]
+            env_cm_name = provisioned["env_cm"]
+            experiment_cm_name = provisioned["experiment_cm"]
+            rbac_suffix, provision = provisioned["rbac"]
+            if provision and rbac_suffix != name_suffix:
+                await memo.shared_objects.ready(
+                    ns, f"chaostoolkit-{rbac_suffix}"
+                )
+
+            async def create_run(target: Target = None) -> None:
+                if spec.is_scheduled:
+                    # when schedule defined, we cannot create the pod directly,
+                    # we must create a cronJob with the pod definition
+                    pod_tpl = await create_pod(
+                        v1,
+                        cm,
+                        spec,
+                        ns,
+                        name_suffix,
+                        meta,
+                        apply=False,
+                        target=target,
+                        rbac_suffix=rbac_suffix,
+                        env_cm_name=env_cm_name,
+                        experiment_cm_name=experiment_cm_name,
+                    )
+                    if pod_tpl:
+                        await create_cron_job(
+                            v1cron,
+                            cm,
+                            spec,
+                            ns,
+                            name_suffix,
+                            meta,
+                            pod_tpl=pod_tpl,
+                            target=target,
+                        )
+                else:
+                    # create pod for running experiment right away
+                    pod_tpl = await create_pod(
+                        v1,
+                        cm,
+                        spec,
+                        ns,
+                        name_suffix,
+                        meta,
+                        apply=False,
+                        target=target,
+                        rbac_suffix=rbac_suffix,
+                        env_cm_name=env_cm_name,
+                        experiment_cm_name=experiment_cm_name,
+                    )
+                    if not (
+                        memo.warm_pool.accepts(spec)
+                        and await memo.warm_pool.hand_over(
+                            v1, pod_tpl, meta, warm_pods_index
+                        )
+                    ):
+                        await start_pod(v1, pod_tpl)
+
+            if not spec.targets:
+                await create_run()
+                return
+
+            # one run per target, sharing the RBAC objects and env created above
+            targets_by_name = {t.name: t for t in spec.targets}
+            failures = await for_each(
+                list(targets_by_name),
+                lambda name: create_run(targets_by_name[name]),
+                RUNS_CONCURRENCY,
+            )
+            if failures:
+                raise kopf.PermanentError(
+                    "Failed to create runs for targets: "
+                    f"{format_failures(failures)}"
+                )
+
+
+@kopf.on.update(
+    "chaostoolkit.org",
+    "v1",
+    "chaosexperiments",
+    field=("metadata", "annotations", ADMITTED_ANNOTATION),
+    new=kopf.PRESENT,
+    when=lambda **kwargs: owns_experiment(**kwargs),
+)
+async def start_admitted_experiment(
+    status: ResourceChunk, logger: logging.Logger, **kwargs
+) -> None:
+    """
+    Start a queued experiment once admitted, as runs of others finished.
+
+    The admission annotates the experiment, which starts it right away
+    rather than waiting for its create handler to be retried.
+    """
+    if (status or {}).get("phase") != "Admitted":
+        logger.debug("Experiment not admitted, not starting it")
+        return
+    await create_chaos_experiment(status=status, logger=logger, **kwargs)
+
+
+@kopf.on.resume(
+    "chaostoolkit.org",
+    "v1",
+    "chaosexperiments",
+    when=lambda status, **kwargs: (
+        (status or {}).get("phase") in ("Queued", "Admitted")
+        and owns_experiment(**kwargs)
+    ),
+)
+async def requeue_experiment(
+    meta: ResourceChunk,
+    spec: ResourceChunk,
+    namespace: str,
+    logger: logging.Logger,
+    memo: kopf.Memo,
+    runs_index: kopf.Index = None,
+    **kwargs,
+) -> None:
+    """
+    Queue again the experiments which were queued, or admitted but not
+    started, when the operator stopped: the queue is only kept in memory.
+    """
+    spec = ExperimentSpec.from_dict(spec)
+    ref = f"{namespace}/{meta.get('name')}"
+    if memo.admission.admit(
+        ref, spec.namespace, spec.priority, len(spec.targets) or 1, runs_index
+    ):
+        memo.admission.notify([ref])
+    else:
+        logger.info("Queued again until fewer runs are going on")
+
+
+@kopf.on.resume(
+    "chaostoolkit.org",
+    "v1",
+    "chaosexperiments",
+    when=lambda memo, **kwargs: (
+        bool(memo.shards.shard_id) and owns_experiment(memo=memo, **kwargs)
+    ),
+)
+async def hold_shared_experiment(
+    body: bodies.Body, memo: kopf.Memo, **kwargs
+) -> None:
+    """
+    Hold the experiments created before the replicas shared them, as those
+    created since are, see `hold_experiment`.
+    """
+    await hold_experiment(memo.api_clients, body)
+
+
+# without the kopf finalizer, which the replicas blind to an experiment
+# would remove, when they share them, see `owns_experiment`
+@kopf.on.delete(
+    "chaostoolkit.org",
+    "v1",
+    "chaosexperiments",
+    optional=bool(SHARD_ID),
+    when=lambda **kwargs: owns_experiment(**kwargs),
+)
+async def delete_chaos_experiment(
+    meta: ResourceChunk,
+    body: bodies.Body,
+    spec: ResourceChunk,
+    namespace: str,
+    logger: logging.Logger,
+    memo: kopf.Memo,
+    status: ResourceChunk = None,
+    templates_index: kopf.Index = None,
+    runs_index: kopf.Index = None,
+    **kwargs,
+) -> None:
+    """
+    Delete the objects created for the experiment.
+
+    They are deleted in bulk, by label, from the inventory recorded in the
+    experiment status. Experiments without an inventory have their objects
+    deleted one by one, by names rebuilt from the templates.
+
+    Shared RBAC sets and content-addressed configmaps are deleted with the
+    last experiment using them.
+    """
+    with observe_handler("delete", generate_name_suffix(body)):
+        await delete_experiment(
+            meta,
+            body,
+            spec,
+            namespace,
+            logger,
+            memo,
+            status,
+            templates_index,
+            runs_index,
+        )
+        # done with the experiment, whether all its objects could be deleted
+        # or not, as logged
+        await hold_experiment(memo.api_clients, body, hold=False)
+
+
+@kopf.on.event(
+    "",
+    "v1",
+    "pods",
+    labels={EXPERIMENT_LABEL: kopf.PRESENT},
+    annotations={EXPERIMENT_REF_ANNOTATION: kopf.PRESENT},
+    when=lambda labels, memo, **_: memo.shards.owns(labels[EXPERIMENT_LABEL]),
+)
+async def track_experiment_pod(
+    type: Optional[str],
+    body: bodies.Body,
+    labels: ResourceChunk,
+    annotations: ResourceChunk,
+    memo: kopf.Memo,
+    runs_index: kopf.Index = None,
+    **kwargs,
+) -> None:
+    """
+    Report the phase, start and finish times and exit code of the pods
+    running an experiment on the experiment status.
+
+    Queued experiments are admitted as these pods finish. The logs of the
+    finished ones are summarized in the background, see `ResultCollector`.
+    """
+    finished = type == "DELETED"
+    if type != "DELETED":
+        run = pod_run_status(body)
+        finished = run["phase"] in FINISHED_PHASES
+        track_run(memo, labels, annotations, run)
+        if run["phase"] in FINISHED_PHASES and not annotations.get(
+            RESULT_ANNOTATION
+        ):
+            memo.results.collect(
+                body["metadata"]["namespace"],
+                body["metadata"]["name"],
+                lambda result: track_run(
+                    memo, labels, annotations, {"result": result}
+                ),
+            )
+    memo.admission.observe(
+        annotations[EXPERIMENT_REF_ANNOTATION],
+        body["metadata"]["name"],
+        runs_index,
+        finished,
+    )
+
+
+@kopf.on.event(
+    "batch",
+    "v1",
+    "jobs",
+    labels={EXPERIMENT_LABEL: kopf.PRESENT},
+    annotations={EXPERIMENT_REF_ANNOTATION: kopf.PRESENT},
+    when=lambda labels, memo, **_: memo.shards.owns(labels[EXPERIMENT_LABEL]),
+)
+async def track_experiment_job(
+    type: Optional[str],
+    body: bodies.Body,
+    labels: ResourceChunk,
+    annotations: ResourceChunk,
+    memo: kopf.Memo,
+    runs_index: kopf.Index = None,
+    **kwargs,
+) -> None:
+    """
+    Report the phase and the start and finish times of the jobs scheduled
+    by the cron job of an experiment on the experiment status.
+
+    Queued experiments are admitted as these jobs finish.
+    """
+    if type != "DELETED":
+        track_run(memo, labels, annotations, job_run_status(body))
+    memo.admission.wake(runs_index)
+
+
+@kopf.index(
+    "",
+    "v1",
+    "configmaps",
+    when=lambda namespace, body, **_: (
+        namespace == OPERATOR_NAMESPACE
+        and bool(TEMPLATE_KEYS.intersection(body.get("data") or {}))
+    ),
+)
+def templates_index(
+    name: str, namespace: str, body: bodies.Body, **kwargs
+) -> Dict[Tuple[str, str], "ResourceTemplates"]:
+    """
+    Keep the templates configmaps of the operator namespace parsed and ready
+    to use by the handlers.
+    """
+    return {
+        (namespace, name): parse_templates(
+            namespace,
+            name,
+            body["metadata"].get("resourceVersion"),
+            body.get("data") or {},
+        )
+    }
+
+
+@kopf.index(
+    "",
+    "v1",
+    "pods",
+    labels={EXPERIMENT_LABEL: kopf.PRESENT},
+    annotations={EXPERIMENT_REF_ANNOTATION: kopf.PRESENT},
+    when=lambda status, **_: (status or {}).get("phase") not in FINISHED_PHASES,
+)
+def runs_index(
+    namespace: str, annotations: ResourceChunk, **kwargs
+) -> Dict[str, str]:
+    """
+    Keep the experiment of each run going on, by namespace, to admit the
+    queued experiments within the caps.
+    """
+    return {namespace: annotations[EXPERIMENT_REF_ANNOTATION]}
+
+
+@kopf.index(
+    "",
+    "v1",
+    "pods",
+    labels={WARM_POOL_LABEL: kopf.PRESENT, EXPERIMENT_LABEL: kopf.ABSENT},
+    when=lambda status, **_: (status or {}).get("phase") not in FINISHED_PHASES,
+)
+def warm_pods_index(
+    name: str,
+    namespace: str,
+    labels: ResourceChunk,
+    body: bodies.Body,
+    **kwargs,
+) -> Dict[Tuple[str, str], Tuple[str, str, str]]:
+    """
+    Keep the idle pods of the warm pools, with their resource version and
+    phase, by namespace and key of their pool.
+    """
+    return {
+        (namespace, labels[WARM_POOL_LABEL]): (
+            name,
+            body["metadata"].get("resourceVersion"),
+            (body.get("status") or {}).get("phase"),
+        )
+    }
+
+
+@kopf.index("", "v1", "namespaces", labels={NAMESPACE_LABEL: kopf.PRESENT})
+def namespaces_index(
+    name: str, body: bodies.Body, **kwargs
+) -> Dict[str, Optional[str]]:
+    """
+    Keep the phase of the namespaces the operator created, so that the
+    handlers do not create them again.
+    """
+    return {name: (body.get("status") or {}).get("phase")}
+
+
+###############################################################################
+# Internals
+###############################################################################
+async def run_async(f: Callable, *args, **kwargs) -> Any:
+    """
+    Call a Kubernetes API method without blocking the event loop.
+
+    Methods of the asyncio client are awaited directly and their errors are
+    raised as the synchronous client's `ApiException`, so callers handle a
+    single exception type whatever the mode. Methods of the synchronous
+    client run in the default executor.
+
+    Every call first waits for the rate limiter, by priority of its verb.
+    Calls throttled by the API server or failing with a server error are
+    retried up to `API_RETRIES` times.
+    """
+    priority = api_call_priority(f)
+    attempt = 0
+    while True:
+        await LIMITER.acquire(priority)
+        try:
+            return await call_api(f, *args, **kwargs)
+        except ApiException as e:
+            if attempt >= API_RETRIES or not is_retryable(e):
+                raise
+            METRICS.api_retries.labels(str(e.status)).inc()
+            await asyncio.sleep(retry_delay(e, attempt))
+            attempt += 1
+
+
+async def call_api(f: Callable, *args, **kwargs) -> Any:
+    """
+    Call a Kubernetes API method once, see `run_async`
+    """
+    code = "2xx"
+    try:
+        if is_asyncio_api_call(f):
+            try:
+                return await f(*args, **kwargs)
+            except AioApiException as e:
+                x = ApiException(status=e.status, reason=e.reason)
+                x.body = e.body
+                x.headers = e.headers
+                raise x from e
+
+        METRICS.executor_queue.inc()
+        started = False
+
+        def call() -> Any:
+            nonlocal started
+            started = True
+            METRICS.executor_queue.dec()
+            return f(*args, **kwargs)
+
+        try:
+            return await asyncio.to_thread(call)
+        finally:
+            # cancelled before a thread picked it up
+            if not started:
+                METRICS.executor_queue.dec()
+    except ApiException as e:
+        code = str(e.status)
+        raise
+    finally:
+        METRICS.count_api_call(f, code)
+
+
+async def create_or_apply(
+    create: Callable, patch: Callable, body: Resource, **kwargs
+) -> Any:
+    """
+    Create the object, or apply it server-side when the operator runs in
+    server-side apply mode.
+
+    A server-side apply is idempotent: applying an object that already
+    exists updates it to the desired state, so retries and operator
+    restarts do not fail on conflicts and correct any drift.
+    """
+    if APPLY_MODE != APPLY_MODE_SERVER_SIDE:
+        return await run_async(create, body=body, **kwargs)
+
+    apply = partial(
+        run_async,
+        patch,
+        name=body["metadata"]["name"],
+        field_manager=FIELD_MANAGER,
+        force=True,
+        _content_type="application/apply-patch+yaml",
+        **kwargs,
+    )
+    try:
+        return await apply(body=body)
+    except ApiTypeError:
+        raise kopf.PermanentError(
+            "Server-side apply needs the asyncio client or a more recent "
+            "synchronous kubernetes client"
+        )
+    except ApiException as e:
+        # older synchronous clients cannot serialize apply patches and
+        # refuse the request before sending it, they need it pre-serialized
+        if e.status != 0:
+            raise
+        return await apply(body=json.dumps(body))
+
+
+def api_call_priority(f: Callable) -> int:
+    """
+    Priority of a call to the Kubernetes API for the rate limiter
+    """
+    m = API_METHOD_RE.match(getattr(f, "__name__", ""))
+    if not m:
+        return API_PRIORITIES["read"]
+    verb, resource = m.groups()
+    # the experiments' status, patched as a custom object
+    if resource.startswith("custom_object") or resource.endswith("_status"):
+        return API_PRIORITY_HIGH
+    return API_PRIORITIES.get(verb, API_PRIORITIES["read"])
+
+
+def is_retryable(e: ApiException) -> bool:
+    """
+    Tell whether a failed call may succeed when made again: the API server
+    throttled it or failed
+    """
+    return e.status == 429 or (e.status or 0) >= 500
+
+
+def retry_delay(e: ApiException, attempt: int) -> float:
+    """
+    Seconds to wait before retrying a failed call.
+
+    When the API server tells how long to wait with `Retry-After`, a little
+    jitter is added so that the throttled calls do not come back all at
+    once. Otherwise the delay grows exponentially, with full jitter.
+    """
+    retry_after = None
+    try:
+        retry_after = float((e.headers or {}).get("Retry-After"))
+    except (TypeError, ValueError):
+        pass
+    if retry_after is not None:
+        return retry_after + random.uniform(0, API_BACKOFF)
+    return random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF * 2**attempt))
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all the calls to the Kubernetes API.
+
+    Tokens are added at `rate` per second, up to `burst`. Calls waiting for
+    a token are served by priority, the lowest first, then in order of
+    arrival. Nothing is limited when `rate` is 0.
+    """
+
+    def __init__(self, rate: float = API_QPS, burst: int = API_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        # priority, order of arrival and future of every waiting call
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.arrivals = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def acquire(self, priority: int = API_PRIORITY_HIGH) -> None:
+        """
+        Wait for a token
+        """
+        if self.rate <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:
+            # waiters and timer of a previous, closed, loop
+            self.loop = loop
+            self.waiters = []
+            self.timer = None
+
+        self.refill()
+        if not self.waiters and self.tokens >= 1:
+            self.tokens -= 1
+            METRICS.api_throttling.labels(str(priority)).observe(0)
+            return
+
+        start = time.monotonic()
+        future = loop.create_future()
+        self.arrivals += 1
+        heapq.heappush(self.waiters, (priority, self.arrivals, future))
+        queue = METRICS.api_queue.labels(str(priority))
+        queue.inc()
+        self.schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # got a token, too late: hand it to the next waiting call
+                self.tokens += 1
+                if self.timer is not None:
+                    self.timer.cancel()
+                self.wake()
+            raise
+        finally:
+            queue.dec()
+        METRICS.api_throttling.labels(str(priority)).observe(
+            time.monotonic() - start
+        )
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.burst, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def schedule(self) -> None:
+        """
+        Wake the waiting calls up when the next token is available
+        """
+        if self.timer is not None or not self.waiters:
+            return
+        delay = max(0.0, (1 - self.tokens) / self.rate)
+        self.timer = self.loop.call_later(delay, self.wake)
+
+    def wake(self) -> None:
+        self.timer = None
+        self.refill()
+        while self.waiters and self.tokens >= 1:
+            _, _, future = heapq.heappop(self.waiters)
+            if future.done():
+                # cancelled while waiting
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+        self.schedule()
+
+
+LIMITER = RateLimiter()
+
+
+def is_asyncio_api_call(f: Callable) -> bool:
+    """
+    Tell whether `f` is a method of an API from the asyncio client
+    """
+    api = getattr(f, "__self__", None)
+    return HAS_ASYNCIO_CLIENT and isinstance(
+        getattr(api, "api_client", None), aio_client.ApiClient
+    )
+
+
+class NoMetric:
+    """
+    Stands for any metric when `prometheus_client` is not installed
+    """
+
+    def labels(self, *args, **kwargs) -> "NoMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+    def observe(self, amount: float) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+
+class Metrics:
+    """
+    Prometheus metrics of the operator, in their own registry.
+
+    They cost next to nothing and are not collected when `prometheus_client`
+    is not installed.
+    """
+
+    def __init__(self) -> None:
+        if not HAS_PROMETHEUS_CLIENT:
+            self.registry = None
+            self.step_duration = self.api_calls = NoMetric()
+            self.executor_queue = self.experiments_in_flight = NoMetric()
+            self.api_queue = self.api_throttling = NoMetric()
+            self.api_retries = self.experiments_queued = NoMetric()
+            self.results_streams = NoMetric()
+            return
+
+        self.registry = prometheus_client.CollectorRegistry()
+        self.step_duration = prometheus_client.Histogram(
+            "chaostoolkit_crd_step_duration_seconds",
+            "Duration of the steps creating and deleting experiment objects",
+            ["step"],
+            registry=self.registry,
+        )
+        self.api_calls = prometheus_client.Counter(
+            "chaostoolkit_crd_api_calls",
+            "Calls to the Kubernetes API by verb, resource and status code",
+            ["verb", "resource", "code"],
+            registry=self.registry,
+        )
+        self.executor_queue = prometheus_client.Gauge(
+            "chaostoolkit_crd_executor_queue_depth",
+            "Synchronous API calls waiting for a thread of the executor",
+            registry=self.registry,
+        )
+        self.api_queue = prometheus_client.Gauge(
+            "chaostoolkit_crd_api_rate_limiter_queue_depth",
+            "API calls waiting for the rate limiter by priority",
+            ["priority"],
+            registry=self.registry,
+        )
+        self.api_throttling = prometheus_client.Histogram(
+            "chaostoolkit_crd_api_rate_limiter_wait_seconds",
+            "Time API calls waited for the rate limiter by priority",
+            ["priority"],
+            registry=self.registry,
+        )
+        self.api_retries = prometheus_client.Counter(
+            "chaostoolkit_crd_api_retries",
+            "API calls retried after a throttling or server error by code",
+            ["code"],
+            registry=self.registry,
+        )
+        self.experiments_queued = prometheus_client.Gauge(
+            "chaostoolkit_crd_experiments_queued",
+            "Experiments waiting to be admitted",
+            registry=self.registry,
+        )
+        self.results_streams = prometheus_client.Gauge(
+            "chaostoolkit_crd_results_streams",
+            "Logs of finished runs being streamed to collect their results",
+            registry=self.registry,
+        )
+        self.experiments_in_flight = prometheus_client.Gauge(
+            "chaostoolkit_crd_experiments_in_flight",
+            "Experiments being created or deleted",
+            ["operation"],
+            registry=self.registry,
+        )
+
+    @contextmanager
+    def in_flight(self, operation: str) -> Iterator[None]:
+        """
+        Count an experiment going through a handler
+        """
+        gauge = self.experiments_in_flight.labels(operation)
+        gauge.inc()
+        try:
+            yield
+        finally:
+            gauge.dec()
+
+    def count_api_call(self, f: Callable, code: str) -> None:
+        m = API_METHOD_RE.match(getattr(f, "__name__", ""))
+        verb, resource = m.groups() if m else ("other", "other")
+        self.api_calls.labels(verb, resource, code).inc()
+
+
+METRICS = Metrics()
+
+
+def observe_step(f: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """
+    Record the duration of a step creating or deleting experiment objects,
+    and trace it in a span of the same name
+    """
+    histogram = METRICS.step_duration.labels(f.__name__)
+
+    @wraps(f)
+    async def wrapper(*args, **kwargs) -> Any:
+        start = time.perf_counter()
+        try:
+            with TRACER.span(f.__name__):
+                return await f(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+@contextmanager
+def observe_handler(operation: str, name_suffix: str) -> Iterator[None]:
+    """
+    Count the experiment as in flight and trace the handler in the root span
+    of a trace tagged with the name suffix of the experiment
+    """
+    with METRICS.in_flight(operation):
+        span_name = f"{operation}_chaos_experiment"
+        with TRACER.span(span_name, name_suffix=name_suffix):
+            yield
+
+
+class Span:
+    """
+    A timed operation of a handler, within the trace of that handler.
+
+    Spans inherit the attributes of their parent, such as the name suffix of
+    the experiment.
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start",
+        "end",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time.time()
+        self.end = None
+        self.error = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+
+# span of the running step, inherited by the tasks it starts
+_current_span = contextvars.ContextVar("chaostoolkit_crd_span", default=None)
+
+
+class Tracer:
+    """
+    Open spans and hand them to every exporter once finished.
+
+    Exporters are objects with an `export(span)` method. Without any, no
+    span is created at all.
+    """
+
+    def __init__(self, exporters: List[Any] = None) -> None:
+        self.exporters = list(exporters or [])
+
+    def add_exporter(self, exporter: Any) -> None:
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter: Any) -> None:
+        self.exporters.remove(exporter)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        if not self.exporters:
+            yield None
+            return
+
+        parent = _current_span.get()
+        if parent is None:
+            span = Span(name, secrets.token_hex(16), None, attributes)
+        else:
+            span = Span(
+                name,
+                parent.trace_id,
+                parent.span_id,
+                {**parent.attributes, **attributes},
+            )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = describe_error(e)
+            raise
+        finally:
+            span.end = time.time()
+            _current_span.reset(token)
+            for exporter in self.exporters:
+                exporter.export(span)
+
+
+class InMemorySpanExporter:
+    """
+    Keep the finished spans in memory, for tests to look into
+    """
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class LoggingSpanExporter:
+    """
+    Log every finished span with its duration and attributes
+    """
+
+    def export(self, span: Span) -> None:
+        logger = logging.getLogger("kopf.objects")
+        attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        logger.info(
+            f"Span '{span.name}' took {span.duration * 1000:.1f}ms "
+            f"[trace={span.trace_id} span={span.span_id} "
+            f"parent={span.parent_id}] {attributes}"
+            + (f" error={span.error}" if span.error else "")
+        )
+
+
+def load_span_exporter(name: str) -> Any:
+    """
+    Build the span exporter named "log", or returned by the factory at the
+    given `module:callable` path
+    """
+    if name == "log":
+        return LoggingSpanExporter()
+
+    module_name, _, factory_name = name.partition(":")
+    try:
+        factory = getattr(importlib.import_module(module_name), factory_name)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise kopf.PermanentError(f"Cannot load span exporter '{name}': {e}")
+    return factory()
+
+
+TRACER = Tracer()
+
+
+class ApiClients:
+    """
+    Kubernetes API clients shared by all handlers of the operator process.
+
+    All APIs go through a single `ApiClient`, hence a single connection pool
+    of at most `pool_size` connections, so TLS connections to the API server
+    are reused across experiments. When `config_file` is set, that kubeconfig
+    is loaded instead of the in-cluster or default configuration.
+    """
+
+    def __init__(
+        self,
+        mode: str = API_MODE,
+        pool_size: int = API_POOL_SIZE,
+        config_file: str = None,
+    ):
+        if mode == API_MODE_ASYNCIO and not HAS_ASYNCIO_CLIENT:
+            mode = API_MODE_THREAD
+        self.mode = mode
+        self.pool_size = pool_size
+        self.config_file = config_file
+        self.api_client = None
+        self.core = None
+        self.rbac = None
+        self.batch = None
+        self.custom = None
+        self.coordination = None
+
+    async def open(self) -> None:
+        if self.mode == API_MODE_ASYNCIO:
+            if self.config_file:
+                await aio_config.load_kube_config(config_file=self.config_file)
+            else:
+                try:
+                    aio_config.load_incluster_config()
+                except aio_config.ConfigException:
+                    await aio_config.load_kube_config()
+            module = aio_client
+        else:
+            if self.config_file:
+                config.load_kube_config(config_file=self.config_file)
+            else:
+                try:
+                    config.load_incluster_config()
+                except config.ConfigException:
+                    config.load_kube_config()
+            module = client
+
+        configuration = module.Configuration.get_default_copy()
+        configuration.connection_pool_maxsize = self.pool_size
+        self.api_client = module.ApiClient(configuration)
+        self.core = module.CoreV1Api(self.api_client)
+        self.rbac = module.RbacAuthorizationV1Api(self.api_client)
+        self.batch = module.BatchV1Api(self.api_client)
+        self.custom = module.CustomObjectsApi(self.api_client)
+        self.coordination = module.CoordinationV1Api(self.api_client)
+
+    async def close(self) -> None:
+        if self.api_client is None:
+            return
+
+        if self.mode == API_MODE_ASYNCIO:
+            await self.api_client.close()
+        else:
+            self.api_client.close()
+            self.api_client.rest_client.pool_manager.clear()
+        self.api_client = None
+
+
+class Target:
+    """
+    A target of a batch experiment: one run is created per target
+    """
+
+    __slots__ = ("name", "env")
+
+    def __init__(self, name: str, env: Dict[str, str] = None) -> None:
+        self.name = name
+        self.env = env or {}
+
+    @classmethod
+    def from_dict(cls, target: Any, path: str) -> "Target":
+        target = read_spec_section(target, path, ("name", "env"))
+        name = read_spec_field(target, "name", str, None, path)
+        if name is None or not TARGET_NAME_RE.match(name):
+            raise kopf.PermanentError(
+                f"Invalid '{path}.name' '{name}': it must be a lowercase "
+                "RFC 1123 label of at most 32 characters"
+            )
+        env = read_spec_field(target, "env", Mapping, {}, path)
+        for key, value in env.items():
+            if not isinstance(value, (str, int)) or isinstance(value, bool):
+                raise kopf.PermanentError(
+                    f"'{path}.env.{key}' must be a string or an integer"
+                )
+        return cls(name, {k: str(v) for k, v in env.items()})
+
+
+class PodSpec:
+    """
+    The `pod` section of an experiment, with its defaults
+    """
+
+    __slots__ = (
+        "image",
+        "env_enabled",
+        "env_config_map_name",
+        "env_secret_name",
+        "env_variables",
+        "settings_enabled",
+        "settings_secret_name",
+        "experiment_as_file",
+        "experiment_config_map_name",
+        "experiment_file_name",
+        "experiment_content",
+        "experiment_json",
+        "experiment_gzip",
+        "chaos_args",
+        "chaos_command_path",
+        "template",
+    )
+
+    @classmethod
+    def from_dict(cls, pod: Any, path: str = "spec.pod") -> "PodSpec":
+        pod = read_spec_section(
+            pod,
+            path,
+            (
+                "image",
+                "env",
+                "settings",
+                "experiment",
+                "chaosArgs",
+                "chaosCommandPath",
+                "template",
+            ),
+        )
+        env_path = f"{path}.env"
+        env = read_spec_section(
+            pod.get("env"),
+            env_path,
+            ("enabled", "configMapName", "secretName", "variables"),
+        )
+        settings_path = f"{path}.settings"
+        settings = read_spec_section(
+            pod.get("settings"), settings_path, ("enabled", "secretName")
+        )
+        experiment_path = f"{path}.experiment"
+        experiment = read_spec_section(
+            pod.get("experiment"),
+            experiment_path,
+            (
+                "asFile",
+                "configMapName",
+                "configMapExperimentFileName",
+                "content",
+            ),
+        )
+
+        self = cls()
+        self.image = read_spec_field(pod, "image", str, None, path)
+        self.env_enabled = read_spec_field(env, "enabled", bool, True, env_path)
+        self.env_config_map_name = read_spec_field(
+            env, "configMapName", str, "chaostoolkit-env", env_path
+        )
+        self.env_secret_name = read_spec_field(
+            env, "secretName", str, None, env_path
+        )
+        variables = read_spec_field(env, "variables", Mapping, {}, env_path)
+        for key, value in variables.items():
+            if not isinstance(value, (str, int)) or isinstance(value, bool):
+                raise kopf.PermanentError(
+                    f"'{env_path}.variables.{key}' must be a string or an "
+                    "integer"
+                )
+        self.env_variables = {k: str(v) for k, v in variables.items()}
+        self.settings_enabled = read_spec_field(
+            settings, "enabled", bool, False, settings_path
+        )
+        self.settings_secret_name = read_spec_field(
+            settings,
+            "secretName",
+            str,
+            "chaostoolkit-settings",
+            settings_path,
+        )
+        self.experiment_as_file = read_spec_field(
+            experiment, "asFile", bool, True, experiment_path
+        )
+        self.experiment_config_map_name = read_spec_field(
+            experiment,
+            "configMapName",
+            str,
+            "chaostoolkit-experiment",
+            experiment_path,
+        )
+        self.experiment_file_name = read_spec_field(
+            experiment,
+            "configMapExperimentFileName",
+            str,
+            "experiment.json",
+            experiment_path,
+        )
+        self.experiment_content = read_spec_field(
+            experiment, "content", Mapping, None, experiment_path
+        )
+        if self.experiment_content and not self.experiment_as_file:
+            raise kopf.PermanentError(
+                f"'{experiment_path}.content' is mounted as a file, it "
+                "cannot be used with 'asFile: false'"
+            )
+        # serialized once, to be stored and sized
+        self.experiment_json = None
+        if self.experiment_content:
+            self.experiment_json = json.dumps(
+                self.experiment_content, sort_keys=True, separators=(",", ":")
+            )
+        self.experiment_gzip = bool(
+            self.experiment_json
+            and EXPERIMENT_GZIP_MIN_SIZE
+            and len(self.experiment_json) >= EXPERIMENT_GZIP_MIN_SIZE
+        )
+        self.chaos_args = read_spec_field(pod, "chaosArgs", list, [], path)
+        if not all(isinstance(a, (str, type(None))) for a in self.chaos_args):
+            raise kopf.PermanentError(f"'{path}.chaosArgs' must be strings")
+        self.chaos_command_path = read_spec_field(
+            pod, "chaosCommandPath", str, None, path
+        )
+
+        # parsed once, copied by every run
+        self.template = None
+        template = read_spec_field(pod, "template", str, None, path)
+        if template:
+            try:
+                self.template = yaml.safe_load(template)
+            except yaml.YAMLError as e:
+                raise kopf.PermanentError(
+                    f"'{path}.template' is not valid YAML: {e}"
+                )
+            if not isinstance(self.template, dict) or not isinstance(
+                self.template.get("spec"), dict
+            ):
+                raise kopf.PermanentError(
+                    f"'{path}.template' must be a pod with a spec"
+                )
+        return self
+
+
+class ExperimentSpec:
+    """
+    The spec of an experiment, with its defaults, validated and built once
+    per event.
+
+    Every invalid value is reported as a `kopf.PermanentError` before any
+    call to the Kubernetes API.
+    """
+
+    __slots__ = (
+        "namespace",
+        "verbose",
+        "priority",
+        "templates_name",
+        "sa_name",
+        "role_name",
+        "role_bind",
+        "binds_to_namespaces",
+        "schedule_kind",
+        "schedule_value",
+        "pod",
+        "targets",
+    )
+
+    @classmethod
+    def from_dict(cls, spec: Any) -> "ExperimentSpec":
+        path = "spec"
+        spec = read_spec_section(
+            spec,
+            path,
+            (
+                "namespace",
+                "verbose",
+                "priority",
+                "template",
+                "serviceaccount",
+                "role",
+                "schedule",
+                "pod",
+                "targets",
+            ),
+        )
+        template = read_spec_section(
+            spec.get("template"), "spec.template", ("name",)
+        )
+        sa = read_spec_section(
+            spec.get("serviceaccount"), "spec.serviceaccount", ("name",)
+        )
+        role = read_spec_section(
+            spec.get("role"),
+            "spec.role",
+            ("name", "bind", "binds_to_namespaces"),
+        )
+        schedule = read_spec_section(
+            spec.get("schedule"), "spec.schedule", ("kind", "value")
+        )
+
+        self = cls()
+        self.namespace = read_spec_field(
+            spec, "namespace", str, "chaostoolkit-run", path
+        )
+        self.verbose = read_spec_field(spec, "verbose", bool, False, path)
+        # bool is an int too
+        if isinstance(spec.get("priority"), bool):
+            raise kopf.PermanentError(
+                "'spec.priority' must be of type 'integer'"
+            )
+        self.priority = read_spec_field(spec, "priority", int, 0, path)
+        self.templates_name = read_spec_field(
+            template,
+            "name",
+            str,
+            "chaostoolkit-resources-templates",
+            "spec.template",
+        )
+        self.sa_name = read_spec_field(
+            sa, "name", str, None, "spec.serviceaccount"
+        )
+        self.role_name = read_spec_field(role, "name", str, None, "spec.role")
+        self.role_bind = read_spec_field(role, "bind", str, None, "spec.role")
+        self.binds_to_namespaces = read_spec_field(
+            role, "binds_to_namespaces", list, [], "spec.role"
+        )
+        if not all(isinstance(n, str) for n in self.binds_to_namespaces):
+            raise kopf.PermanentError(
+                "'spec.role.binds_to_namespaces' must be namespace names"
+            )
+
+        self.schedule_kind = None
+        self.schedule_value = None
+        if schedule:
+            kind = read_spec_field(schedule, "kind", str, "", "spec.schedule")
+            if kind.lower() != "cronjob":
+                raise kopf.PermanentError(
+                    f"Unsupported 'spec.schedule.kind' '{kind}', it must be "
+                    "'cronJob'"
+                )
+            self.schedule_kind = kind
+            self.schedule_value = read_spec_field(
+                schedule, "value", str, None, "spec.schedule"
+            )
+            if not self.schedule_value:
+                raise kopf.PermanentError("'spec.schedule.value' is required")
+
+        self.pod = PodSpec.from_dict(spec.get("pod"))
+
+        targets = read_spec_field(spec, "targets", list, [], path)
+        self.targets = [
+            Target.from_dict(t, f"spec.targets[{i}]")
+            for i, t in enumerate(targets)
+        ]
+        names = [t.name for t in self.targets]
+        for name in names:
+            if names.count(name) > 1:
+                raise kopf.PermanentError(
+                    f"Duplicate experiment target '{name}'"
+                )
+        return self
+
+    @property
+    def is_scheduled(self) -> bool:
+        return self.schedule_kind is not None
+
+
+def read_spec_section(
+    section: Any, path: str, fields: Tuple[str, ...]
+) -> Mapping:
+    """
+    Return a mapping of the spec, empty when missing, after checking it only
+    holds known fields.
+    """
+    if section is None:
+        return {}
+    if not isinstance(section, Mapping):
+        raise kopf.PermanentError(f"'{path}' must be a mapping")
+    unknown = [k for k in section if k not in fields]
+    if unknown:
+        raise kopf.PermanentError(
+            f"Unknown field(s) in '{path}': {', '.join(map(str, unknown))}"
+        )
+    return section
+
+
+def read_spec_field(
+    section: Mapping, key: str, kind: type, default: Any, path: str
+) -> Any:
+    """
+    Return a field of a spec mapping, or `default` when it is missing, after
+    checking its type.
+    """
+    value = section.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, kind):
+        raise kopf.PermanentError(
+            f"'{path}.{key}' must be of type '{SPEC_TYPE_NAMES[kind]}'"
+        )
+    return value
+
+
+class ResourceTemplates:
+    """
+    Templates of a templates configmap, parsed once.
+
+    `get` hands out a copy of a parsed template, that callers are free to
+    change.
+    """
+
+    def __init__(
+        self, resource_version: Optional[str], data: Dict[str, str]
+    ) -> None:
+        self.resource_version = resource_version
+        self.data = data
+        self.templates = {
+            key: yaml.safe_load(value)
+            for key, value in data.items()
+            if key in TEMPLATE_KEYS
+        }
+
+    def get(self, key: str) -> Resource:
+        return clone_resource(self.templates[key])
+
+
+# last parsed templates of every configmap, by namespace and name
+_parsed_templates: Dict[Tuple[str, str], ResourceTemplates] = {}
+
+
+def parse_templates(
+    namespace: str,
+    name: str,
+    resource_version: Optional[str],
+    data: Dict[str, str],
+) -> ResourceTemplates:
+    """
+    Parse the templates of a configmap, unless this version of the configmap
+    was already parsed.
+    """
+    templates = _parsed_templates.get((namespace, name))
+    if (
+        templates is None
+        or resource_version is None
+        or templates.resource_version != resource_version
+    ):
+        templates = ResourceTemplates(resource_version, dict(data or {}))
+        _parsed_templates[(namespace, name)] = templates
+    return templates
+
+
+def load_template(
+    configmap: Union[ResourceTemplates, client.V1ConfigMap], key: str
+) -> Resource:
+    """
+    Return a fresh copy of the template stored under `key` in the configmap
+    """
+    if isinstance(configmap, ResourceTemplates):
+        return configmap.get(key)
+    return yaml.safe_load(configmap.data[key])
+
+
+def clone_resource(resource: Any) -> Any:
+    """
+    Deep copy of a resource made only of dicts, lists and scalars, as parsed
+    from YAML. Much cheaper than `copy.deepcopy`.
+    """
+    if isinstance(resource, dict):
+        return {k: clone_resource(v) for k, v in resource.items()}
+    if isinstance(resource, list):
+        return [clone_resource(v) for v in resource]
+    return resource
+
+
+@observe_step
+async def delete_experiment(  # noqa: C901
+    meta: ResourceChunk,
+    body: bodies.Body,
+    spec: ResourceChunk,
+    namespace: str,
+    logger: logging.Logger,
+    memo: kopf.Memo,
+    status: Optional[ResourceChunk],
+    templates_index: Optional[kopf.Index],
+    runs_index: Optional[kopf.Index],
+) -> None:
+    """
+    Delete the objects created for the experiment, see
+    `delete_chaos_experiment`
+    """
+    name_suffix = generate_name_suffix(body)
+    v1 = memo.api_clients.core
+    v1rbac = memo.api_clients.rbac
+    v1cron = memo.api_clients.batch
+
+    # a queued experiment leaves the queue, an admitted one frees the
+    # runs it was admitted for and whose pods are not seen yet
+    memo.admission.release(
+        f"{meta.get('namespace')}/{meta.get('name')}", runs_index
+    )
+
+    try:
+        spec = ExperimentSpec.from_dict(spec)
+    except kopf.PermanentError:
+        # nothing was created for an experiment rejected at creation
+        logger.error(
+            f"Not deleting objects with suffix '-{name_suffix}' of an "
+            "invalid experiment",
+            exc_info=True,
+        )
+        return
+
+    ns = spec.namespace
+    logger.info(f"Deleting objects with suffix '-{name_suffix}' in ns '{ns}'")
+
+    inventory = (status or {}).get("inventory")
+    if inventory:
+        failures = await delete_inventory(
+            memo.api_clients, inventory, name_suffix
+        )
+        config_maps = (status or {}).get("configmaps")
+        if config_maps:
+            failures.update(
+                await release_config_maps(
+                    memo, config_maps, body["metadata"]["uid"]
+                )
+            )
+        rbac_suffix = (status or {}).get("rbac")
+        if rbac_suffix:
+            failures.update(
+                await release_rbac(
+                    memo, spec, rbac_suffix, body["metadata"]["uid"]
+                )
+            )
+    else:
+        # experiments created before objects were labelled
+        try:
+            cm = await get_config_map(v1, spec, namespace, templates_index)
+        except Exception:
+            logger.error(
+                f"Failed to delete objects with suffix '-{name_suffix}' in "
+                f"ns '{ns}'",
+                exc_info=True,
+            )
+            return
+
+        failures = await delete_experiment_objects(
+            v1, v1rbac, v1cron, cm, spec, ns, name_suffix
+        )
+
+    summary = ", ".join(
+        f"{label}: {'failed (' + describe_error(e) + ')' if e else 'ok'}"
+        for label, e in failures.items()
+    )
+    if any(failures.values()):
+        logger.error(
+            f"Failed to delete objects with suffix '-{name_suffix}' in "
+            f"ns '{ns}': {summary}"
+        )
+    else:
+        logger.info(
+            f"Deleted objects with suffix '-{name_suffix}' in ns '{ns}': "
+            f"{summary}"
+        )
+
+
+async def delete_experiment_objects(
+    v1: client.CoreV1Api,
+    v1rbac: client.RbacAuthorizationV1Api,
+    v1cron: client.BatchV1Api,
+    cm: Resource,
+    spec: ExperimentSpec,
+    ns: str,
+    name_suffix: str,
+) -> Dict[str, Optional[BaseException]]:
+    """
+    Delete the objects of an experiment one by one, by names rebuilt from
+    the templates.
+
+    Return the error of each deletion, or `None` when it succeeded.
+    """
+    # the workload goes first, so it never runs without its RBAC objects
+    workload = {}
+    if spec.is_scheduled:
+        workload["cron job"] = lambda: delete_cron_job(
+            v1cron, cm, spec, ns, name_suffix
+        )
+    else:
+        workload["pod"] = lambda: delete_pod(v1, cm, spec, ns, name_suffix)
+    workload["env configmap"] = lambda: delete_experiment_env_config_map(
+        v1, ns, spec.pod.env_config_map_name, name_suffix
+    )
+    failures = await run_concurrently(workload)
+
+    failures.update(
+        await run_concurrently(
+            {
+                "bound namespaces": lambda: unbind_role_from_namespaces(
+                    v1rbac, cm, spec, ns, name_suffix
+                ),
+                "role binding": lambda: delete_role_binding(
+                    v1rbac, cm, spec, ns, name_suffix
+                ),
+                "role": lambda: delete_role(v1rbac, cm, spec, ns, name_suffix),
+                "service account": lambda: delete_sa(
+                    v1, cm, spec, ns, name_suffix
+                ),
+            }
+        )
+    )
+
+    return failures
+
+
+@observe_step
+async def delete_inventory(
+    api_clients: ApiClients,
+    inventory: Dict[str, List[str]],
+    name_suffix: str,
+) -> Dict[str, Optional[BaseException]]:
+    """
+    Delete the objects of an experiment, from its inventory, with one
+    `deletecollection` call by kind and namespace, selecting them by the
+    experiment label.
+
+    Return the error of each call, or `None` when it succeeded.
+    """
+    selector = f"{EXPERIMENT_LABEL}={name_suffix}"
+
+    def deleters(kinds: List[str]) -> Dict[str, Callable[[], Awaitable]]:
+        steps = {}
+        for ns, ns_kinds in inventory.items():
+            for kind in ns_kinds:
+                if kind not in kinds:
+                    continue
+                api_name, method = COLLECTION_DELETERS[kind]
+                f = getattr(getattr(api_clients, api_name), method)
+                steps[f"{kind} in '{ns}'"] = partial(
+                    run_async, f, namespace=ns, label_selector=selector
+                )
+        return steps
+
+    # the workload goes first, so it never runs without its RBAC objects
+    failures = await run_concurrently(deleters(WORKLOAD_KINDS))
+    failures.update(
+        await run_concurrently(
+            deleters(
+                [k for k in COLLECTION_DELETERS if k not in WORKLOAD_KINDS]
+            )
+        )
+    )
+    return failures
+
+
+def experiment_inventory(
+    spec: ExperimentSpec, shared_rbac: bool = False
+) -> Dict[str, List[str]]:
+    """
+    Kinds of the objects the operator creates for the experiment, by
+    namespace.
+
+    Objects named by the user, such as their own service account, are not
+    created by the operator and therefore not listed. Neither are the
+    content-addressed configmaps, nor the RBAC objects when they are shared
+    with other experiments.
+    """
+    kinds = ["cronjobs" if spec.is_scheduled else "pods"]
+
+    inventory = {spec.namespace: kinds}
+    if not shared_rbac:
+        for ns, ns_kinds in rbac_inventory(spec).items():
+            inventory.setdefault(ns, []).extend(ns_kinds)
+    return inventory
+
+
+def rbac_inventory(spec: ExperimentSpec) -> Dict[str, List[str]]:
+    """
+    Kinds of the RBAC objects the operator creates for the experiment, by
+    namespace
+    """
+    rbac_kinds = []
+    if not spec.role_name:
+        rbac_kinds.append("roles")
+    if not spec.role_bind:
+        rbac_kinds.append("rolebindings")
+
+    kinds = []
+    if not spec.sa_name:
+        kinds.append("serviceaccounts")
+
+    inventory = {}
+    if kinds + rbac_kinds:
+        inventory[spec.namespace] = kinds + rbac_kinds
+    for bind_ns in spec.binds_to_namespaces:
+        if rbac_kinds:
+            inventory.setdefault(bind_ns, [])
+            for kind in rbac_kinds:
+                if kind not in inventory[bind_ns]:
+                    inventory[bind_ns].append(kind)
+    return inventory
+
+
+def shared_rbac_suffix(configmap: Resource, spec: ExperimentSpec) -> str:
+    """
+    Name suffix of the RBAC set an experiment shares with the experiments
+    that would get identical service account, role and role binding
+    templates, in the same namespaces.
+    """
+    parts = [
+        json.dumps(load_template(configmap, key), sort_keys=True)
+        for key in RBAC_TEMPLATE_KEYS
+    ]
+    parts.extend(
+        [
+            spec.namespace,
+            spec.sa_name or "",
+            spec.role_name or "",
+            spec.role_bind or "",
+        ]
+    )
+    parts.extend(sorted(spec.binds_to_namespaces))
+    digest = hashlib.blake2b(
+        "\n".join(parts).encode("utf-8"), digest_size=5
+    ).hexdigest()
+    return f"shared-{digest}"
+
 
-@kopf.on.create("chaostoolkit.org", "v1", "chaosexperiments")  # noqa: C901
-async def create_chaos_experiment(  # noqa: C901
-    meta: ResourceChunk,
-    body: bodies.Body,
-    spec: ResourceChunk,
-    namespace: str,
-    logger: logging.Logger,
-    **kwargs,
+def label_experiment_object(resource: Resource, name_suffix: str) -> None:
+    """
+    Label an object created for the experiment with its name suffix
+    """
+    kopf.label(resource, labels={EXPERIMENT_LABEL: name_suffix})
+
+
+def mark_experiment_run(
+    resource: Resource, cro_meta: ResourceChunk, target: "Target" = None
 ) -> None:
     """
-    Create a new pod running a Chaos Toolkit instance until it terminates.
+    Mark an object running the experiment so that its progress is reported
+    on the status of the experiment, under its target if any.
+    """
+    annotations = resource.setdefault("metadata", {}).setdefault(
+        "annotations", {}
+    )
+    annotations[EXPERIMENT_REF_ANNOTATION] = (
+        f"{cro_meta.get('namespace')}/{cro_meta.get('name')}"
+    )
+    if target:
+        kopf.label(resource, labels={TARGET_LABEL: target.name})
 
-    If experiment is scheduled, create a new cronJob that will
-    periodically create a Chaos Toolkit instance.
+
+def track_run(
+    memo: kopf.Memo,
+    labels: ResourceChunk,
+    annotations: ResourceChunk,
+    run: ResourceChunk,
+) -> None:
+    """
+    Queue the status of a run for the experiment it belongs to
     """
-    v1 = client.CoreV1Api()
-    v1rbac = client.RbacAuthorizationV1Api()
-    v1cron = client.BatchV1Api()
+    namespace, _, name = annotations[EXPERIMENT_REF_ANNOTATION].partition("/")
+    target = labels.get(TARGET_LABEL)
+    status = {"targets": {target: run}} if target else run
+    memo.status_updates.update(namespace, name, status)
 
-    name_suffix = generate_name_suffix(body)
-    logger.info(f"Suffix for resource names will be '-{name_suffix}'")
-
-    cm = await get_config_map(v1, spec, namespace)
-    ns, _ = await create_ns(v1, cm, spec)
-    await create_sa(v1, cm, spec, ns, name_suffix)
-    await create_role(v1rbac, cm, spec, ns, name_suffix)
-    await create_role_binding(v1rbac, cm, spec, ns, ns, name_suffix)
-    await bind_role_to_namespaces(v1rbac, cm, spec, ns, name_suffix)
-    _, cm_was_created = await create_experiment_env_config_map(
-        v1, ns, spec, name_suffix
-    )
-
-    schedule = spec.get("schedule", {})
-    if schedule:
-        if schedule.get("kind").lower() == "cronjob":
-            # when schedule defined, we cannot create the pod directly,
-            # we must create a cronJob with the pod definition
-            pod_tpl = await create_pod(
-                v1,
-                cm,
-                spec,
-                ns,
-                name_suffix,
-                meta,
-                apply=False,
-                cm_was_created=cm_was_created,
-            )
-            if pod_tpl:
-                await create_cron_job(
-                    v1cron, cm, spec, ns, name_suffix, meta, pod_tpl=pod_tpl
+
+def pod_run_status(pod: Resource) -> ResourceChunk:
+    """
+    Status of a run from its pod: phase, start and finish times and the exit
+    code of the `chaostoolkit` container once it terminated.
+    """
+    status = pod.get("status") or {}
+    run = {
+        "pod": pod["metadata"]["name"],
+        "phase": status.get("phase") or "Pending",
+        "startTime": status.get("startTime"),
+    }
+    container_statuses = status.get("containerStatuses") or []
+    for container_status in container_statuses:
+        if container_status.get("name") == "chaostoolkit" or (
+            len(container_statuses) == 1
+        ):
+            terminated = (container_status.get("state") or {}).get("terminated")
+            if terminated:
+                run["exitCode"] = terminated.get("exitCode")
+                run["finishTime"] = terminated.get("finishedAt")
+            break
+    return {k: v for k, v in run.items() if v is not None}
+
+
+def job_run_status(job: Resource) -> ResourceChunk:
+    """
+    Status of a run from its job: phase and start and finish times.
+    """
+    status = job.get("status") or {}
+    phase = "Running" if status.get("active") else "Pending"
+    finish_time = None
+    for condition in status.get("conditions") or []:
+        if condition.get("status") != "True":
+            continue
+        if condition.get("type") == "Complete":
+            phase = "Succeeded"
+            finish_time = status.get("completionTime")
+        elif condition.get("type") == "Failed":
+            phase = "Failed"
+            finish_time = condition.get("lastTransitionTime")
+    run = {
+        "job": job["metadata"]["name"],
+        "phase": phase,
+        "startTime": status.get("startTime"),
+        "finishTime": finish_time,
+    }
+    return {k: v for k, v in run.items() if v is not None}
+
+
+def merge_status(status: ResourceChunk, changes: ResourceChunk) -> None:
+    """
+    Merge status changes into pending ones, the way a merge patch would
+    """
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(status.get(key), dict):
+            merge_status(status[key], value)
+        else:
+            status[key] = value
+
+
+def batch_phase(phases: List[Optional[str]]) -> Optional[str]:
+    """
+    Phase of a batch experiment from those of the runs of its targets:
+    `Succeeded` or `Failed` once they all finished, `Running` as soon as one
+    started, `Pending` before, and none without targets.
+    """
+    if not phases:
+        return None
+    if all(phase in FINISHED_PHASES for phase in phases):
+        return "Failed" if "Failed" in phases else "Succeeded"
+    if any(phase == "Running" or phase in FINISHED_PHASES for phase in phases):
+        return "Running"
+    return "Pending"
+
+
+class StatusUpdates:
+    """
+    Status changes of experiments waiting to be sent.
+
+    The changes of an experiment are merged together for `delay` seconds
+    after the first one, then sent with a single merge patch, so that a pod
+    going through several phases in a row patches the experiment once.
+
+    The phase of a batch experiment is rolled up from those of the runs of
+    its targets, see `batch_phase`.
+    """
+
+    def __init__(
+        self, api_clients: ApiClients, delay: float = STATUS_UPDATE_DELAY
+    ) -> None:
+        self.api_clients = api_clients
+        self.delay = delay
+        self.pending: Dict[Tuple[str, str], ResourceChunk] = {}
+        self.annotations: Dict[Tuple[str, str], ResourceChunk] = {}
+        self.tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def update(self, namespace: str, name: str, status: ResourceChunk) -> None:
+        key = (namespace, name)
+        merge_status(self.pending.setdefault(key, {}), status)
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.ensure_future(self.flush_later(key))
+
+    def admitted(self, ref: str) -> None:
+        """
+        Report that the experiment of the given `<namespace>/<name>` left
+        the queue, and annotate it so that `start_admitted_experiment`
+        starts it
+        """
+        namespace, _, name = ref.partition("/")
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.annotations[(namespace, name)] = {
+            ADMITTED_ANNOTATION: now.isoformat()
+        }
+        self.update(namespace, name, {"phase": "Admitted"})
+
+    async def flush_later(self, key: Tuple[str, str]) -> None:
+        await asyncio.sleep(self.delay)
+        await self.flush(key)
+
+    async def flush(self, key: Tuple[str, str]) -> None:
+        self.tasks.pop(key, None)
+        status = self.pending.pop(key, None)
+        if not status:
+            return
+
+        namespace, name = key
+        logger = logging.getLogger("kopf.objects")
+        body = {"status": status}
+        annotations = self.annotations.pop(key, None)
+        if annotations:
+            body["metadata"] = {"annotations": annotations}
+        try:
+            if "targets" in status:
+                await self.roll_up(namespace, name, status)
+            await patch_experiment(self.api_clients, namespace, name, body)
+        except Exception as e:
+            # nothing awaits this task, its errors would go unnoticed
+            if not isinstance(e, ApiException) or e.status != 404:
+                logger.warning(
+                    f"Failed to update the status of experiment '{name}' in "
+                    f"ns '{namespace}': {describe_error(e)}"
                 )
-    else:
-        # create pod for running experiment right away
-        pod_tpl = await create_pod(
-            v1, cm, spec, ns, name_suffix, meta, cm_was_created=cm_was_created
+
+    async def roll_up(
+        self, namespace: str, name: str, status: ResourceChunk
+    ) -> None:
+        """
+        Set the phase of a batch experiment from those of the runs of its
+        targets, the pending ones merged into those of its current status
+        """
+        experiment = await run_async(
+            self.api_clients.custom.get_namespaced_custom_object,
+            group="chaostoolkit.org",
+            version="v1",
+            plural="chaosexperiments",
+            namespace=namespace,
+            name=name,
+        )
+        runs = (experiment.get("status") or {}).get("targets") or {}
+        merge_status(runs, status["targets"])
+        targets = (experiment.get("spec") or {}).get("targets") or []
+        phase = batch_phase(
+            [(runs.get(t.get("name")) or {}).get("phase") for t in targets]
         )
+        if phase:
+            status["phase"] = phase
+
+    async def close(self) -> None:
+        """
+        Send the pending changes right away
+        """
+        tasks = list(self.tasks.values())
+        self.tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*[self.flush(key) for key in list(self.pending)])
+
+
+async def patch_experiment(
+    api_clients: ApiClients, namespace: str, name: str, body: ResourceChunk
+) -> None:
+    """
+    Merge patch an experiment
+    """
+    patch = api_clients.custom.patch_namespaced_custom_object
+    kwargs = {}
+    if is_asyncio_api_call(patch):
+        # unlike the synchronous one, the asyncio client defaults to JSON
+        # patches for custom objects
+        kwargs["_content_type"] = "application/merge-patch+json"
+    await run_async(
+        patch,
+        group="chaostoolkit.org",
+        version="v1",
+        plural="chaosexperiments",
+        namespace=namespace,
+        name=name,
+        body=body,
+        **kwargs,
+    )
 
 
-@kopf.on.delete("chaostoolkit.org", "v1", "chaosexperiments")  # noqa: C901
-async def delete_chaos_experiment(  # noqa: C901
-    meta: ResourceChunk,
-    body: bodies.Body,
-    spec: ResourceChunk,
-    namespace: str,
-    logger: logging.Logger,
-    **kwargs,
-) -> None:
-    v1 = client.CoreV1Api()
-    v1rbac = client.RbacAuthorizationV1Api()
-    v1cron = client.BatchV1Api()
+class RunResult:
+    """
+    Result of a run summarized from the log of its `chaostoolkit` container,
+    fed chunk by chunk as it is streamed: the status of the experiment, the
+    steady state probes which deviated and the duration of the run.
 
-    ns = spec.get("namespace", "chaostoolkit-run")
-    name_suffix = generate_name_suffix(body)
-    logger.info(f"Deleting objects with suffix '-{name_suffix}' in ns '{ns}'")
+    Only the current line is kept, up to `RESULTS_MAX_LINE` bytes, so the
+    memory of a stream does not grow with the log.
+    """
 
-    try:
-        cm = await get_config_map(v1, spec, namespace)
-        schedule = spec.get("schedule", {})
-        if schedule:
-            if schedule.get("kind").lower() == "cronjob":
-                await delete_cron_job(v1cron, cm, spec, ns, name_suffix)
+    __slots__ = ("status", "deviated_probes", "started", "ended", "line")
+
+    def __init__(self) -> None:
+        self.status = None
+        self.deviated_probes: List[str] = []
+        self.started = self.ended = None
+        self.line = bytearray()
+
+    def feed(self, chunk: bytes) -> None:
+        lines = chunk.split(b"\n")
+        for i, part in enumerate(lines):
+            room = RESULTS_MAX_LINE - len(self.line)
+            if room > 0:
+                self.line += part[:room]
+            if i < len(lines) - 1:
+                self.read_line(bytes(self.line))
+                self.line.clear()
+
+    def read_line(self, line: bytes) -> None:
+        m = LOG_LINE_RE.match(line.rstrip(b"\r"))
+        if not m:
+            return
+        self.started = self.started or m.group(1)
+        self.ended = m.group(1)
+        message = m.group(2)
+        m = LOG_STATUS_RE.match(message)
+        if m:
+            self.status = m.group(1).decode("utf-8")
+            return
+        m = LOG_DEVIATED_RE.match(message)
+        if m and len(self.deviated_probes) < RESULTS_MAX_PROBES:
+            probe = m.group(1).decode("utf-8", "replace")
+            if probe not in self.deviated_probes:
+                self.deviated_probes.append(probe)
+
+    def summary(self) -> ResourceChunk:
+        if self.line:
+            self.read_line(bytes(self.line))
+            self.line.clear()
+        result = {"status": self.status or "unknown"}
+        if self.deviated_probes:
+            result["deviatedProbes"] = self.deviated_probes
+        if self.started:
+            fmt = "%Y-%m-%d %H:%M:%S"
+            duration = datetime.datetime.strptime(
+                self.ended.decode("ascii"), fmt
+            ) - datetime.datetime.strptime(self.started.decode("ascii"), fmt)
+            result["duration"] = int(duration.total_seconds())
+        return result
+
+
+class ResultCollector:
+    """
+    Collect the results of the finished runs from the logs of their pods.
+
+    Logs are streamed chunk by chunk into a `RunResult`, at most `streams`
+    at once, and the summary is handed to a callback, to go on the status
+    of the experiment. Pods are then annotated with `RESULT_ANNOTATION`, so
+    that their log is not read again, by another replica or after a
+    restart.
+    """
+
+    def __init__(
+        self, api_clients: ApiClients, streams: int = RESULTS_STREAMS
+    ) -> None:
+        self.api_clients = api_clients
+        self.streams = streams
+        self.slots = asyncio.Semaphore(max(streams, 1))
+        # pods whose log is read or waiting to be
+        self.collecting: Set[Tuple[str, str]] = set()
+        self.tasks: Set[asyncio.Task] = set()
+
+    def collect(
+        self,
+        namespace: str,
+        name: str,
+        on_result: Callable[[ResourceChunk], None],
+    ) -> None:
+        """
+        Collect the result of the run of a finished pod in the background
+        """
+        key = (namespace, name)
+        if not self.streams or key in self.collecting:
+            return
+        self.collecting.add(key)
+        task = asyncio.ensure_future(self.run(namespace, name, on_result))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run(
+        self,
+        namespace: str,
+        name: str,
+        on_result: Callable[[ResourceChunk], None],
+    ) -> None:
+        logger = logging.getLogger("kopf.objects")
+        try:
+            async with self.slots:
+                METRICS.results_streams.inc()
+                try:
+                    result = await self.read_result(namespace, name)
+                finally:
+                    METRICS.results_streams.dec()
+            on_result(result)
+            await run_async(
+                self.api_clients.core.patch_namespaced_pod,
+                name=name,
+                namespace=namespace,
+                body={"metadata": {"annotations": {RESULT_ANNOTATION: "1"}}},
+                _content_type="application/merge-patch+json",
+            )
+            logger.info(
+                f"Run of pod '{name}' in ns '{namespace}' ended with "
+                f"status '{result['status']}'"
+            )
+        except Exception as e:
+            # gone with its log, its container never started or the stream
+            # broke: nothing awaits this task, its errors would go unnoticed
+            logger.warning(
+                f"Failed to collect the result of pod '{name}' in ns "
+                f"'{namespace}': {describe_error(e)}"
+            )
+        finally:
+            self.collecting.discard((namespace, name))
+
+    async def read_result(self, namespace: str, name: str) -> ResourceChunk:
+        """
+        Stream the log of the `chaostoolkit` container of a pod into the
+        summary of its run
+        """
+        read_log = self.api_clients.core.read_namespaced_pod_log
+        response = await run_async(
+            read_log,
+            name=name,
+            namespace=namespace,
+            container="chaostoolkit",
+            _preload_content=False,
+        )
+        if is_asyncio_api_call(read_log):
+            read, release = response.content.read, response.release
         else:
-            await delete_pod(v1, cm, spec, ns, name_suffix)
-        await delete_experiment_env_config_map(
-            v1,
-            ns,
-            spec.get("pod", {})
-            .get("env", {})
-            .get("configMapName", "chaostoolkit-env"),
-            name_suffix,
-        )
-        await unbind_role_from_namespaces(v1rbac, cm, spec, ns, name_suffix)
-        await delete_role_binding(v1rbac, cm, spec, ns, name_suffix)
-        await delete_role(v1rbac, cm, spec, ns, name_suffix)
-        await delete_sa(v1, cm, spec, ns, name_suffix)
-    except Exception:
-        logger.error(
-            f"Failed to delete objects with suffix '-{name_suffix}' in "
-            f"ns '{ns}'",
-            exc_info=True,
+
+            async def read(size: int) -> bytes:
+                return await asyncio.to_thread(response.read, size)
+
+            release = response.release_conn
+
+        result = RunResult()
+        try:
+            # the clients only check the status of the responses they read
+            if not 200 <= response.status <= 299:
+                raise ApiException(
+                    status=response.status, reason=response.reason
+                )
+            while True:
+                chunk = await read(RESULTS_CHUNK_SIZE)
+                if not chunk:
+                    break
+                result.feed(chunk)
+        finally:
+            release()
+        return result.summary()
+
+    async def close(self) -> None:
+        """
+        Stop the collections going on, to be resumed on the next start as
+        their pods are not annotated yet
+        """
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class SharedObjects:
+    """
+    Users of the objects shared between experiments, such as an RBAC set or
+    a content-addressed configmap, recorded on a configmap: the shared
+    configmap itself, or one standing for the RBAC set.
+
+    Each experiment using the object is an annotation of that configmap,
+    named after its uid, so that every replica of the operator, before and
+    after a restart, counts the same users. With its last user, the
+    configmap is marked `deleting`, unless a user came meanwhile, then the
+    objects it stands for are deleted, and the configmap last.
+    """
+
+    def __init__(self, v1: client.CoreV1Api) -> None:
+        self.v1 = v1
+
+    async def acquire(self, namespace: str, body: Resource, uid: str) -> bool:
+        """
+        Record the experiment as a user of the configmap `body`, created when
+        missing, and tell whether the objects it stands for must be created,
+        as they are not `ready` yet.
+
+        The experiment is retried while the configmap is being deleted.
+        """
+        name = body["metadata"]["name"]
+        user = {f"{SHARED_USER_PREFIX}{uid}": ""}
+        while True:
+            try:
+                cm = await run_async(
+                    self.v1.patch_namespaced_config_map,
+                    name=name,
+                    namespace=namespace,
+                    body={"metadata": {"annotations": user}},
+                    _content_type="application/merge-patch+json",
+                )
+            except ApiException as e:
+                if e.status != 404:
+                    raise
+            else:
+                state = (cm.metadata.annotations or {}).get(
+                    SHARED_STATE_ANNOTATION
+                )
+                if state == "deleting":
+                    raise kopf.TemporaryError(
+                        f"Shared '{namespace}/{name}' is being deleted",
+                        delay=5,
+                    )
+                return state != "ready"
+
+            body = clone_resource(body)
+            body["metadata"].setdefault("annotations", {}).update(user)
+            try:
+                await run_async(
+                    self.v1.create_namespaced_config_map,
+                    namespace=namespace,
+                    body=body,
+                )
+            except ApiException as e:
+                if e.status != 409:
+                    raise
+                # created meanwhile by another user, recorded on it instead
+                continue
+            state = body["metadata"]["annotations"].get(SHARED_STATE_ANNOTATION)
+            return state != "ready"
+
+    async def ready(self, namespace: str, name: str) -> None:
+        """
+        Record that the objects the configmap stands for were created
+        """
+        await run_async(
+            self.v1.patch_namespaced_config_map,
+            name=name,
+            namespace=namespace,
+            body={
+                "metadata": {"annotations": {SHARED_STATE_ANNOTATION: "ready"}}
+            },
+            _content_type="application/merge-patch+json",
+        )
+
+    async def release(
+        self,
+        namespace: str,
+        name: str,
+        uid: str,
+        delete: Callable[[], Awaitable[Dict[str, Optional[BaseException]]]],
+    ) -> Dict[str, Optional[BaseException]]:
+        """
+        Stop recording the experiment as a user of the configmap and, when
+        it was the last one, `delete` the objects it stands for, then the
+        configmap.
+
+        Return the error of each deletion, or `None` when it succeeded.
+        """
+        logger = logging.getLogger("kopf.objects")
+        key = f"{namespace}/{name}"
+        try:
+            cm = await run_async(
+                self.v1.patch_namespaced_config_map,
+                name=name,
+                namespace=namespace,
+                body={
+                    "metadata": {
+                        "annotations": {f"{SHARED_USER_PREFIX}{uid}": None}
+                    }
+                },
+                _content_type="application/merge-patch+json",
+            )
+        except ApiException as e:
+            if e.status != 404:
+                return {f"configmap '{key}'": e}
+            logger.info(f"Shared '{key}' is already deleted")
+            return {}
+
+        annotations = cm.metadata.annotations or {}
+        if annotations.get(SHARED_STATE_ANNOTATION) != "deleting":
+            users = [a for a in annotations if a.startswith(SHARED_USER_PREFIX)]
+            if users:
+                logger.info(
+                    f"Shared '{key}' is still used by {len(users)} "
+                    "experiments, keeping it"
+                )
+                return {}
+            try:
+                # only when no user came since the patch above
+                await run_async(
+                    self.v1.patch_namespaced_config_map,
+                    name=name,
+                    namespace=namespace,
+                    body={
+                        "metadata": {
+                            "resourceVersion": cm.metadata.resource_version,
+                            "annotations": {
+                                SHARED_STATE_ANNOTATION: "deleting"
+                            },
+                        }
+                    },
+                    _content_type="application/merge-patch+json",
+                )
+            except ApiException as e:
+                if e.status not in (404, 409):
+                    return {f"configmap '{key}'": e}
+                logger.info(f"Shared '{key}' got a new user, keeping it")
+                return {}
+
+        logger.info(f"Deleting shared '{key}' with its last user")
+        # the configmap goes last, even when objects failed to be deleted:
+        # those left are reused by the next users
+        failures = await delete()
+        try:
+            await run_async(
+                self.v1.delete_namespaced_config_map,
+                name=name,
+                namespace=namespace,
+            )
+        except ApiException as e:
+            if e.status != 404:
+                failures[f"configmap '{key}'"] = e
+                return failures
+        failures[f"configmap '{key}'"] = None
+        return failures
+
+
+class Admission:
+    """
+    Admission of the experiments to run within caps on the runs going on at
+    once, `max_runs` across the cluster and `max_runs_per_namespace` in the
+    namespace of the runs, none when 0.
+
+    The runs going on are the unfinished pods of the runs index, plus the
+    runs of the experiments admitted whose pods are not seen yet. The
+    experiments beyond the caps are queued and admitted by priority, the
+    highest first, then in order of arrival, as runs finish. An experiment
+    whose namespace is full does not hold back those of other namespaces.
+
+    An experiment admitted holds its runs until the pods of all of them
+    finished.
+
+    Experiments are referred to as `<namespace>/<name>`. `on_admit` is
+    called with those leaving the queue.
+    """
+
+    def __init__(
+        self,
+        max_runs: int = MAX_RUNS,
+        max_runs_per_namespace: int = MAX_RUNS_PER_NAMESPACE,
+        on_admit: Callable[[str], None] = None,
+    ) -> None:
+        self.max_runs = max_runs
+        self.max_runs_per_namespace = max_runs_per_namespace
+        self.on_admit = on_admit
+        # namespace, number of runs, pods seen and pods finished of the
+        # experiments admitted
+        self.admitted: Dict[str, Tuple[str, int, Set[str], Set[str]]] = {}
+        # namespace and number of runs of the experiments queued
+        self.queued: Dict[str, Tuple[str, int]] = {}
+        self.queue: List[Tuple[int, int, str]] = []
+        self.arrivals = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_runs or self.max_runs_per_namespace)
+
+    def admit(
+        self,
+        ref: str,
+        namespace: str,
+        priority: int,
+        runs: int,
+        index: Optional[kopf.Index],
+    ) -> bool:
+        """
+        Queue the experiment, unless already queued or admitted, and tell
+        whether it is admitted
+        """
+        if not self.enabled or ref in self.admitted:
+            return True
+        if ref not in self.queued:
+            # a batch larger than a cap is admitted when it is all free
+            runs = min(
+                runs,
+                self.max_runs or runs,
+                self.max_runs_per_namespace or runs,
+            )
+            self.queued[ref] = (namespace, runs)
+            self.arrivals += 1
+            heapq.heappush(self.queue, (-priority, self.arrivals, ref))
+        admitted = self.dispatch(index)
+        self.notify([r for r in admitted if r != ref])
+        return ref in self.admitted
+
+    def observe(
+        self,
+        ref: str,
+        pod_name: str,
+        index: Optional[kopf.Index],
+        finished: bool = False,
+    ) -> None:
+        """
+        Account for an event of a pod running the experiment, now counted
+        by the index or `finished`, and forget the experiment once all its
+        runs finished
+        """
+        if ref in self.admitted:
+            _, runs, seen, done = self.admitted[ref]
+            if len(seen) < runs:
+                seen.add(pod_name)
+            if finished and pod_name in seen:
+                done.add(pod_name)
+                if len(done) >= runs:
+                    del self.admitted[ref]
+        self.wake(index)
+
+    def wake(self, index: Optional[kopf.Index]) -> None:
+        """
+        Admit the queued experiments which now fit within the caps
+        """
+        if self.queued:
+            self.notify(self.dispatch(index))
+
+    def release(self, ref: str, index: Optional[kopf.Index]) -> None:
+        """
+        Forget the experiment, queued or admitted
+        """
+        self.queued.pop(ref, None)
+        self.admitted.pop(ref, None)
+        self.wake(index)
+
+    def forget(self, refs: List[str]) -> None:
+        """
+        Forget experiments handled by another replica from now on
+        """
+        for ref in refs:
+            self.queued.pop(ref, None)
+            self.admitted.pop(ref, None)
+        METRICS.experiments_queued.set(len(self.queued))
+
+    @contextmanager
+    def releasing_on_failure(
+        self, ref: str, index: Optional[kopf.Index]
+    ) -> Iterator[None]:
+        try:
+            yield
+        except kopf.PermanentError:
+            self.release(ref, index)
+            raise
+
+    def runs(self, index: Optional[kopf.Index]) -> Dict[str, int]:
+        """
+        Number of runs going on by namespace
+        """
+        runs = {ns: len(index[ns]) for ns in index or {}}
+        for ns, admitted, seen, _ in self.admitted.values():
+            runs[ns] = runs.get(ns, 0) + max(0, admitted - len(seen))
+        return runs
+
+    def dispatch(self, index: Optional[kopf.Index]) -> List[str]:
+        """
+        Admit the queued experiments fitting within the caps and return them
+        """
+        runs = self.runs(index)
+        total = sum(runs.values())
+        admitted = []
+        held = []
+        while self.queue:
+            entry = self.queue[0]
+            ref = entry[2]
+            if ref not in self.queued:
+                # released while queued
+                heapq.heappop(self.queue)
+                continue
+            namespace, count = self.queued[ref]
+            if self.max_runs and total + count > self.max_runs:
+                break
+            heapq.heappop(self.queue)
+            if (
+                self.max_runs_per_namespace
+                and runs.get(namespace, 0) + count > self.max_runs_per_namespace
+            ):
+                held.append(entry)
+                continue
+            del self.queued[ref]
+            self.admitted[ref] = (namespace, count, set(), set())
+            runs[namespace] = runs.get(namespace, 0) + count
+            total += count
+            admitted.append(ref)
+        for entry in held:
+            heapq.heappush(self.queue, entry)
+        METRICS.experiments_queued.set(len(self.queued))
+        return admitted
+
+    def notify(self, refs: List[str]) -> None:
+        if self.on_admit is not None:
+            for ref in refs:
+                self.on_admit(ref)
+
+
+class HashRing:
+    """
+    Consistent hashing of the experiments onto the replicas of the operator
+    sharing them, by their name suffix, a hash of their uid.
+
+    Each replica has `SHARD_VIRTUAL_NODES` points on the ring and owns the
+    experiments hashed up to each of them, so a replica joining or leaving
+    only moves its own share of the experiments.
+    """
+
+    def __init__(
+        self, members: Iterable[str], virtual_nodes: int = SHARD_VIRTUAL_NODES
+    ) -> None:
+        self.members = frozenset(members)
+        self.points = sorted(
+            (shard_point(f"{member}/{i}"), member)
+            for member in self.members
+            for i in range(virtual_nodes)
         )
+        self.keys = [point for point, _ in self.points]
 
+    def owner(self, name_suffix: str) -> Optional[str]:
+        if not self.points:
+            return None
+        i = bisect.bisect_left(self.keys, int(name_suffix, 16))
+        return self.points[i % len(self.points)][1]
 
-###############################################################################
-# Internals
-###############################################################################
-async def run_async(f: Callable, *args, **kwargs) -> Any:
-    return await asyncio.to_thread(f, *args, **kwargs)
+
+def shard_point(value: str) -> int:
+    """
+    Point of a value on the hash ring, hashed like the name suffixes
+    """
+    return int(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=5).hexdigest(), 16
+    )
+
+
+class Shards:
+    """
+    Share of the experiments handled by this replica of the operator, when
+    several replicas split them with a `HashRing`.
+
+    Each replica holds a lease, named after its `shard_id` and renewed every
+    third of its duration. The ring is made of the replicas whose lease
+    changed within its duration, as seen by this replica, and checked at
+    every renewal. When the ring changes, the experiments whose creation or
+    deletion is not done yet and which this replica gets are annotated with
+    its id, so that its handlers take them over, and those it loses are
+    passed to `on_lost`. The handlers of the others filter them out, see
+    `owns_experiment`.
+
+    Without a `shard_id`, the replica handles every experiment.
+    """
+
+    def __init__(
+        self,
+        api_clients: ApiClients,
+        shard_id: str = SHARD_ID,
+        namespace: str = SHARD_NAMESPACE,
+        lease_duration: int = SHARD_LEASE_DURATION,
+        on_lost: Callable[[List[str]], None] = None,
+    ) -> None:
+        self.api_clients = api_clients
+        self.shard_id = shard_id
+        self.namespace = namespace
+        self.lease_duration = lease_duration
+        self.on_lost = on_lost
+        self.ring = HashRing([shard_id] if shard_id else [])
+        # resource version of the lease of each replica and when it was
+        # seen changing last, on the monotonic clock of this replica
+        self.leases: Dict[str, Tuple[str, float]] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def lease_name(self) -> str:
+        return f"chaostoolkit-crd-shard-{self.shard_id}"
+
+    def owns(self, name_suffix: str) -> bool:
+        return (
+            not self.shard_id or self.ring.owner(name_suffix) == self.shard_id
+        )
+
+    async def join(self) -> None:
+        """
+        Take the lease of this replica and keep it renewed
+        """
+        await self.renew()
+        self.ring = HashRing(await self.members())
+        self.task = asyncio.ensure_future(self.keep_alive())
+
+    async def leave(self) -> None:
+        """
+        Release the lease of this replica, so that the others take its share
+        over without waiting for the lease to expire
+        """
+        if self.task is None:
+            return
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+        try:
+            await run_async(
+                self.api_clients.coordination.delete_namespaced_lease,
+                name=self.lease_name,
+                namespace=self.namespace,
+            )
+        except ApiException as e:
+            if e.status != 404:
+                logging.getLogger("kopf.objects").warning(
+                    f"Failed to release the lease of shard '{self.shard_id}': "
+                    f"{describe_error(e)}"
+                )
+
+    async def keep_alive(self) -> None:
+        logger = logging.getLogger("kopf.objects")
+        while True:
+            await asyncio.sleep(self.lease_duration / 3)
+            try:
+                await self.renew()
+                members = await self.members()
+                if members != self.ring.members:
+                    await self.rebalance(HashRing(members))
+            except ApiException as e:
+                logger.warning(
+                    f"Failed to renew the lease of shard '{self.shard_id}': "
+                    f"{describe_error(e)}"
+                )
+
+    async def renew(self) -> None:
+        coordination = self.api_clients.coordination
+        now = datetime.datetime.now(datetime.timezone.utc)
+        body = {
+            "apiVersion": "coordination.k8s.io/v1",
+            "kind": "Lease",
+            "metadata": {
+                "name": self.lease_name,
+                "namespace": self.namespace,
+                "labels": {SHARD_LABEL: ""},
+            },
+            "spec": {
+                "holderIdentity": self.shard_id,
+                "leaseDurationSeconds": self.lease_duration,
+                "renewTime": now.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            },
+        }
+        try:
+            await run_async(
+                coordination.replace_namespaced_lease,
+                name=self.lease_name,
+                namespace=self.namespace,
+                body=body,
+            )
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            await run_async(
+                coordination.create_namespaced_lease,
+                namespace=self.namespace,
+                body=body,
+            )
+
+    async def members(self) -> FrozenSet[str]:
+        """
+        Replicas whose lease is current, this one included
+        """
+        leases = await run_async(
+            self.api_clients.coordination.list_namespaced_lease,
+            namespace=self.namespace,
+            label_selector=SHARD_LABEL,
+        )
+        now = time.monotonic()
+        seen = {}
+        for lease in leases.items:
+            holder = lease.spec.holder_identity
+            if not holder:
+                continue
+            version = lease.metadata.resource_version
+            previous = self.leases.get(holder)
+            if previous and previous[0] == version:
+                seen[holder] = previous
+            else:
+                seen[holder] = (version, now)
+        self.leases = seen
+        members = {
+            holder
+            for holder, (_, changed) in seen.items()
+            if now - changed <= self.lease_duration
+        }
+        members.add(self.shard_id)
+        return frozenset(members)
+
+    async def rebalance(self, ring: HashRing) -> None:
+        """
+        Move to a new ring, claiming the experiments this replica gets while
+        their creation or deletion is not done yet
+        """
+        logger = logging.getLogger("kopf.objects")
+        previous, self.ring = self.ring, ring
+        logger.info(
+            f"Shard '{self.shard_id}' now shares the experiments with "
+            f"{sorted(ring.members - {self.shard_id})}"
+        )
+
+        experiments = await run_async(
+            self.api_clients.custom.list_cluster_custom_object,
+            group="chaostoolkit.org",
+            version="v1",
+            plural="chaosexperiments",
+        )
+        claimed = {}
+        lost = []
+        for body in experiments.get("items") or []:
+            meta = body["metadata"]
+            ref = f"{meta.get('namespace')}/{meta.get('name')}"
+            name_suffix = generate_name_suffix(body)
+            was_owned = previous.owner(name_suffix) == self.shard_id
+            if ring.owner(name_suffix) != self.shard_id:
+                if was_owned:
+                    lost.append(ref)
+            elif not was_owned and (
+                LAST_HANDLED_ANNOTATION not in (meta.get("annotations") or {})
+                or meta.get("deletionTimestamp")
+            ):
+                claimed[ref] = meta
+
+        if lost and self.on_lost is not None:
+            self.on_lost(lost)
+
+        async def claim(ref: str) -> None:
+            await patch_experiment(
+                self.api_clients,
+                claimed[ref]["namespace"],
+                claimed[ref]["name"],
+                {"metadata": {"annotations": {SHARD_LABEL: self.shard_id}}},
+            )
+
+        failures = await for_each(list(claimed), claim, API_POOL_SIZE)
+        if failures:
+            logger.warning(
+                f"Shard '{self.shard_id}' failed to claim experiments: "
+                f"{format_failures(failures)}"
+            )
+
+
+def owns_experiment(
+    namespace: str, body: bodies.Body, memo: kopf.Memo, **kwargs
+) -> bool:
+    """
+    Filter of the handlers of experiments: those in the namespace of the
+    operator and, when replicas share them, owned by this replica.
+
+    kopf prematches the filters, so the other replicas are blind to the
+    experiment and would remove the kopf finalizer of its delete handler,
+    which is optional then: the owner holds the experiment with
+    `SHARD_FINALIZER` instead, see `hold_experiment`.
+    """
+    return namespace == OPERATOR_NAMESPACE and memo.shards.owns(
+        generate_name_suffix(body)
+    )
+
+
+async def hold_experiment(
+    api_clients: ApiClients, body: bodies.Body, hold: bool = True
+) -> None:
+    """
+    Add, or remove, `SHARD_FINALIZER` to the finalizers of an experiment
+
+    The finalizers are patched at the resource version of the experiment,
+    so the changes made to them meanwhile are not overwritten: the handler
+    is retried instead.
+    """
+    meta = body["metadata"]
+    finalizers = list(meta.get("finalizers") or [])
+    if (SHARD_FINALIZER in finalizers) == hold:
+        return
+    if hold:
+        finalizers.append(SHARD_FINALIZER)
+    else:
+        finalizers.remove(SHARD_FINALIZER)
+    try:
+        await patch_experiment(
+            api_clients,
+            meta["namespace"],
+            meta["name"],
+            {
+                "metadata": {
+                    "resourceVersion": meta["resourceVersion"],
+                    "finalizers": finalizers,
+                }
+            },
+        )
+    except ApiException as e:
+        if e.status == 404 and not hold:
+            return
+        if e.status != 409:
+            raise
+        raise kopf.TemporaryError(
+            "Finalizers of the experiment changed meanwhile", delay=1
+        )
+
+
+async def acquire_rbac(
+    memo: kopf.Memo,
+    configmap: Resource,
+    spec: ExperimentSpec,
+    uid: str,
+    name_suffix: str,
+) -> Tuple[str, bool]:
+    """
+    Name suffix of the RBAC objects of the experiment, and whether they must
+    be created.
+
+    In shared RBAC mode, the experiment becomes a user of the set it shares
+    with similar experiments, which is only created when missing. Its users
+    are recorded on the `chaostoolkit-<suffix>` configmap of the namespace of
+    the experiment, see `SharedObjects`.
+    """
+    if RBAC_MODE != RBAC_MODE_SHARED or not rbac_inventory(spec):
+        return name_suffix, True
+    rbac_suffix = shared_rbac_suffix(configmap, spec)
+    record = {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {"name": f"chaostoolkit-{rbac_suffix}"},
+    }
+    provision = await memo.shared_objects.acquire(spec.namespace, record, uid)
+    return rbac_suffix, provision
+
+
+@observe_step
+async def release_rbac(
+    memo: kopf.Memo,
+    spec: ExperimentSpec,
+    rbac_suffix: str,
+    uid: str,
+) -> Dict[str, Optional[BaseException]]:
+    """
+    Stop using a shared RBAC set and delete it, by label, when the
+    experiment was its last user.
+
+    Return the error of each deletion, or `None` when it succeeded.
+    """
+    return await memo.shared_objects.release(
+        spec.namespace,
+        f"chaostoolkit-{rbac_suffix}",
+        uid,
+        lambda: delete_inventory(
+            memo.api_clients, rbac_inventory(spec), rbac_suffix
+        ),
+    )
+
+
+@observe_step
+async def release_config_maps(
+    memo: kopf.Memo,
+    keys: List[str],
+    uid: str,
+) -> Dict[str, Optional[BaseException]]:
+    """
+    Stop using the content-addressed configmaps of the given
+    `<namespace>/<name>` keys and delete those the experiment was the last
+    user of.
+
+    Return the error of each deletion, or `None` when it succeeded.
+    """
+
+    async def nothing_else() -> Dict[str, Optional[BaseException]]:
+        # the configmap records its own users
+        return {}
+
+    failures = {}
+    for key in keys:
+        ns, name = key.split("/", 1)
+        failures.update(
+            await memo.shared_objects.release(ns, name, uid, nothing_else)
+        )
+    return failures
+
+
+async def run_dependency_graph(
+    steps: Dict[str, Tuple[List[str], Callable[[Dict[str, Any]], Awaitable]]],
+) -> Dict[str, Any]:
+    """
+    Run the given steps concurrently, each one starting as soon as the steps
+    it depends on have completed.
+
+    Every step is a pair of the names of the steps it depends on and a
+    function taking the results of all the steps so far and returning an
+    awaitable. Dependencies must be declared before the steps using them.
+
+    The results are returned keyed by step name. When steps fail, the error
+    of the first failed step, in declaration order, is raised once all steps
+    have settled, so that the error is the same as if the steps had run one
+    after the other.
+    """
+    results = {}
+    tasks = {}
+
+    async def run_step(name: str) -> Any:
+        deps, f = steps[name]
+        await asyncio.gather(*[tasks[d] for d in deps])
+        results[name] = await f(results)
+        return results[name]
+
+    for name in steps:
+        tasks[name] = asyncio.ensure_future(run_step(name))
+
+    outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+    return results
+
+
+async def for_each_namespace(
+    namespaces: List[str],
+    f: Callable[[str], Awaitable],
+    concurrency: int = None,
+) -> Dict[str, BaseException]:
+    """
+    Call `f` for every namespace concurrently, with at most `concurrency`
+    calls in flight at once.
+
+    A failure in one namespace does not stop the others. The errors are
+    returned keyed by namespace.
+    """
+    return await for_each(namespaces, f, concurrency or NAMESPACES_CONCURRENCY)
+
+
+async def for_each(
+    keys: List[str], f: Callable[[str], Awaitable], concurrency: int
+) -> Dict[str, BaseException]:
+    """
+    Call `f` for every key concurrently, with at most `concurrency` calls
+    in flight at once.
+
+    A failure for one key does not stop the others. The errors are returned
+    by key.
+    """
+    keys = list(dict.fromkeys(keys))
+    sem = asyncio.Semaphore(concurrency)
+
+    async def run(key: str) -> Any:
+        async with sem:
+            return await f(key)
+
+    outcomes = await asyncio.gather(
+        *[run(k) for k in keys], return_exceptions=True
+    )
+    return {
+        k: o for k, o in zip(keys, outcomes) if isinstance(o, BaseException)
+    }
+
+
+def target_name_suffix(name_suffix: str, target: "Target" = None) -> str:
+    """
+    Suffix of the names of the objects created for a single target
+    """
+    if not target:
+        return name_suffix
+    return f"{name_suffix}-{target.name}"
+
+
+async def run_concurrently(
+    steps: Dict[str, Callable[[], Awaitable]],
+) -> Dict[str, Optional[BaseException]]:
+    """
+    Run the given steps concurrently until they have all settled.
+
+    Return the error raised by each step, or `None` when it succeeded,
+    keyed by step name.
+    """
+    outcomes = await asyncio.gather(
+        *[f() for f in steps.values()], return_exceptions=True
+    )
+    return {
+        name: o if isinstance(o, BaseException) else None
+        for name, o in zip(steps, outcomes)
+    }
+
+
+def describe_error(e: BaseException) -> str:
+    """
+    Describe an error on a single line
+    """
+    if isinstance(e, ApiException):
+        return f"{e.status} {e.reason}"
+    return str(e).splitlines()[0] if str(e) else type(e).__name__
+
+
+def format_failures(failures: Dict[str, BaseException]) -> str:
+    return ", ".join(
+        f"'{n}' ({describe_error(e)})" for n, e in failures.items()
+    )
 
 
 def set_ns(resource: Union[Dict[str, Any], List[Dict[str, Any]]], ns: str):
@@ -184,23 +3485,14 @@ def set_cm_env_name(
     cm_name = name
     if cm_was_created:
         cm_name = f"{cm_name}-{name_suffix}"
-    for container in pod_tpl["spec"]["containers"]:
-        if container["name"] == "chaostoolkit":
-            for ef in container.get("envFrom", []):
-                if "configMapRef" in ef:
-                    cmr = ef["configMapRef"]
-                    if cmr["name"] == name:
-                        cmr["name"] = cm_name
+    PodTemplateBuilder(pod_tpl).set_env_config_map(name, cm_name)
 
 
 def set_image_name(pod_tpl: Dict[str, Any], image_name: str):
     """
     Set the image of the container.
     """
-    for container in pod_tpl["spec"]["containers"]:
-        if container["name"] == "chaostoolkit":
-            container["image"] = image_name
-            break
+    PodTemplateBuilder(pod_tpl).set_image_name(image_name)
 
 
 def set_env_config_map_name(pod_tpl: Dict[str, Any], env_cm_name: str):
@@ -208,11 +3500,7 @@ def set_env_config_map_name(pod_tpl: Dict[str, Any], env_cm_name: str):
     Set the name of the config map containing environment variables passed
     to the pod for the experiment's configuration or secrets.
     """
-    for container in pod_tpl["spec"]["containers"]:
-        if container["name"] == "chaostoolkit":
-            if "envFrom" in container:
-                container["envFrom"][0]["configMapRef"]["name"] = env_cm_name
-                break
+    PodTemplateBuilder(pod_tpl).set_env_config_map_name(env_cm_name)
 
 
 def remove_settings_secret(pod_tpl: Dict[str, Any]):
@@ -221,23 +3509,7 @@ def remove_settings_secret(pod_tpl: Dict[str, Any]):
 
     This is the case when no settings are provided.
     """
-    spec = pod_tpl["spec"]
-    for container in spec["containers"]:
-        if container["name"] == "chaostoolkit":
-            for vm in container["volumeMounts"]:
-                if vm["name"] == "chaostoolkit-settings":
-                    container["volumeMounts"].remove(vm)
-                    if len(container["volumeMounts"]) == 0:
-                        container.pop("volumeMounts", None)
-                    break
-
-    for volume in spec["volumes"]:
-        if volume["name"] == "chaostoolkit-settings":
-            spec["volumes"].remove(volume)
-            break
-
-    if len(spec["volumes"]) == 0:
-        spec.pop("volumes", None)
+    PodTemplateBuilder(pod_tpl).remove_volume("chaostoolkit-settings")
 
 
 def remove_experiment_volume(pod_tpl: Dict[str, Any]):
@@ -247,23 +3519,7 @@ def remove_experiment_volume(pod_tpl: Dict[str, Any]):
     This is the case when the experiment is passed as a URL via
     `EXPERIMENT_URL`.
     """
-    spec = pod_tpl["spec"]
-    for container in spec["containers"]:
-        if container["name"] == "chaostoolkit":
-            for vm in container["volumeMounts"]:
-                if vm["name"] == "chaostoolkit-experiment":
-                    container["volumeMounts"].remove(vm)
-                    if len(container["volumeMounts"]) == 0:
-                        container.pop("volumeMounts", None)
-                    break
-
-    for volume in spec["volumes"]:
-        if volume["name"] == "chaostoolkit-experiment":
-            spec["volumes"].remove(volume)
-            break
-
-    if len(spec["volumes"]) == 0:
-        spec.pop("volumes", None)
+    PodTemplateBuilder(pod_tpl).remove_volume("chaostoolkit-experiment")
 
 
 def remove_env_config_map(pod_tpl: Dict[str, Any]):
@@ -273,16 +3529,7 @@ def remove_env_config_map(pod_tpl: Dict[str, Any]):
 
     Disable it when you do not pass any environment variable.
     """
-    spec = pod_tpl["spec"]
-    for container in spec["containers"]:
-        if container["name"] == "chaostoolkit":
-            for ef in container["envFrom"]:
-                cmrf = ef.get("configMapRef")
-                if cmrf and cmrf["name"] == "chaostoolkit-env":
-                    container["envFrom"].remove(ef)
-                    if len(container["envFrom"]) == 0:
-                        container.pop("envFrom", None)
-                    break
+    PodTemplateBuilder(pod_tpl).remove_env_config_map()
 
 
 def add_env_secret(pod_tpl: Dict[str, Any], secret_name: str):
@@ -291,13 +3538,7 @@ def add_env_secret(pod_tpl: Dict[str, Any], secret_name: str):
 
     See: https://kubernetes.io/docs/tasks/inject-data-application/distribute-credentials-secure/#configure-all-key-value-pairs-in-a-secret-as-container-environment-variables
     """  # noqa: E501
-    spec = pod_tpl["spec"]
-    for container in spec["containers"]:
-        if container["name"] == "chaostoolkit":
-            container.setdefault("envFrom", []).append(
-                {"secretRef": {"name": secret_name}}
-            )
-            break
+    PodTemplateBuilder(pod_tpl).add_env_secret(secret_name)
 
 
 def remove_env_path_config_map(pod_tpl: Dict[str, Any]):
@@ -305,24 +3546,14 @@ def remove_env_path_config_map(pod_tpl: Dict[str, Any]):
     Remove the `EXPERIMENT_PATH` environment path because the experiment
     was set to be a URL via `EXPERIMENT_URL`.
     """
-    spec = pod_tpl["spec"]
-    for container in spec["containers"]:
-        if container["name"] == "chaostoolkit":
-            for e in container["env"]:
-                if e["name"] == "EXPERIMENT_PATH":
-                    container["env"].remove(e)
-                    break
+    PodTemplateBuilder(pod_tpl).remove_env("EXPERIMENT_PATH")
 
 
 def set_settings_secret_name(pod_tpl: Dict[str, Any], secret_name: str):
     """
     Set the secret volume and volume mounts from the pod.
     """
-    spec = pod_tpl["spec"]
-    for volume in spec["volumes"]:
-        if volume["name"] == "chaostoolkit-settings":
-            volume["secret"]["secretName"] = secret_name
-            break
+    PodTemplateBuilder(pod_tpl).set_settings_secret_name(secret_name)
 
 
 def set_experiment_config_map_name(
@@ -333,86 +3564,33 @@ def set_experiment_config_map_name(
     """
     Set the experiment config map volume and volume mounts from the pod.
     """
-    spec = pod_tpl["spec"]
-    for volume in spec["volumes"]:
-        if volume["name"] == "chaostoolkit-experiment":
-            volume["configMap"]["name"] = cm_name
-            break
-
-    for container in spec["containers"]:
-        if container["name"] == "chaostoolkit":
-            for e in container["env"]:
-                if e["name"] == "EXPERIMENT_PATH":
-                    e["value"] = f"/home/svc/{experiment_file}"
-                    break
-
-            for mount in container["volumeMounts"]:
-                if mount["name"] == "chaostoolkit-experiment":
-                    mount["mountPath"] = f"/home/svc/{experiment_file}"
-                    mount["subPath"] = experiment_file
-                    break
+    PodTemplateBuilder(pod_tpl).set_experiment_config_map_name(
+        cm_name, experiment_file
+    )
 
 
 def set_chaos_cmd_args(pod_tpl: Dict[str, Any], cmd_args: List[str]):
     """
     Set the command line arguments for the chaos command
 
-    Handle two syntax of the POD template command:
-    * Legacy:
-        command:
-        - "/bin/sh"
-        args:
-        - "-c"
-        - "chaos run ${EXPERIMENT_PATH-$EXPERIMENT_URL} && exit $?"
-    -> we need to inject the arguments into the last args command line string
-    * New style:
-        command:
-        - "chaos"
-        args:
-        - run
-        - $(EXPERIMENT_PATH)
-    -> we can directly replace the list of args by user's list
-    Beware the new style args must use the K8s env vars syntax: $()
-    See: https://kubernetes.io/docs/tasks/inject-data-application/define-command-argument-container/#use-environment-variables-to-define-arguments
-    """  # noqa: E501
-    # filter out empty values from command line arguments: None, ''
-    cmd_args = list(filter(None, cmd_args))
-
-    spec = pod_tpl["spec"]
-    for container in spec["containers"]:
-        if container["name"] == "chaostoolkit":
-            if "chaos" in container["command"][0]:
-                # new style syntax: pod command is chaos command
-                container["args"] = cmd_args
-            else:
-                # legacy syntax: pod command is a new shell
-                args_as_str = " ".join(cmd_args)
-                new_cmd = "chaos {args} && exit $?".format(args=args_as_str)
-                container["args"][-1] = new_cmd
+    See `PodTemplateBuilder.set_chaos_cmd_args` for the supported syntaxes
+    of the pod template command.
+    """
+    PodTemplateBuilder(pod_tpl).set_chaos_cmd_args(cmd_args)
 
 
 def set_chaos_cmd_path(pod_tpl: Dict[str, Any], cmd_path: str = "chaos"):
     """
     Set the command line path for the chaos command
-    """  # noqa: E501
-    spec = pod_tpl["spec"]
-    for container in spec["containers"]:
-        if container["name"] == "chaostoolkit":
-            if "chaos" in container["command"][0]:
-                container["command"] = [cmd_path]
-                break
+    """
+    PodTemplateBuilder(pod_tpl).set_chaos_cmd_path(cmd_path)
 
 
 def set_verbose_chaos(pod_tpl: Dict[str, Any]):
     """
     Make the Chaos Toolkit verbose
-    """  # noqa: E501
-    spec = pod_tpl["spec"]
-    for container in spec["containers"]:
-        if container["name"] == "chaostoolkit":
-            if "chaos" in container["command"][0]:
-                container["args"].insert(0, "--verbose")
-                break
+    """
+    PodTemplateBuilder(pod_tpl).set_verbose_chaos()
 
 
 def set_cron_job_name(cron_tpl: Dict[str, Any], name_suffix: str) -> str:
@@ -454,47 +3632,444 @@ def set_cron_job_template_spec(
     _tpl["spec"] = tpl_spec
 
 
-async def create_experiment_env_config_map(
+class PodTemplateBuilder:
+    """
+    Apply the overrides of an experiment to a pod template in a single pass.
+
+    The `chaostoolkit` container, its environment variables and volume
+    mounts, as well as the pod volumes, are indexed by name once, rather
+    than being searched again by every change.
+    """
+
+    def __init__(self, pod_tpl: Dict[str, Any]) -> None:
+        self.pod_tpl = pod_tpl
+        self.spec = pod_tpl["spec"]
+        self.container = {}
+        for container in self.spec.get("containers", []):
+            if container["name"] == "chaostoolkit":
+                self.container = container
+                break
+
+        self.volumes = {}
+        for volume in self.spec.get("volumes", []):
+            self.volumes.setdefault(volume["name"], volume)
+        self.mounts = {}
+        for mount in self.container.get("volumeMounts", []):
+            self.mounts.setdefault(mount["name"], mount)
+        self.env = {}
+        for e in self.container.get("env", []):
+            self.env.setdefault(e["name"], e)
+
+    def apply_overrides(
+        self, pod_spec: PodSpec, verbose: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Apply all the overrides of the `pod` section of an experiment
+        """
+        logger = logging.getLogger("kopf.objects")
+
+        image_name = pod_spec.image
+        env_cm_name = pod_spec.env_config_map_name
+        env_cm_enabled = pod_spec.env_enabled
+        # optional support for loading secret keys as env. variables
+        env_secret_name = pod_spec.env_secret_name
+        settings_secret_enabled = pod_spec.settings_enabled
+        settings_secret_name = pod_spec.settings_secret_name
+        experiment_as_file = pod_spec.experiment_as_file
+        experiment_config_map_name = pod_spec.experiment_config_map_name
+        experiment_config_map_file_name = pod_spec.experiment_file_name
+        cmd_args = pod_spec.chaos_args
+        cmd_path = pod_spec.chaos_command_path
+
+        # if image name is not given in CRO,
+        # we keep the one defined by default in pod template from configmap
+        if image_name:
+            self.set_image_name(image_name)
+
+        if not env_cm_enabled:
+            logger.info("Removing default env configmap volume")
+            self.remove_env_config_map()
+        elif env_cm_name:
+            logger.info(f"Env config map named '{env_cm_name}'")
+            self.set_env_config_map_name(env_cm_name)
+
+        if env_secret_name and env_cm_enabled:
+            logger.info(
+                f"Adding secret '{env_secret_name}' as environment variables"
+            )
+            self.add_env_secret(env_secret_name)
+
+        if not settings_secret_enabled:
+            logger.info("Removing default settings secret volume")
+            self.remove_volume("chaostoolkit-settings")
+        elif settings_secret_name:
+            logger.info(
+                f"Settings secret volume named '{settings_secret_name}'"
+            )
+            self.set_settings_secret_name(settings_secret_name)
+
+        if experiment_as_file:
+            logger.info(
+                f"Experiment config map named '{experiment_config_map_name}'"
+            )
+            self.set_experiment_config_map_name(
+                experiment_config_map_name, experiment_config_map_file_name
+            )
+        else:
+            logger.info("Removing default experiment config map volume")
+            self.remove_volume("chaostoolkit-experiment")
+            self.remove_env("EXPERIMENT_PATH")
+            self.set_chaos_cmd_args(["run", "$(EXPERIMENT_URL)"])
+
+        if cmd_args:
+            # filter out empty values from command line arguments: None, ''
+            cmd_args = list(filter(None, cmd_args))
+            logger.info(
+                f"Override default chaos command arguments: "
+                f"$ chaos {' '.join([str(arg) for arg in cmd_args])}"
+            )
+            self.set_chaos_cmd_args(cmd_args)
+
+        if cmd_path:
+            logger.info(f"Override default chaos command path to '{cmd_path}'")
+            self.set_chaos_cmd_path(cmd_path)
+
+        if verbose:
+            self.set_verbose_chaos()
+
+        return self.pod_tpl
+
+    def runs_chaos(self) -> bool:
+        """
+        Tell whether the container command is the chaos command itself
+        """
+        return "chaos" in self.container["command"][0]
+
+    def set_image_name(self, image_name: str) -> None:
+        self.container["image"] = image_name
+
+    def set_env_config_map_name(self, env_cm_name: str) -> None:
+        if "envFrom" in self.container:
+            self.container["envFrom"][0]["configMapRef"]["name"] = env_cm_name
+
+    def add_env_secret(self, secret_name: str) -> None:
+        self.container.setdefault("envFrom", []).append(
+            {"secretRef": {"name": secret_name}}
+        )
+
+    def set_settings_secret_name(self, secret_name: str) -> None:
+        volume = self.volumes.get("chaostoolkit-settings")
+        if volume:
+            volume["secret"]["secretName"] = secret_name
+
+    def remove_env(self, name: str) -> None:
+        env = self.env.pop(name, None)
+        if env:
+            self.container["env"].remove(env)
+
+    def set_chaos_cmd_path(self, cmd_path: str = "chaos") -> None:
+        if self.runs_chaos():
+            self.container["command"] = [cmd_path]
+
+    def set_verbose_chaos(self) -> None:
+        if self.runs_chaos():
+            self.container["args"].insert(0, "--verbose")
+
+    def remove_env_config_map(self) -> None:
+        env_from = self.container.get("envFrom", [])
+        for ef in env_from:
+            cmrf = ef.get("configMapRef")
+            if cmrf and cmrf["name"] == "chaostoolkit-env":
+                env_from.remove(ef)
+                if len(env_from) == 0:
+                    self.container.pop("envFrom", None)
+                break
+
+    def remove_volume(self, name: str) -> None:
+        """
+        Remove a volume and its volume mount from the pod
+        """
+        mount = self.mounts.pop(name, None)
+        if mount is not None:
+            mounts = self.container["volumeMounts"]
+            mounts.remove(mount)
+            if len(mounts) == 0:
+                self.container.pop("volumeMounts", None)
+
+        volume = self.volumes.pop(name, None)
+        if volume is not None:
+            self.spec["volumes"].remove(volume)
+        if "volumes" in self.spec and len(self.spec["volumes"]) == 0:
+            self.spec.pop("volumes", None)
+
+    def set_experiment_config_map_name(
+        self, cm_name: str, experiment_file: str = "experiment.json"
+    ) -> None:
+        volume = self.volumes.get("chaostoolkit-experiment")
+        if volume:
+            volume["configMap"]["name"] = cm_name
+
+        env = self.env.get("EXPERIMENT_PATH")
+        if env:
+            env["value"] = f"/home/svc/{experiment_file}"
+
+        mount = self.mounts.get("chaostoolkit-experiment")
+        if mount:
+            mount["mountPath"] = f"/home/svc/{experiment_file}"
+            mount["subPath"] = experiment_file
+
+    def unpack_experiment(
+        self, experiment_file: str = "experiment.json"
+    ) -> None:
+        """
+        Mount the experiment decompressed by an init container, running
+        `EXPERIMENT_UNPACK_IMAGE`, from the gzipped file of the experiment
+        configmap, into an `emptyDir` volume
+        """
+        mount = self.mounts.pop("chaostoolkit-experiment", None)
+        if mount is None or "chaostoolkit-experiment" not in self.volumes:
+            return
+
+        mount["name"] = EXPERIMENT_UNPACKED_VOLUME
+        self.mounts[EXPERIMENT_UNPACKED_VOLUME] = mount
+        volume = {"name": EXPERIMENT_UNPACKED_VOLUME, "emptyDir": {}}
+        self.spec["volumes"].append(volume)
+        self.volumes[EXPERIMENT_UNPACKED_VOLUME] = volume
+
+        init_container = {
+            "name": "chaostoolkit-unpack",
+            "image": EXPERIMENT_UNPACK_IMAGE,
+            "imagePullPolicy": "IfNotPresent",
+            "command": [
+                "sh",
+                "-c",
+                'gunzip -c "$0" > "$1"',
+                f"/home/svc/packed/{experiment_file}.gz",
+                f"/home/svc/unpacked/{experiment_file}",
+            ],
+            "volumeMounts": [
+                {
+                    "name": "chaostoolkit-experiment",
+                    "mountPath": "/home/svc/packed",
+                    "readOnly": True,
+                },
+                {
+                    "name": EXPERIMENT_UNPACKED_VOLUME,
+                    "mountPath": "/home/svc/unpacked",
+                },
+            ],
+        }
+        if "securityContext" in self.container:
+            init_container["securityContext"] = clone_resource(
+                self.container["securityContext"]
+            )
+        self.spec.setdefault("initContainers", []).append(init_container)
+
+    def set_chaos_cmd_args(self, cmd_args: List[str]) -> None:
+        """
+        Set the command line arguments for the chaos command
+
+        Handle two syntax of the POD template command:
+        * Legacy:
+            command:
+            - "/bin/sh"
+            args:
+            - "-c"
+            - "chaos run ${EXPERIMENT_PATH-$EXPERIMENT_URL} && exit $?"
+        -> we need to inject the arguments into the last args command line
+        string
+        * New style:
+            command:
+            - "chaos"
+            args:
+            - run
+            - $(EXPERIMENT_PATH)
+        -> we can directly replace the list of args by user's list
+        Beware the new style args must use the K8s env vars syntax: $()
+        See: https://kubernetes.io/docs/tasks/inject-data-application/define-command-argument-container/#use-environment-variables-to-define-arguments
+        """  # noqa: E501
+        cmd_args = list(filter(None, cmd_args))
+        if self.runs_chaos():
+            self.container["args"] = cmd_args
+        else:
+            args_as_str = " ".join(cmd_args)
+            new_cmd = "chaos {args} && exit $?".format(args=args_as_str)
+            self.container["args"][-1] = new_cmd
+
+    def set_env(self, env: Dict[str, Any]) -> None:
+        """
+        Set environment variables of the container, overriding the ones
+        already defined with the same name
+        """
+        for name, value in env.items():
+            e = self.env.get(name)
+            if e is None:
+                e = self.env[name] = {"name": name}
+                self.container.setdefault("env", []).append(e)
+            e.pop("valueFrom", None)
+            e["value"] = str(value)
+
+    def set_env_config_map(self, name: str, new_name: Optional[str]) -> None:
+        """
+        Make the reference to the `name` env configmap point to `new_name`,
+        or remove it when `new_name` is not set
+        """
+        env_from = self.container.get("envFrom", [])
+        for ef in list(env_from):
+            cmr = ef.get("configMapRef")
+            if not cmr or cmr["name"] != name:
+                continue
+            if new_name:
+                cmr["name"] = new_name
+            else:
+                env_from.remove(ef)
+        if "envFrom" in self.container and len(env_from) == 0:
+            self.container.pop("envFrom", None)
+
+
+@observe_step
+async def provision_env_config_map(
+    memo: kopf.Memo,
     v1: client.CoreV1Api,
     namespace: str,
-    spec: Dict[str, Any],
-    name_suffix: str = None,
-):
+    spec: ExperimentSpec,
+    uid: str,
+) -> Tuple[Optional[str], bool]:
     """
-    Create the default configmap to hold experiment environment variables,
-    in case it wasn't already created by the user.
+    Name of the configmap holding the environment variables of the
+    experiment, or `None` when it has none, and whether it is shared.
 
-    If it already exists, we do not return it so that the operator does not
-    take its ownership.
+    The `env.variables` of the experiment are stored in a configmap named
+    after a hash of their content, shared by the experiments with the same
+    variables. Otherwise, the `env.configMapName` configmap of the user is
+    used when it exists.
     """
     logger = logging.getLogger("kopf.objects")
-    created = False
+    pod_spec = spec.pod
+    if not pod_spec.env_enabled:
+        return None, False
+
+    if pod_spec.env_variables:
+        name = await acquire_config_map(
+            memo,
+            v1,
+            namespace,
+            content_config_map("chaostoolkit-env", pod_spec.env_variables),
+            uid,
+        )
+        return name, True
 
+    name = pod_spec.env_config_map_name
     try:
-        cm = await run_async(
-            v1.read_namespaced_config_map,
-            namespace=namespace,
-            name="chaostoolkit-env",
+        await run_async(
+            v1.read_namespaced_config_map, namespace=namespace, name=name
         )
-        logger.info("Reusing existing default 'chaostoolkit-env' configmap")
-    except ApiException:
-        spec_env = spec.get("pod", {}).get("env", {})
-        cm_name = spec_env.get("configMapName", "chaostoolkit-env")
-        cm_name = f"chaostoolkit-env-{name_suffix}"
-        body = client.V1ConfigMap(metadata=client.V1ObjectMeta(name=cm_name))
+    except ApiException as e:
+        if e.status != 404:
+            raise
+        logger.info(f"No '{name}' configmap, running without one")
+        return None, False
+    logger.info(f"Reusing existing '{name}' configmap")
+    return name, False
 
-        logger.info(f"Creating default '{cm_name}' configmap")
-        try:
-            cm = v1.create_namespaced_config_map(namespace, body)
-            created = True
-        except ApiException as e:
-            raise kopf.PermanentError(
-                f"Failed to create experiment configmap: {str(e)}"
-            )
 
-    return cm, created
+@observe_step
+async def provision_experiment_config_map(
+    memo: kopf.Memo,
+    v1: client.CoreV1Api,
+    namespace: str,
+    spec: ExperimentSpec,
+    uid: str,
+) -> Tuple[Optional[str], bool]:
+    """
+    Name of the configmap holding the experiment given as `content` in the
+    spec, named after a hash of it and shared by the experiments running
+    the same one, or `None` when the experiment comes from the user's own
+    configmap, and whether it is shared.
+
+    Experiments of `EXPERIMENT_GZIP_MIN_SIZE` bytes or more are stored
+    gzipped, see `PodTemplateBuilder.unpack_experiment`.
+    """
+    pod_spec = spec.pod
+    if not pod_spec.experiment_content:
+        return None, False
+
+    name = await acquire_config_map(
+        memo,
+        v1,
+        namespace,
+        content_config_map(
+            "chaostoolkit-experiment",
+            {pod_spec.experiment_file_name: pod_spec.experiment_json},
+            compress=pod_spec.experiment_gzip,
+        ),
+        uid,
+    )
+    return name, True
+
+
+def content_config_map(
+    prefix: str, data: Dict[str, str], compress: bool = False
+) -> Resource:
+    """
+    Immutable configmap holding `data`, named after a hash of it so that
+    identical content is stored once.
+
+    Compressed, each value is gzipped into `binaryData` under its key with
+    a `.gz` suffix instead.
+    """
+    content = json.dumps(data, sort_keys=True)
+    if compress:
+        # not the name of the same content stored uncompressed
+        content += ".gz"
+    digest = hashlib.blake2b(content.encode("utf-8"), digest_size=5).hexdigest()
+    cm = {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {
+            "name": f"{prefix}-{digest}",
+            "labels": {CONTENT_LABEL: digest},
+            # created at once, with its content
+            "annotations": {SHARED_STATE_ANNOTATION: "ready"},
+        },
+        "immutable": True,
+    }
+    if not compress:
+        cm["data"] = data
+        return cm
+    cm["binaryData"] = {
+        f"{key}.gz": base64.b64encode(
+            gzip.compress(value.encode("utf-8"), mtime=0)
+        ).decode("ascii")
+        for key, value in data.items()
+    }
+    return cm
+
+
+async def acquire_config_map(
+    memo: kopf.Memo,
+    v1: client.CoreV1Api,
+    namespace: str,
+    body: Resource,
+    uid: str,
+) -> str:
+    """
+    Record the experiment as a user of the content-addressed configmap,
+    created when missing, see `SharedObjects`. Return its name.
+    """
+    logger = logging.getLogger("kopf.objects")
+    name = body["metadata"]["name"]
+    try:
+        await memo.shared_objects.acquire(namespace, body, uid)
+        logger.info(f"Using shared configmap '{name}'")
+    except ApiException as e:
+        raise kopf.PermanentError(
+            f"Failed to create configmap '{name}': {str(e)}"
+        )
+    return name
 
 
+@observe_step
 async def delete_experiment_env_config_map(
     v1: client.CoreV1Api,
     namespace: str,
@@ -503,42 +4078,71 @@ async def delete_experiment_env_config_map(
 ):
     logger = logging.getLogger("kopf.objects")
     name = f"{name}-{name_suffix}"
-    logger.info("Deleting '{name}' configmap")
+    logger.info(f"Deleting '{name}' configmap")
     try:
         return await run_async(
             v1.delete_namespaced_config_map, name=name, namespace=namespace
         )
-    except ApiException:
-        logger.error(
-            f"Failed to delete experiment configmap '{name}'", exc_info=True
-        )
+    except ApiException as e:
+        if e.status != 404:
+            raise
+        logger.debug(f"Configmap '{name}' was already deleted")
 
 
+@observe_step
 async def get_config_map(
-    v1: client.CoreV1Api, spec: Dict[str, Any], namespace: str
-):
-    cm_pod_spec_name = spec.get("template", {}).get(
-        "name", "chaostoolkit-resources-templates"
-    )
+    v1: client.CoreV1Api,
+    spec: ExperimentSpec,
+    namespace: str,
+    index: kopf.Index = None,
+) -> "ResourceTemplates":
+    """
+    Return the templates configmap of the experiment.
+
+    It is taken from the operator's index of templates configmaps when it is
+    there, otherwise it is read from the API.
+    """
+    cm_pod_spec_name = spec.templates_name
+    if index is not None:
+        for templates in index.get((namespace, cm_pod_spec_name), []):
+            return templates
+
     cm = await run_async(
         v1.read_namespaced_config_map,
         namespace=namespace,
         name=cm_pod_spec_name,
     )
-    return cm
+    return parse_templates(
+        namespace, cm_pod_spec_name, cm.metadata.resource_version, cm.data
+    )
 
 
+@observe_step
 async def create_ns(
-    api: client.CoreV1Api, configmap: Resource, cro_spec: ResourceChunk
+    api: client.CoreV1Api,
+    configmap: Resource,
+    cro_spec: ExperimentSpec,
+    index: kopf.Index = None,
 ) -> Union[str, Resource]:
     """
     If it already exists, we do not return it so that the operator does not
     take its ownership.
+
+    The namespace is labelled with `NAMESPACE_LABEL`: a namespace that is
+    active in the operator's index of these namespaces is known to exist
+    and is not created again. Namespaces are created even in
+    server-side apply mode: a forced apply would take over the fields of a
+    namespace someone else made.
     """
     logger = logging.getLogger("kopf.objects")
-    ns_name = cro_spec.get("namespace", "chaostoolkit-run")
-    tpl = yaml.safe_load(configmap.data["chaostoolkit-ns.yaml"])
+    ns_name = cro_spec.namespace
+    if index is not None and "Active" in index.get(ns_name, []):
+        logger.debug(f"Namespace '{ns_name}' already exists, not creating it")
+        return ns_name, None
+
+    tpl = load_template(configmap, "chaostoolkit-ns.yaml")
     tpl["metadata"]["name"] = ns_name
+    tpl["metadata"].setdefault("labels", {})[NAMESPACE_LABEL] = "true"
     logger.debug(f"Creating namespace with template:\n{tpl}")
     try:
         r = await run_async(api.create_namespace, body=tpl)
@@ -554,25 +4158,30 @@ async def create_ns(
             raise kopf.PermanentError(f"Failed to create namespace: {str(e)}")
 
 
+@observe_step
 async def create_sa(
     api: client.CoreV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
 ):
     logger = logging.getLogger("kopf.objects")
-    sa_name = cro_spec.get("serviceaccount", {}).get("name")
+    sa_name = cro_spec.sa_name
     if not sa_name:
-        tpl = yaml.safe_load(configmap.data["chaostoolkit-sa.yaml"])
+        tpl = load_template(configmap, "chaostoolkit-sa.yaml")
         sa_name = tpl["metadata"]["name"]
         sa_name = f"{sa_name}-{name_suffix}"
         tpl["metadata"]["name"] = sa_name
         set_ns(tpl, ns)
+        label_experiment_object(tpl, name_suffix)
         logger.debug(f"Creating service account with template:\n{tpl}")
         try:
-            return await run_async(
-                api.create_namespaced_service_account, body=tpl, namespace=ns
+            return await create_or_apply(
+                api.create_namespaced_service_account,
+                api.patch_namespaced_service_account,
+                tpl,
+                namespace=ns,
             )
         except ApiException as e:
             if e.status == 409:
@@ -583,17 +4192,18 @@ async def create_sa(
                 )
 
 
+@observe_step
 async def delete_sa(
     api: client.CoreV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
 ):
     logger = logging.getLogger("kopf.objects")
-    sa_name = cro_spec.get("serviceaccount", {}).get("name")
+    sa_name = cro_spec.sa_name
     if not sa_name:
-        tpl = yaml.safe_load(configmap.data["chaostoolkit-sa.yaml"])
+        tpl = load_template(configmap, "chaostoolkit-sa.yaml")
         sa_name = tpl["metadata"]["name"]
         sa_name = f"{sa_name}-{name_suffix}"
         logger.debug(f"Deleting service account: {sa_name}")
@@ -603,32 +4213,37 @@ async def delete_sa(
                 name=sa_name,
                 namespace=ns,
             )
-        except ApiException:
-            logger.error(
-                f"Failed to delete service account '{sa_name}'", exc_info=True
-            )
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            logger.debug(f"Service account '{sa_name}' was already deleted")
 
 
+@observe_step
 async def create_role(
     api: client.RbacAuthorizationV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
 ):
     logger = logging.getLogger("kopf.objects")
-    role_name = cro_spec.get("role", {}).get("name")
+    role_name = cro_spec.role_name
     if not role_name:
-        tpl = yaml.safe_load(configmap.data["chaostoolkit-role.yaml"])
+        tpl = load_template(configmap, "chaostoolkit-role.yaml")
         role_name = tpl["metadata"]["name"]
         role_name = f"{role_name}-{name_suffix}"
         tpl["metadata"]["name"] = role_name
         set_ns(tpl, ns)
+        label_experiment_object(tpl, name_suffix)
 
         logger.debug(f"Creating role with template:\n{tpl}")
         try:
-            return await run_async(
-                api.create_namespaced_role, body=tpl, namespace=ns
+            return await create_or_apply(
+                api.create_namespaced_role,
+                api.patch_namespaced_role,
+                tpl,
+                namespace=ns,
             )
         except ApiException as e:
             if e.status == 409:
@@ -637,17 +4252,18 @@ async def create_role(
                 raise kopf.PermanentError(f"Failed to create role: {str(e)}")
 
 
+@observe_step
 async def delete_role(
     api: client.RbacAuthorizationV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
 ):
     logger = logging.getLogger("kopf.objects")
-    role_name = cro_spec.get("role", {}).get("name")
+    role_name = cro_spec.role_name
     if not role_name:
-        tpl = yaml.safe_load(configmap.data["chaostoolkit-role.yaml"])
+        tpl = load_template(configmap, "chaostoolkit-role.yaml")
         role_name = tpl["metadata"]["name"]
         role_name = f"{role_name}-{name_suffix}"
         logger.debug(f"Deleting role with template: {role_name}")
@@ -655,22 +4271,25 @@ async def delete_role(
             return await run_async(
                 api.delete_namespaced_role, name=role_name, namespace=ns
             )
-        except ApiException:
-            logger.error(f"Failed to delete role '{role_name}'", exc_info=True)
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            logger.debug(f"Role '{role_name}' was already deleted")
 
 
+@observe_step
 async def create_role_binding(
     api: client.RbacAuthorizationV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     sa_ns: str,
     name_suffix: str,
 ):
     logger = logging.getLogger("kopf.objects")
-    role_bind_name = cro_spec.get("role", {}).get("bind")
+    role_bind_name = cro_spec.role_bind
     if not role_bind_name:
-        tpl = yaml.safe_load(configmap.data["chaostoolkit-role-binding.yaml"])
+        tpl = load_template(configmap, "chaostoolkit-role-binding.yaml")
         role_binding_name = tpl["metadata"]["name"]
         role_binding_name = f"{role_binding_name}-{name_suffix}"
         tpl["metadata"]["name"] = role_binding_name
@@ -684,17 +4303,21 @@ async def create_role_binding(
         tpl["subjects"][0]["namespace"] = sa_ns
 
         # change role name
-        role_name = cro_spec.get("role", {}).get("name")
+        role_name = cro_spec.role_name
         if not role_name:
             role_name = tpl["roleRef"]["name"]
             role_name = f"{role_name}-{name_suffix}"
         tpl["roleRef"]["name"] = role_name
 
         set_ns(tpl, ns)
+        label_experiment_object(tpl, name_suffix)
         logger.debug(f"Creating role binding with template:\n{tpl}")
         try:
-            return await run_async(
-                api.create_namespaced_role_binding, body=tpl, namespace=ns
+            return await create_or_apply(
+                api.create_namespaced_role_binding,
+                api.patch_namespaced_role_binding,
+                tpl,
+                namespace=ns,
             )
         except ApiException as e:
             if e.status == 409:
@@ -705,10 +4328,11 @@ async def create_role_binding(
                 raise kopf.PermanentError(f"Failed to bind to role: {str(e)}")
 
 
+@observe_step
 async def bind_role_to_namespaces(
     api: client.RbacAuthorizationV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
 ):
@@ -716,21 +4340,29 @@ async def bind_role_to_namespaces(
     Binds the role to other namespaces so the experiment can perform ops
     in them.
     """
-    bind_ns = cro_spec.get("role", {}).get("binds_to_namespaces", [])
+    bind_ns = cro_spec.binds_to_namespaces
     if not bind_ns:
         return
 
-    for bind in bind_ns:
-        await create_role(api, configmap, cro_spec, bind, name_suffix)
-        await create_role_binding(
-            api, configmap, cro_spec, bind, ns, name_suffix
+    async def bind(bind: str) -> None:
+        with TRACER.span("bind_namespace", namespace=bind):
+            await create_role(api, configmap, cro_spec, bind, name_suffix)
+            await create_role_binding(
+                api, configmap, cro_spec, bind, ns, name_suffix
+            )
+
+    failures = await for_each_namespace(bind_ns, bind)
+    if failures:
+        raise kopf.PermanentError(
+            f"Failed to bind role to namespaces: {format_failures(failures)}"
         )
 
 
+@observe_step
 async def unbind_role_from_namespaces(
     api: client.RbacAuthorizationV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
 ):
@@ -738,26 +4370,46 @@ async def unbind_role_from_namespaces(
     Unbinds the role from other namespaces so the experiment can perform ops
     in them.
     """
-    bind_ns = cro_spec.get("role", {}).get("binds_to_namespaces", [])
+    bind_ns = cro_spec.binds_to_namespaces
     if not bind_ns:
         return
 
-    for bind in bind_ns:
-        await delete_role(api, configmap, cro_spec, bind, name_suffix)
-        await delete_role_binding(api, configmap, cro_spec, bind, name_suffix)
+    async def unbind(bind: str) -> None:
+        with TRACER.span("unbind_namespace", namespace=bind):
+            failures = await run_concurrently(
+                {
+                    "role": lambda: delete_role(
+                        api, configmap, cro_spec, bind, name_suffix
+                    ),
+                    "role binding": lambda: delete_role_binding(
+                        api, configmap, cro_spec, bind, name_suffix
+                    ),
+                }
+            )
+        failures = {k: e for k, e in failures.items() if e}
+        if failures:
+            raise kopf.PermanentError(format_failures(failures))
+
+    failures = await for_each_namespace(bind_ns, unbind)
+    if failures:
+        raise kopf.PermanentError(
+            "Failed to unbind role from namespaces: "
+            f"{format_failures(failures)}"
+        )
 
 
+@observe_step
 async def delete_role_binding(
     api: client.RbacAuthorizationV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
 ):
     logger = logging.getLogger("kopf.objects")
-    role_bind_name = cro_spec.get("role", {}).get("bind")
+    role_bind_name = cro_spec.role_bind
     if not role_bind_name:
-        tpl = yaml.safe_load(configmap.data["chaostoolkit-role-binding.yaml"])
+        tpl = load_template(configmap, "chaostoolkit-role-binding.yaml")
         role_binding_name = tpl["metadata"]["name"]
         role_binding_name = f"{role_binding_name}-{name_suffix}"
         logger.debug(f"Deleting role binding: {role_binding_name}")
@@ -767,35 +4419,51 @@ async def delete_role_binding(
                 name=role_binding_name,
                 namespace=ns,
             )
-        except ApiException:
-            logger.error(
-                f"Failed to delete role binding '{role_binding_name}'",
-                exc_info=True,
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            logger.debug(
+                f"Role binding '{role_binding_name}' was already deleted"
             )
 
 
+@observe_step
 async def create_pod(
     api: client.CoreV1Api,
     configmap: Resource,  # noqa: C901
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
     cro_meta: ResourceChunk,
     *,
     apply: bool = True,
-    cm_was_created: bool = True,
+    target: Target = None,
+    rbac_suffix: str = None,
+    env_cm_name: str = None,
+    experiment_cm_name: str = None,
 ):
+    """
+    Create the pod running the experiment, or only render it when `apply`
+    is false.
+
+    For a `target` of a batch experiment, the pod name is suffixed with the
+    target name and its env overrides are set on the `chaostoolkit`
+    container. The service account is suffixed with `rbac_suffix`, when it
+    differs from the experiment suffix.
+
+    The pod takes its env variables from the `env_cm_name` configmap, or
+    from none when it is not set, and the experiment from the
+    `experiment_cm_name` configmap, when it is set, decompressed by an
+    init container when it is stored gzipped.
+    """
     logger = logging.getLogger("kopf.objects")
 
-    verbose_ctk = cro_spec.get("verbose", False)
-    pod_spec = cro_spec.get("pod", {})
-    sa_name = cro_spec.get("serviceaccount", {}).get("name")
-    env_cm_name = pod_spec.get("env", {}).get(
-        "configMapName", "chaostoolkit-env"
-    )
+    verbose_ctk = cro_spec.verbose
+    pod_spec = cro_spec.pod
+    sa_name = cro_spec.sa_name
 
     # did the user supply their own pod spec?
-    tpl = pod_spec.get("template")
+    tpl = pod_spec.template
 
     # if not, let's use the default one
     if not tpl:
@@ -803,151 +4471,617 @@ async def create_pod(
             "Using default deployment template for the run ending with "
             f"suffix '{name_suffix}'"
         )
-        tpl = yaml.safe_load(configmap.data["chaostoolkit-pod.yaml"])
-        image_name = pod_spec.get("image")
-        env_cm_enabled = pod_spec.get("env", {}).get("enabled", True)
-        # optional support for loading secret keys as env. variables
-        env_secret_name = pod_spec.get("env", {}).get("secretName")
-        settings_secret_enabled = pod_spec.get("settings", {}).get(
-            "enabled", False
-        )
-        settings_secret_name = pod_spec.get("settings", {}).get(
-            "secretName", "chaostoolkit-settings"
-        )
-        experiment_as_file = pod_spec.get("experiment", {}).get("asFile", True)
-        experiment_config_map_name = pod_spec.get("experiment", {}).get(
-            "configMapName", "chaostoolkit-experiment"
+        tpl = load_template(configmap, "chaostoolkit-pod.yaml")
+        builder = PodTemplateBuilder(tpl)
+        builder.apply_overrides(pod_spec, verbose=verbose_ctk)
+    else:
+        logger.debug(
+            "Using provided deployment template for the run ending with "
+            f"suffix '{name_suffix}':\n{tpl}"
         )
-        experiment_config_map_file_name = pod_spec.get("experiment", {}).get(
-            "configMapExperimentFileName", "experiment.json"
+        tpl = clone_resource(tpl)
+        builder = PodTemplateBuilder(tpl)
+
+    set_ns(tpl, ns)
+    set_pod_name(tpl, name_suffix=target_name_suffix(name_suffix, target))
+    set_sa_name(tpl, name=sa_name, name_suffix=rbac_suffix or name_suffix)
+    builder.set_env_config_map(pod_spec.env_config_map_name, env_cm_name)
+    if experiment_cm_name:
+        builder.set_experiment_config_map_name(
+            experiment_cm_name, pod_spec.experiment_file_name
         )
-        cmd_args = pod_spec.get("chaosArgs", [])
-        cmd_path = pod_spec.get("chaosCommandPath", None)
+        if pod_spec.experiment_gzip:
+            builder.unpack_experiment(pod_spec.experiment_file_name)
+    kopf.label(tpl, labels=cro_meta.get("labels", {}))
+    label_experiment_object(tpl, name_suffix)
+    mark_experiment_run(tpl, cro_meta, target)
+    if target:
+        builder.set_env(target.env)
 
-        # if image name is not given in CRO,
-        # we keep the one defined by default in pod template from configmap
-        if image_name:
-            set_image_name(tpl, image_name)
+    if apply:
+        return await start_pod(api, tpl)
 
-        if not env_cm_enabled:
-            logger.info("Removing default env configmap volume")
-            remove_env_config_map(tpl)
-        elif env_cm_name:
-            logger.info(f"Env config map named '{env_cm_name}'")
-            set_env_config_map_name(tpl, env_cm_name)
+    return tpl
 
-        if env_secret_name and env_cm_enabled:
-            logger.info(
-                f"Adding secret '{env_secret_name}' "
-                f"as environment variables"
-            )
-            add_env_secret(tpl, env_secret_name)
 
-        if not settings_secret_enabled:
-            logger.info("Removing default settings secret volume")
-            remove_settings_secret(tpl)
-        elif settings_secret_name:
-            logger.info(
-                f"Settings secret volume named '{settings_secret_name}'"
-            )
-            set_settings_secret_name(tpl, settings_secret_name)
+@observe_step
+async def start_pod(api: client.CoreV1Api, tpl: Resource) -> Any:
+    """
+    Create a pod rendered by `create_pod`
+    """
+    logger = logging.getLogger("kopf.objects")
+    ns = tpl["metadata"]["namespace"]
+    logger.debug(f"Creating pod with template:\n{tpl}")
+    pod = await create_or_apply(
+        api.create_namespaced_pod,
+        api.patch_namespaced_pod,
+        tpl,
+        namespace=ns,
+    )
+    logger.info(f"Pod {pod.metadata.name} created in ns '{ns}'")
+    return pod
 
-        if experiment_as_file:
-            logger.info(
-                "Experiment config map named " f"'{experiment_config_map_name}'"
-            )
-            set_experiment_config_map_name(
-                tpl, experiment_config_map_name, experiment_config_map_file_name
+
+class WarmPod:
+    """
+    A pod rendered for a run, split into an idle pod, started ahead of the
+    run, and what the run hands over to it.
+
+    The idle pod is the pod of the run without what is specific to it: its
+    name, labels and annotations, the experiment volume, the env variables
+    given by value or by configmap, and the command of its `chaostoolkit`
+    container. That container waits for the `WARM_RUN_SCRIPT` of its trigger
+    configmap, named after the pod, and runs it. The script exports the env
+    variables and runs the command, with the experiment next to it. Runs
+    whose idle pod is the same share a pool, keyed by a hash of that pod.
+    """
+
+    __slots__ = (
+        "idle_tpl",
+        "key",
+        "env",
+        "env_config_maps",
+        "experiment_config_map",
+        "command",
+        "labels",
+        "annotations",
+    )
+
+    @classmethod
+    def from_pod(
+        cls, tpl: Resource, cro_meta: ResourceChunk
+    ) -> Optional["WarmPod"]:
+        """
+        Split a rendered pod, or return `None` when its run cannot be handed
+        over to an idle pod
+        """
+
+        def skip(reason: str) -> None:
+            logging.getLogger("kopf.objects").debug(
+                f"Run of pod '{tpl['metadata']['name']}' not handed over to "
+                f"a warm pool: {reason}"
             )
+
+        idle_tpl = clone_resource(tpl)
+        builder = PodTemplateBuilder(idle_tpl)
+        container = builder.container
+        if not container.get("command"):
+            # the entrypoint of the image is unknown
+            return skip("its chaostoolkit container has no command")
+
+        experiment_path = None
+        volume = builder.volumes.get("chaostoolkit-experiment")
+        experiment_config_map = None
+        if volume is not None:
+            if "configMap" not in volume:
+                return skip("its experiment volume is not a configmap")
+            # init containers run before the run is handed over
+            for init_container in idle_tpl["spec"].get("initContainers", []):
+                for init_mount in init_container.get("volumeMounts", []):
+                    if init_mount["name"] == "chaostoolkit-experiment":
+                        return skip("an init container reads its experiment")
+            experiment_config_map = volume["configMap"]["name"]
+            mount = builder.mounts.get("chaostoolkit-experiment")
+            if mount is not None:
+                experiment_path = mount["mountPath"]
+            builder.remove_volume("chaostoolkit-experiment")
+
+        def relocate(value: str) -> str:
+            # the experiment is next to the script
+            if experiment_path and value.startswith(experiment_path):
+                value = WARM_TRIGGER_PATH + value[len(experiment_path) :]
+                if mount.get("subPath") is None:
+                    return value
+                return f"{WARM_TRIGGER_PATH}/{mount['subPath']}"
+            return value
+
+        self = cls()
+        self.experiment_config_map = experiment_config_map
+        self.env = []
+        static_env = []
+        for e in container.get("env", []):
+            if "valueFrom" in e:
+                static_env.append(e)
+            else:
+                self.env.append((e["name"], relocate(str(e.get("value", "")))))
+        if static_env:
+            container["env"] = static_env
         else:
-            logger.info("Removing default experiment config map volume")
-            remove_experiment_volume(tpl)
-            remove_env_path_config_map(tpl)
-            set_chaos_cmd_args(tpl, ["run", "$(EXPERIMENT_URL)"])
+            container.pop("env", None)
+        self.env_config_maps = []
+        env_from = []
+        for source in container.get("envFrom", []):
+            if "configMapRef" in source:
+                self.env_config_maps.append(source["configMapRef"])
+            else:
+                env_from.append(source)
+        if env_from:
+            container["envFrom"] = env_from
+        else:
+            container.pop("envFrom", None)
+        self.command = [
+            relocate(str(arg))
+            for arg in container["command"] + container.get("args", [])
+        ]
+
+        container["command"] = [
+            "sh",
+            "-c",
+            f"until [ -f {WARM_TRIGGER_PATH}/{WARM_RUN_SCRIPT} ]; do sleep 1; "
+            f"done; exec sh {WARM_TRIGGER_PATH}/{WARM_RUN_SCRIPT}",
+        ]
+        container.pop("args", None)
+        container.setdefault("volumeMounts", []).append(
+            {
+                "name": WARM_TRIGGER_VOLUME,
+                "mountPath": WARM_TRIGGER_PATH,
+                "readOnly": True,
+            }
+        )
+        idle_tpl["spec"].setdefault("volumes", []).append(
+            {
+                "name": WARM_TRIGGER_VOLUME,
+                "configMap": {"name": "", "optional": True},
+            }
+        )
 
-        if cmd_args:
-            # filter out empty values from command line arguments: None, ''
-            cmd_args = list(filter(None, cmd_args))
-            logger.info(
-                f"Override default chaos command arguments: "
-                f"$ chaos {' '.join([str(arg) for arg in cmd_args])}"
-            )
-            set_chaos_cmd_args(tpl, cmd_args)
+        # the labels of the template only, those of the run come with it
+        meta = idle_tpl["metadata"]
+        self.labels = dict(meta.get("labels") or {})
+        self.annotations = dict(meta.pop("annotations", None) or {})
+        run_labels = set(cro_meta.get("labels") or {})
+        run_labels.update((EXPERIMENT_LABEL, TARGET_LABEL))
+        meta["labels"] = {
+            k: v for k, v in self.labels.items() if k not in run_labels
+        }
+        meta["name"] = ""
+        self.key = hashlib.blake2b(
+            json.dumps(idle_tpl, sort_keys=True).encode("utf-8"),
+            digest_size=5,
+        ).hexdigest()
+        meta["labels"][WARM_POOL_LABEL] = self.key
+        self.idle_tpl = idle_tpl
+        return self
+
+    def render_idle_pod(self) -> Resource:
+        """
+        A new idle pod of the pool
+        """
+        tpl = clone_resource(self.idle_tpl)
+        name = f"chaostoolkit-warm-{secrets.token_hex(5)}"
+        tpl["metadata"]["name"] = name
+        for volume in tpl["spec"]["volumes"]:
+            if volume["name"] == WARM_TRIGGER_VOLUME:
+                volume["configMap"]["name"] = name
+        return tpl
+
+    def run_script(self, env_config_maps: List[Mapping]) -> str:
+        """
+        Script exporting the env variables, from the data of the env
+        configmaps then the values of the pod, and running the command.
+        `$(NAME)` references are expanded by the shell.
+        """
+        lines = []
+        for data in env_config_maps:
+            for name, value in data.items():
+                if ENV_NAME_RE.match(name):
+                    lines.append(f"export {name}={shlex.quote(value)}")
+        for name, value in self.env:
+            lines.append(f"export {name}={shell_word(value)}")
+        lines.append("exec " + " ".join(shell_word(a) for a in self.command))
+        return "\n".join(lines) + "\n"
+
+
+def shell_word(value: str) -> str:
+    """
+    Quote a value of the pod for the shell, turning its `$(NAME)`
+    references into shell expansions and `$$` into `$`
+    """
+    word = []
+    for token in re.split(r"(\$\$|\$\([A-Za-z_][A-Za-z0-9_]*\))", value):
+        if token == "$$":
+            word.append(shlex.quote("$"))
+        elif token.startswith("$("):
+            word.append(f'"${{{token[2:-1]}}}"')
+        elif token:
+            word.append(shlex.quote(token))
+    return "".join(word) or "''"
+
+
+class WarmPool:
+    """
+    Idle runner pods, started ahead of the runs, `size` per namespace and
+    pool, see `WarmPod`.
 
-        if cmd_path:
-            logger.info(f"Override default chaos command path to '{cmd_path}'")
-            set_chaos_cmd_path(tpl, cmd_path)
+    A run claims an idle pod by labelling it as its own, guarded by the
+    resource version of the pod so that a pod is claimed once, then creates
+    its trigger configmap. The pool is topped back up in the background.
 
-        if verbose_ctk:
-            set_verbose_chaos(tpl)
-    else:
-        logger.debug(
-            "Using provided deployment template for the run ending with "
-            f"suffix '{name_suffix}':\n{tpl}"
+    Pools no run claimed a pod of for `idle_timeout` seconds, as told by
+    their newest idle pod, are trimmed in the background as well.
+    """
+
+    def __init__(
+        self,
+        size: int = WARM_POOL_SIZE,
+        idle_timeout: float = WARM_POOL_IDLE_TIMEOUT,
+    ) -> None:
+        self.size = size
+        self.idle_timeout = idle_timeout
+        # idle pods claimed, until the index drops them, by pool
+        self.claimed: Dict[Tuple[str, str], Set[str]] = {}
+        # idle pods created, until the index lists them
+        self.started: Dict[Tuple[str, str], Set[str]] = {}
+        self.refills: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def accepts(self, spec: ExperimentSpec) -> bool:
+        """
+        Tell whether the runs of the experiment can be handed over to idle
+        pods: not those with a service account of their own, which would
+        each be the only run of their pool
+        """
+        return bool(self.size) and (
+            bool(spec.sa_name) or RBAC_MODE == RBAC_MODE_SHARED
         )
-        tpl = yaml.safe_load(tpl)
 
-    set_ns(tpl, ns)
-    set_pod_name(tpl, name_suffix=name_suffix)
-    set_sa_name(tpl, name=sa_name, name_suffix=name_suffix)
-    set_cm_env_name(
-        tpl, env_cm_name, name_suffix=name_suffix, cm_was_created=cm_was_created
-    )
-    kopf.label(tpl, labels=cro_meta.get("labels", {}))
+    async def hand_over(
+        self,
+        api: client.CoreV1Api,
+        tpl: Resource,
+        cro_meta: ResourceChunk,
+        index: Optional[kopf.Index],
+    ) -> Any:
+        """
+        Hand a run rendered by `create_pod` over to an idle pod of its pool
+        and return that pod, or `None` when no idle pod could take it
+        """
+        if not self.size:
+            return None
+        warm = WarmPod.from_pod(tpl, cro_meta)
+        if warm is None:
+            return None
+
+        logger = logging.getLogger("kopf.objects")
+        ns = tpl["metadata"]["namespace"]
+        pool = (ns, warm.key)
+        try:
+            for name, version in self.idle_pods(pool, index):
+                self.claimed[pool].add(name)
+                try:
+                    pod = await self.claim(api, ns, name, version, warm)
+                except ApiException as e:
+                    if e.status not in (404, 409):
+                        raise
+                    # deleted, updated or claimed by another run meanwhile,
+                    # up to the index to tell
+                    self.claimed[pool].discard(name)
+                    continue
+                if pod is None:
+                    return None
+                logger.info(
+                    f"Run of pod '{tpl['metadata']['name']}' handed over to "
+                    f"idle pod '{name}' in ns '{ns}'"
+                )
+                return pod
+        finally:
+            self.refill(api, pool, warm, index)
+        return None
+
+    def idle_pods(
+        self, pool: Tuple[str, str], index: Optional[kopf.Index]
+    ) -> List[Tuple[str, str]]:
+        """
+        Name and resource version of the idle pods of a pool not claimed
+        yet, the running ones first
+        """
+        idle = list(index.get(pool, [])) if index is not None else []
+        indexed = {name for name, _, _ in idle}
+        # forget the claimed pods the index dropped
+        claimed = self.claimed.setdefault(pool, set())
+        claimed.intersection_update(indexed)
+        self.started.setdefault(pool, set()).difference_update(indexed)
+        idle.sort(key=lambda pod: pod[2] != "Running")
+        return [
+            (name, version) for name, version, _ in idle if name not in claimed
+        ]
+
+    async def claim(
+        self,
+        api: client.CoreV1Api,
+        ns: str,
+        name: str,
+        version: str,
+        warm: WarmPod,
+    ) -> Any:
+        """
+        Label an idle pod as the pod of the run and hand the run over to it.
+
+        Return `None` when the run could not be handed over, once the pod
+        is deleted.
+        """
+        labels = {k: v for k, v in warm.labels.items()}
+        labels[WARM_POOL_LABEL] = None
+        pod = await run_async(
+            api.patch_namespaced_pod,
+            name=name,
+            namespace=ns,
+            body={
+                "metadata": {
+                    "resourceVersion": version,
+                    "labels": labels,
+                    "annotations": warm.annotations,
+                }
+            },
+            _content_type="application/merge-patch+json",
+        )
 
-    if apply:
-        logger.debug(f"Creating pod with template:\n{tpl}")
-        pod = await run_async(api.create_namespaced_pod, body=tpl, namespace=ns)
-        logger.info(f"Pod {pod.metadata.name} created in ns '{ns}'")
-        return pod
+        try:
+            env_config_maps = []
+            for ref in warm.env_config_maps:
+                data = await read_config_map_data(
+                    api, ns, ref["name"], ref.get("optional", False)
+                )
+                env_config_maps.append(data)
+            data = {}
+            if warm.experiment_config_map:
+                data = await read_config_map_data(
+                    api, ns, warm.experiment_config_map
+                )
+            data[WARM_RUN_SCRIPT] = warm.run_script(env_config_maps)
+            await run_async(
+                api.create_namespaced_config_map,
+                namespace=ns,
+                body={
+                    "apiVersion": "v1",
+                    "kind": "ConfigMap",
+                    "metadata": {
+                        "name": name,
+                        "ownerReferences": [
+                            {
+                                "apiVersion": "v1",
+                                "kind": "Pod",
+                                "name": name,
+                                "uid": pod.metadata.uid,
+                            }
+                        ],
+                    },
+                    "data": data,
+                },
+            )
+            # an update of the pod makes the kubelet refresh its trigger
+            # volume right away rather than at its next periodic sync
+            return await run_async(
+                api.patch_namespaced_pod,
+                name=name,
+                namespace=ns,
+                body={
+                    "metadata": {
+                        "annotations": {WARM_POOL_LABEL: warm.key},
+                    }
+                },
+                _content_type="application/merge-patch+json",
+            )
+        except ApiException as e:
+            # the pod is the run's now, it must not wait forever
+            logging.getLogger("kopf.objects").warning(
+                f"Failed to hand the run over to idle pod '{name}' in ns "
+                f"'{ns}': {describe_error(e)}"
+            )
+            await run_async(api.delete_namespaced_pod, name=name, namespace=ns)
+            return None
+
+    def refill(
+        self,
+        api: client.CoreV1Api,
+        pool: Tuple[str, str],
+        warm: WarmPod,
+        index: Optional[kopf.Index],
+    ) -> None:
+        """
+        Top the pool back up in the background
+        """
+        if pool in self.refills:
+            return
+        missing = self.size - len(self.idle_pods(pool, index))
+        started = self.started[pool]
+        missing -= len(started)
+        if missing <= 0:
+            return
+
+        async def start(_: str) -> None:
+            tpl = warm.render_idle_pod()
+            name = tpl["metadata"]["name"]
+            started.add(name)
+            try:
+                await run_async(
+                    api.create_namespaced_pod, namespace=pool[0], body=tpl
+                )
+            except BaseException:
+                started.discard(name)
+                raise
+
+        async def top_up() -> None:
+            try:
+                failures = await for_each(
+                    [str(i) for i in range(missing)], start, missing
+                )
+                if failures:
+                    logging.getLogger("kopf.objects").warning(
+                        f"Failed to start idle pods in ns '{pool[0]}': "
+                        f"{format_failures(failures)}"
+                    )
+            finally:
+                self.refills.pop(pool, None)
+
+        self.refills[pool] = asyncio.ensure_future(top_up())
+
+    def start(self, api: client.CoreV1Api) -> None:
+        """
+        Trim the pools every third of `idle_timeout` in the background
+        """
+        if self.size and self.task is None:
+            self.task = asyncio.ensure_future(self.keep_trimmed(api))
+
+    async def close(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+
+    async def keep_trimmed(self, api: client.CoreV1Api) -> None:
+        while True:
+            await asyncio.sleep(self.idle_timeout / 3)
+            try:
+                await self.trim(api)
+            except ApiException as e:
+                logging.getLogger("kopf.objects").warning(
+                    f"Failed to trim the warm pools: {describe_error(e)}"
+                )
 
-    return tpl
+    async def trim(self, api: client.CoreV1Api) -> None:
+        """
+        Delete the idle pods of the pools whose newest idle pod is older
+        than `idle_timeout`: as the pools are topped up after every claim,
+        no run claimed any of their pods since
+        """
+        pods = await run_async(
+            api.list_pod_for_all_namespaces,
+            label_selector=f"{WARM_POOL_LABEL},!{EXPERIMENT_LABEL}",
+        )
+        pools: Dict[Tuple[str, str], List[Any]] = {}
+        for pod in pods.items:
+            pool = (
+                pod.metadata.namespace,
+                pod.metadata.labels[WARM_POOL_LABEL],
+            )
+            pools.setdefault(pool, []).append(pod)
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        logger = logging.getLogger("kopf.objects")
+        for pool, idle in pools.items():
+            if pool in self.refills:
+                continue
+            newest = max(pod.metadata.creation_timestamp for pod in idle)
+            if (now - newest).total_seconds() < self.idle_timeout:
+                continue
+            logger.info(
+                f"Deleting the {len(idle)} idle pods of unused warm pool "
+                f"'{pool[1]}' in ns '{pool[0]}'"
+            )
+            for pod in idle:
+                try:
+                    # unless claimed by a run meanwhile
+                    await run_async(
+                        api.delete_namespaced_pod,
+                        name=pod.metadata.name,
+                        namespace=pool[0],
+                        body={
+                            "preconditions": {
+                                "resourceVersion": pod.metadata.resource_version
+                            }
+                        },
+                    )
+                except ApiException as e:
+                    if e.status not in (404, 409):
+                        raise
+            self.claimed.pop(pool, None)
+            self.started.pop(pool, None)
+
+
+async def read_config_map_data(
+    api: client.CoreV1Api, ns: str, name: str, optional: bool = False
+) -> Dict[str, str]:
+    """
+    Data of a configmap, empty when an `optional` one is missing
+    """
+    try:
+        cm = await run_async(
+            api.read_namespaced_config_map, name=name, namespace=ns
+        )
+    except ApiException as e:
+        if e.status == 404 and optional:
+            return {}
+        raise
+    return dict(cm.data or {})
 
 
+@observe_step
 async def delete_pod(
     api: client.CoreV1Api,
     configmap: Resource,  # noqa: C901
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
 ):
+    """
+    Delete the pod of the experiment by its name, as made before its objects
+    were labelled, then every pod labelled with the experiment, such as the
+    idle pods of a warm pool its runs were handed over to, which keep their
+    own names
+    """
     logger = logging.getLogger("kopf.objects")
 
-    pod_spec = cro_spec.get("pod", {})
-    tpl = pod_spec.get("template")
+    tpl = cro_spec.pod.template
     if not tpl:
-        tpl = yaml.safe_load(configmap.data["chaostoolkit-pod.yaml"])
-    else:
-        tpl = yaml.safe_load(tpl)
+        tpl = load_template(configmap, "chaostoolkit-pod.yaml")
 
     pod_name = tpl["metadata"]["name"]
     pod_name = f"{pod_name}-{name_suffix}"
     logger.debug(f"Deleting pod: {pod_name}")
     try:
-        return await run_async(
-            api.delete_namespaced_pod, name=pod_name, namespace=ns
-        )
-    except ApiException:
-        logger.error(f"Failed to delete pod '{pod_name}'", exc_info=True)
+        await run_async(api.delete_namespaced_pod, name=pod_name, namespace=ns)
+    except ApiException as e:
+        if e.status != 404:
+            raise
+        logger.debug(f"Pod '{pod_name}' was already deleted")
+
+    return await run_async(
+        api.delete_collection_namespaced_pod,
+        namespace=ns,
+        label_selector=f"{EXPERIMENT_LABEL}={name_suffix}",
+    )
 
 
+@observe_step
 async def create_cron_job(
     api: client.BatchV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
     cro_meta: ResourceChunk,
     pod_tpl: str,
+    target: Target = None,
 ):
     logger = logging.getLogger("kopf.objects")
 
-    schedule_spec = cro_spec.get("schedule", {})
-    schedule = schedule_spec.get("value")
+    schedule = cro_spec.schedule_value
 
-    tpl = yaml.safe_load(configmap.data["chaostoolkit-cronjob.yaml"])
+    tpl = load_template(configmap, "chaostoolkit-cronjob.yaml")
     set_ns(tpl, ns)
-    set_cron_job_name(tpl, name_suffix=name_suffix)
+    set_cron_job_name(tpl, name_suffix=target_name_suffix(name_suffix, target))
     set_cron_job_schedule(tpl, schedule)
     set_cron_job_template_spec(tpl, pod_tpl.get("spec", {}))
 
@@ -957,10 +5091,25 @@ async def create_cron_job(
     kopf.label(
         tpl["spec"]["jobTemplate"]["spec"]["template"], labels=experiment_labels
     )
+    label_experiment_object(tpl, name_suffix)
+    label_experiment_object(tpl["spec"]["jobTemplate"], name_suffix)
+    label_experiment_object(
+        tpl["spec"]["jobTemplate"]["spec"]["template"], name_suffix
+    )
+    # the jobs and pods it schedules are tracked, not the cron job itself
+    if target:
+        kopf.label(tpl, labels={TARGET_LABEL: target.name})
+    mark_experiment_run(tpl["spec"]["jobTemplate"], cro_meta, target)
+    mark_experiment_run(
+        tpl["spec"]["jobTemplate"]["spec"]["template"], cro_meta, target
+    )
 
     logger.debug(f"Creating cron job with template:\n{tpl}")
-    cron = await run_async(
-        api.create_namespaced_cron_job, body=tpl, namespace=ns
+    cron = await create_or_apply(
+        api.create_namespaced_cron_job,
+        api.patch_namespaced_cron_job,
+        tpl,
+        namespace=ns,
     )
     logger.info(
         f"Cron Job '{cron.metadata.name}' scheduled with "
@@ -970,15 +5119,16 @@ async def create_cron_job(
     return cron
 
 
+@observe_step
 async def delete_cron_job(
     api: client.BatchV1Api,
     configmap: Resource,
-    cro_spec: ResourceChunk,
+    cro_spec: ExperimentSpec,
     ns: str,
     name_suffix: str,
 ):
     logger = logging.getLogger("kopf.objects")
-    tpl = yaml.safe_load(configmap.data["chaostoolkit-cronjob.yaml"])
+    tpl = load_template(configmap, "chaostoolkit-cronjob.yaml")
     cron_job_name = tpl["metadata"]["name"]
     cron_job_name = f"{cron_job_name}-{name_suffix}"
     logger.debug(f"Deleting cron job: {cron_job_name}")
@@ -986,5 +5136,7 @@ async def delete_cron_job(
         return await run_async(
             api.delete_namespaced_cron_job, name=cron_job_name, namespace=ns
         )
-    except ApiException:
-        logger.error(f"Failed to cron job '{cron_job_name}'", exc_info=True)
+    except ApiException as e:
+        if e.status != 404:
+            raise
+        logger.debug(f"Cron job '{cron_job_name}' was already deleted")
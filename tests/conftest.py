@@ -1,16 +1,21 @@
 import os
 import subprocess
 import sys
-from typing import List
+from typing import AsyncIterator, Callable, List
 
+import kopf
 import pytest
+import pytest_asyncio
 import yaml
 
 curdir = os.path.abspath(os.path.join(os.path.dirname(__file__)))
 fixturedir = os.path.join(curdir, "fixtures")
 sys.path.insert(0, os.path.join(curdir, ".."))
 import controller
-from controller import Resource
+from controller import Resource, ApiClients, SharedObjects, Admission, \
+    WarmPool, Shards, parse_templates, ResourceTemplates
+from benchmarks.e2e import load_templates_configmap
+from benchmarks.fakeapi import FakeApiServer
 
 
 @pytest.fixture(scope="session")
@@ -19,7 +24,7 @@ def topdir():
 
 
 @pytest.fixture(scope="session")
-def generic(topdir: str) -> List[Resource]:
+def generic(topdir: str) -> List['Resource']:
     cp = subprocess.run("which kustomize", shell=True, check=True,
         cwd=topdir, capture_output=True)
     print(cp.stdout.decode("utf-8"))
@@ -29,3 +34,56 @@ def generic(topdir: str) -> List[Resource]:
         cwd=topdir, capture_output=True)
 
     return list(yaml.safe_load_all(cp.stdout.decode("utf-8")))
+
+
+@pytest.fixture
+def templates() -> ResourceTemplates:
+    return parse_templates(
+        "chaostoolkit-crd", "chaostoolkit-resources-templates", "1",
+        load_templates_configmap()["data"])
+
+
+@pytest_asyncio.fixture
+async def fake_api_server() -> AsyncIterator[FakeApiServer]:
+    server = FakeApiServer()
+    await server.start()
+    try:
+        yield server
+    finally:
+        await server.stop()
+
+
+@pytest_asyncio.fixture
+async def api_clients(
+        fake_api_server: FakeApiServer) -> AsyncIterator[ApiClients]:
+    api_clients = ApiClients(config_file=fake_api_server.kubeconfig)
+    await api_clients.open()
+    try:
+        yield api_clients
+    finally:
+        await api_clients.close()
+
+
+@pytest.fixture
+def operator_memo(fake_api_server: FakeApiServer,
+                  api_clients: ApiClients) -> Callable[..., kopf.Memo]:
+    """
+    Make the memo of a replica of the operator running against the fake API
+    server, which has the default templates. Any attribute of the memo can
+    be overridden.
+    """
+    fake_api_server.add(
+        "configmaps", "chaostoolkit-crd", load_templates_configmap())
+
+    def make(**attributes) -> kopf.Memo:
+        memo = kopf.Memo()
+        memo.api_clients = api_clients
+        memo.shared_objects = SharedObjects(api_clients.core)
+        memo.admission = Admission()
+        memo.warm_pool = WarmPool()
+        memo.shards = Shards(api_clients, "")
+        for name, value in attributes.items():
+            setattr(memo, name, value)
+        return memo
+
+    return make
@@ -0,0 +1,127 @@
+import asyncio
+from typing import Callable
+from unittest.mock import Mock
+
+import kopf
+import pytest
+
+from benchmarks.e2e import experiment
+from benchmarks.fakeapi import FakeApiServer
+from controller import ApiClients, StatusUpdates, Admission, \
+    create_chaos_experiment, start_admitted_experiment, requeue_experiment
+
+
+def test_admission_queues_experiments_beyond_caps():
+    admitted = []
+    admission = Admission(max_runs=3, max_runs_per_namespace=2,
+                          on_admit=admitted.append)
+    runs = {"run": ["default/a"]}
+
+    assert admission.admit("default/a", "run", 0, 1, runs)
+    # pod of `a` not seen yet, counted once with the index
+    admission.observe("default/a", "pod-a", runs)
+    assert admission.admit("default/b", "run", 0, 1, runs)
+    assert not admission.admit("default/c", "run", 0, 1, runs)
+    assert not admission.admit("default/d", "run", 5, 1, runs)
+    # not held back by the namespace `run` being full
+    assert admission.admit("default/e", "other", 0, 1, runs)
+    assert not admission.admit("default/f", "other", 0, 1, runs)
+    assert admission.admit("default/b", "run", 0, 1, runs)
+    assert not admitted
+
+    # `a` finished: `d` goes first by priority
+    admission.observe("default/a", "pod-a", {}, finished=True)
+    assert admitted == ["default/d"]
+    assert "default/a" not in admission.admitted
+    assert not admission.admit("default/c", "run", 0, 1, {})
+
+    admission.release("default/c", {})
+    admission.release("default/d", {})
+    admission.release("default/e", {})
+    assert admitted == ["default/d", "default/f"]
+    assert not admission.queued
+
+    unlimited = Admission(max_runs=0, max_runs_per_namespace=0)
+    assert all(unlimited.admit(f"default/{i}", "run", 0, 1, {})
+               for i in range(10))
+    assert not unlimited.admitted
+
+
+@pytest.mark.asyncio
+async def test_admitted_experiments_start_as_other_runs_finish(
+        fake_api_server: FakeApiServer, api_clients: ApiClients,
+        operator_memo: Callable[..., kopf.Memo]):
+    server = fake_api_server
+    body = experiment({})
+    name = body["metadata"]["name"]
+    server.add("chaosexperiments", "chaostoolkit-crd", body)
+    key = ("chaosexperiments", "chaostoolkit-crd", name)
+    status_updates = StatusUpdates(api_clients, delay=0.01)
+    memo = operator_memo(
+        status_updates=status_updates,
+        admission=Admission(max_runs=1, on_admit=status_updates.admitted))
+    kwargs = dict(
+        meta=body["metadata"], body=body, spec=body["spec"],
+        namespace="chaostoolkit-crd", logger=Mock(), memo=memo)
+    try:
+        assert memo.admission.admit("chaostoolkit-crd/other", "run", 0, 1, {})
+
+        # queued without the handler being retried
+        patch = kopf.Patch()
+        await create_chaos_experiment(patch=patch, **kwargs)
+        assert patch.status["phase"] == "Queued"
+        assert not server.created("pods")
+
+        # the pod of the other run finishes
+        memo.admission.observe(
+            "chaostoolkit-crd/other", "pod-other", {}, finished=True)
+        await asyncio.sleep(0.05)
+        experiment_ = server.objects[key]
+        assert experiment_["status"]["phase"] == "Admitted"
+        admitted = experiment_["metadata"]["annotations"][
+            "chaostoolkit.org/admitted"]
+
+        # the annotation starts the experiment
+        from kopf._cogs.structs import bodies, diffs, references
+        from kopf._core.intents import causes
+        cause = causes.ChangingCause(
+            logger=Mock(), indices={}, memo=memo,
+            resource=references.Resource(
+                "chaostoolkit.org", "v1", "chaosexperiments"),
+            patch=kopf.Patch(), body=bodies.Body(experiment_),
+            initial=False, reason=causes.Reason.UPDATE,
+            old={"metadata": {"annotations": {}}},
+            new={"metadata": {"annotations": {
+                "chaostoolkit.org/admitted": admitted}}},
+            diff=diffs.diff(
+                {"metadata": {"annotations": {}}},
+                {"metadata": {"annotations": {
+                    "chaostoolkit.org/admitted": admitted}}}))
+        handlers = kopf.get_default_registry()._changing.get_handlers(cause)
+        assert [h.fn for h in handlers] == [start_admitted_experiment]
+
+        await start_admitted_experiment(
+            status={"phase": "Queued"}, patch=kopf.Patch(), **kwargs)
+        assert not server.created("pods")
+        await start_admitted_experiment(
+            status=experiment_["status"], patch=kopf.Patch(), **kwargs)
+        assert len(server.created("pods")) == 1
+    finally:
+        await status_updates.close()
+
+
+@pytest.mark.asyncio
+async def test_queued_experiments_are_queued_again_on_restart():
+    admitted = []
+    memo = kopf.Memo()
+    memo.admission = Admission(max_runs=1, on_admit=admitted.append)
+    meta = {"namespace": "chaostoolkit-crd", "name": "exp"}
+    kwargs = dict(meta=meta, spec={}, namespace="chaostoolkit-crd",
+                  logger=Mock(), memo=memo)
+
+    await requeue_experiment(runs_index={"run": ["chaostoolkit-crd/a"]},
+                             **kwargs)
+    assert not admitted and "chaostoolkit-crd/exp" in memo.admission.queued
+
+    await requeue_experiment(runs_index={}, **kwargs)
+    assert admitted == ["chaostoolkit-crd/exp"]
@@ -0,0 +1,165 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from kubernetes_asyncio import client as aio_client
+from kubernetes_asyncio.client.rest import ApiException as AioApiException
+
+from controller import run_async, is_asyncio_api_call, ApiClients, \
+    create_or_apply, RateLimiter, api_call_priority
+
+
+@pytest.mark.asyncio
+async def test_run_async_calls_sync_api_in_executor():
+    api = client.CoreV1Api()
+    with patch.object(api, "read_namespace", return_value="ns") as m:
+        assert await run_async(api.read_namespace, name="chaostoolkit-run") \
+            == "ns"
+        m.assert_called_once_with(name="chaostoolkit-run")
+
+
+@pytest.mark.asyncio
+async def test_run_async_raises_sync_api_exception_in_asyncio_mode():
+    api_client = aio_client.ApiClient()
+    try:
+        api = aio_client.CoreV1Api(api_client)
+        api_client.call_api = AsyncMock(
+            side_effect=AioApiException(status=409, reason="Conflict"))
+
+        assert is_asyncio_api_call(api.create_namespace)
+        with pytest.raises(ApiException) as x:
+            await run_async(api.create_namespace, body={})
+        assert x.value.status == 409
+    finally:
+        await api_client.close()
+
+
+@pytest.mark.asyncio
+async def test_api_clients_share_one_pool():
+    api_clients = ApiClients(mode="thread", pool_size=3)
+    with patch("controller.config.load_incluster_config"):
+        await api_clients.open()
+    try:
+        assert api_clients.api_client.configuration \
+            .connection_pool_maxsize == 3
+        assert api_clients.core.api_client is api_clients.api_client
+        assert api_clients.rbac.api_client is api_clients.api_client
+        assert api_clients.batch.api_client is api_clients.api_client
+    finally:
+        await api_clients.close()
+    assert api_clients.api_client is None
+
+
+@pytest.mark.asyncio
+async def test_create_or_apply_server_side():
+    api = Mock()
+    body = {"apiVersion": "v1", "kind": "ServiceAccount",
+            "metadata": {"name": "chaostoolkit-abc"}}
+
+    await create_or_apply(
+        api.create_namespaced_service_account,
+        api.patch_namespaced_service_account, body, namespace="ns")
+    api.create_namespaced_service_account.assert_called_once_with(
+        body=body, namespace="ns")
+
+    with patch("controller.APPLY_MODE", "server-side"):
+        await create_or_apply(
+            api.create_namespaced_service_account,
+            api.patch_namespaced_service_account, body, namespace="ns")
+    api.patch_namespaced_service_account.assert_called_once_with(
+        name="chaostoolkit-abc", body=body, namespace="ns",
+        field_manager="chaostoolkit-crd", force=True,
+        _content_type="application/apply-patch+yaml")
+
+
+@pytest.mark.asyncio
+async def test_throttled_api_calls_are_retried():
+    calls = []
+
+    def read_namespaced_pod(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            e = ApiException(status=429, reason="Too Many Requests")
+            e.headers = {"Retry-After": "0.05"}
+            raise e
+        if len(calls) == 2:
+            raise ApiException(status=503, reason="Service Unavailable")
+        return "pod"
+
+    delays = []
+    sleep = asyncio.sleep
+
+    async def record_sleep(delay, *args):
+        delays.append(delay)
+        await sleep(0)
+
+    with patch("controller.asyncio.sleep", record_sleep):
+        assert await run_async(read_namespaced_pod, name="p") == "pod"
+    assert len(calls) == 3
+    assert 0.05 <= delays[0] <= 0.05 + 0.5
+    assert 0 <= delays[1] <= 0.5 * 2
+
+    def create_namespaced_pod(**kwargs):
+        raise ApiException(status=500, reason="Internal Server Error")
+
+    with patch("controller.API_RETRIES", 2), \
+            patch("controller.asyncio.sleep", record_sleep):
+        with pytest.raises(ApiException):
+            await run_async(create_namespaced_pod, body={})
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_serves_by_priority():
+    def delete_namespaced_pod():
+        pass
+
+    def patch_namespaced_custom_object_status():
+        pass
+
+    def create_namespaced_pod():
+        pass
+
+    assert api_call_priority(delete_namespaced_pod) == 0
+    assert api_call_priority(patch_namespaced_custom_object_status) == 0
+    assert api_call_priority(create_namespaced_pod) == 2
+    assert api_call_priority(Mock()) == 1
+
+    limiter = RateLimiter(rate=100, burst=1)
+    await limiter.acquire(2)
+    order = []
+
+    async def call(priority, name):
+        await limiter.acquire(priority)
+        order.append(name)
+
+    cancelled = asyncio.ensure_future(call(0, "cancelled"))
+    tasks = [asyncio.ensure_future(call(2, "create"))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(call(1, "read")))
+    tasks.append(asyncio.ensure_future(call(0, "delete")))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.gather(*tasks)
+    assert order == ["delete", "read", "create"]
+    assert not limiter.waiters
+
+    # a call cancelled once served gives its token to the next one, rather
+    # than to the one after the next refill, 100s away
+    slow = RateLimiter(rate=0.01, burst=1)
+    await slow.acquire()
+    first = asyncio.ensure_future(slow.acquire())
+    second = asyncio.ensure_future(slow.acquire())
+    await asyncio.sleep(0)
+    slow.tokens = 1
+    slow.wake()
+    first.cancel()
+    await asyncio.wait_for(second, 1)
+    assert first.cancelled()
+    assert not slow.waiters
+
+    # not limited at all
+    unlimited = RateLimiter(rate=0, burst=1)
+    await asyncio.wait_for(
+        asyncio.gather(*[unlimited.acquire() for _ in range(100)]), 1)
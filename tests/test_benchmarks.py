@@ -0,0 +1,33 @@
+from typing import Callable
+
+import kopf
+import pytest
+
+from benchmarks.e2e import run_batch
+from benchmarks.fakeapi import FakeApiServer
+from benchmarks.transforms import compare, load_baselines, run_cases
+
+
+@pytest.mark.asyncio
+async def test_e2e_benchmark_against_fake_api_server(
+        fake_api_server: FakeApiServer,
+        operator_memo: Callable[..., kopf.Memo]):
+    server = fake_api_server
+    result = await run_batch(server, operator_memo(), 3)
+
+    assert result["count"] == 3
+    assert result["failures"] == 0
+    assert len(server.created("pods")) == 3
+    assert 0 < result["p50"] <= result["p99"] <= result["elapsed"]
+
+
+@pytest.mark.benchmark
+def test_transform_benchmarks_match_baselines():
+    baselines = load_baselines()
+    results = run_cases(number=50, repeat=3)
+    assert set(results["cases"]) == set(baselines)
+
+    # fewer calls than the benchmark itself, hence a looser tolerance
+    assert compare(results, baselines, tolerance=1.0) == []
+    for name, result in results["cases"].items():
+        assert 0 < result["relative"] <= baselines[name] * 2
@@ -0,0 +1,106 @@
+import asyncio
+
+import kopf
+import pytest
+from kubernetes.client.rest import ApiException
+
+from controller import run_dependency_graph, for_each_namespace, \
+    run_concurrently, describe_error, for_each
+
+
+@pytest.mark.asyncio
+async def test_run_dependency_graph_waits_for_dependencies():
+    started = []
+
+    async def step(name: str, value: int) -> int:
+        started.append(name)
+        await asyncio.sleep(0)
+        return value
+
+    results = await run_dependency_graph({
+        "a": ([], lambda r: step("a", 1)),
+        "b": (["a"], lambda r: step("b", r["a"] + 1)),
+        "c": (["a"], lambda r: step("c", r["a"] + 2)),
+        "d": (["b", "c"], lambda r: step("d", r["b"] + r["c"])),
+    })
+    assert results == {"a": 1, "b": 2, "c": 3, "d": 5}
+    assert started[0] == "a"
+    assert started[-1] == "d"
+
+
+@pytest.mark.asyncio
+async def test_run_dependency_graph_raises_first_failure_in_order():
+    async def fail(msg: str):
+        raise kopf.PermanentError(msg)
+
+    async def ok():
+        return True
+
+    with pytest.raises(kopf.PermanentError) as x:
+        await run_dependency_graph({
+            "a": ([], lambda r: ok()),
+            "b": (["a"], lambda r: fail("b failed")),
+            "c": ([], lambda r: fail("c failed")),
+            "d": (["b"], lambda r: ok()),
+        })
+    assert str(x.value) == "b failed"
+
+
+@pytest.mark.asyncio
+async def test_for_each_namespace_is_bounded_and_collects_failures():
+    in_flight = 0
+    max_in_flight = 0
+    done = []
+
+    async def bind(ns: str):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if ns == "ns-3":
+            raise kopf.PermanentError("forbidden")
+        done.append(ns)
+
+    namespaces = [f"ns-{i}" for i in range(10)]
+    failures = await for_each_namespace(namespaces, bind, concurrency=4)
+
+    assert max_in_flight == 4
+    assert list(failures) == ["ns-3"]
+    assert str(failures["ns-3"]) == "forbidden"
+    assert sorted(done) == sorted(set(namespaces) - {"ns-3"})
+
+
+@pytest.mark.asyncio
+async def test_run_concurrently_reports_each_outcome():
+    async def ok():
+        return True
+
+    async def forbidden():
+        raise ApiException(status=403, reason="Forbidden")
+
+    failures = await run_concurrently({
+        "pod": ok, "role": forbidden, "service account": ok})
+    assert list(failures) == ["pod", "role", "service account"]
+    assert failures["pod"] is None
+    assert describe_error(failures["role"]) == "403 Forbidden"
+    assert failures["service account"] is None
+
+
+@pytest.mark.asyncio
+async def test_for_each_is_bounded():
+    running = []
+    peak = []
+
+    async def f(key: str) -> None:
+        running.append(key)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(key)
+        if key == "c":
+            raise RuntimeError("boom")
+
+    failures = await for_each(["a", "b", "c", "d", "a"], f, 2)
+
+    assert max(peak) == 2
+    assert list(failures) == ["c"]
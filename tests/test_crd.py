@@ -3,7 +3,7 @@ from typing import List
 import yaml
 
 from controller import set_chaos_cmd_args, set_sa_name, \
-    set_experiment_config_map_name
+    set_experiment_config_map_name, Resource
 
 
 def test_create_chaos_experiment_in_default_ns(generic: List['Resource']):
@@ -35,28 +35,20 @@ def test_create_chaos_experiment_in_default_ns(generic: List['Resource']):
     }
     assert resource["spec"]["scope"] == "Namespaced"
     assert resource["spec"]["group"] == "chaostoolkit.org"
-    assert resource["spec"]["versions"] == [
-        {
-            "name": "v1",
-            "served": True,
-            "storage": True,
-            "schema": {
-                "openAPIV3Schema": {
-                    "type": "object",
-                    "properties": {
-                        "spec": {
-                            "type": "object",
-                            "x-kubernetes-preserve-unknown-fields": True
-                        },
-                        "status": {
-                            "type": "object",
-                            "x-kubernetes-preserve-unknown-fields": True
-                        },
-                    }
-                }
-            }
-        }
-    ]
+    versions = resource["spec"]["versions"]
+    assert [(v["name"], v["served"], v["storage"]) for v in versions] == [
+        ("v1", True, True)]
+    schema = versions[0]["schema"]["openAPIV3Schema"]
+    assert schema["type"] == "object"
+    assert schema["properties"]["status"] == {
+        "type": "object",
+        "x-kubernetes-preserve-unknown-fields": True
+    }
+    spec_schema = schema["properties"]["spec"]
+    assert spec_schema["x-kubernetes-preserve-unknown-fields"] is True
+    assert set(spec_schema["properties"]) == {
+        "namespace", "verbose", "template", "serviceaccount", "role",
+        "schedule", "pod", "targets", "priority"}
     assert resource["spec"]["names"] == {
         "kind": "ChaosToolkitExperiment",
         "plural": "chaosexperiments",
@@ -210,7 +202,6 @@ def test_set_sa_name(generic: List['Resource']):
     assert pod["spec"]["serviceAccountName"] == "my-custom-sa"
 
 
-
 def test_use_experiment_as_yaml(generic: List['Resource']):
     resource = generic[4]
     ctk_pod = yaml.safe_load(resource["data"]["chaostoolkit-pod.yaml"])
@@ -220,4 +211,3 @@ def test_use_experiment_as_yaml(generic: List['Resource']):
     assert ctk_pod["spec"]["containers"][0]["env"][1]["value"] == "/home/svc/experiment.yaml"
     assert ctk_pod["spec"]["containers"][0]["volumeMounts"][1]["mountPath"] == "/home/svc/experiment.yaml"
     assert ctk_pod["spec"]["containers"][0]["volumeMounts"][1]["subPath"] == "experiment.yaml"
-
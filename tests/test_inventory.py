@@ -0,0 +1,59 @@
+from unittest.mock import Mock
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from controller import experiment_inventory, delete_inventory, ExperimentSpec
+
+
+def test_experiment_inventory():
+    assert experiment_inventory(ExperimentSpec.from_dict({})) == {
+        "chaostoolkit-run": [
+            "pods", "serviceaccounts", "roles", "rolebindings"]
+    }
+
+    inventory = experiment_inventory(ExperimentSpec.from_dict({
+        "namespace": "my-ns",
+        "serviceaccount": {"name": "my-sa"},
+        "schedule": {"kind": "cronJob", "value": "*/5 * * * *"},
+        "role": {"name": "my-role", "binds_to_namespaces": ["other-ns"]},
+    }))
+    assert inventory == {
+        "my-ns": ["cronjobs", "rolebindings"],
+        "other-ns": ["rolebindings"],
+    }
+
+    assert experiment_inventory(
+        ExperimentSpec.from_dict({}), shared_rbac=True) == {
+        "chaostoolkit-run": ["pods"]
+    }
+
+
+@pytest.mark.asyncio
+async def test_delete_inventory_by_label_workload_first():
+    calls = []
+    api_clients = Mock()
+    for method in ("delete_collection_namespaced_pod",
+                   "delete_collection_namespaced_config_map",
+                   "delete_collection_namespaced_service_account"):
+        getattr(api_clients.core, method).side_effect = \
+            lambda method=method, **kw: calls.append((method, kw))
+    api_clients.rbac.delete_collection_namespaced_role.side_effect = \
+        ApiException(status=403, reason="Forbidden")
+
+    failures = await delete_inventory(
+        api_clients,
+        {"chaostoolkit-run": ["pods", "configmaps", "serviceaccounts",
+                              "roles"]},
+        "abc123",
+    )
+
+    selector = "chaostoolkit.org/experiment=abc123"
+    assert calls[-1] == (
+        "delete_collection_namespaced_service_account",
+        {"namespace": "chaostoolkit-run", "label_selector": selector})
+    assert {c[0] for c in calls[:2]} == {
+        "delete_collection_namespaced_pod",
+        "delete_collection_namespaced_config_map"}
+    assert failures["pods in 'chaostoolkit-run'"] is None
+    assert failures["roles in 'chaostoolkit-run'"].status == 403
@@ -0,0 +1,100 @@
+from unittest.mock import Mock
+
+import kopf
+import pytest
+from kubernetes.client.rest import ApiException
+
+from controller import ResourceTemplates, ExperimentSpec, SharedObjects, \
+    provision_experiment_config_map, LAST_HANDLED_ANNOTATION, WarmPod, \
+    create_pod, configure_persistence
+
+
+@pytest.mark.asyncio
+async def test_large_experiments_are_gzipped(templates: ResourceTemplates):
+    import base64
+    import gzip
+
+    v1 = Mock()
+    v1.patch_namespaced_config_map.side_effect = ApiException(status=404)
+    memo = kopf.Memo()
+    memo.shared_objects = SharedObjects(v1)
+    content = {"title": "large", "method": [
+        {"type": "probe", "name": f"probe-{i}", "provider": {
+            "type": "process", "path": "curl", "arguments": "-s http://app"}}
+        for i in range(500)]}
+    spec = ExperimentSpec.from_dict({
+        "serviceaccount": {"name": "runner"},
+        "pod": {"experiment": {"content": content}}})
+    assert spec.pod.experiment_gzip
+
+    name, _ = await provision_experiment_config_map(
+        memo, v1, "ns", spec, "uid-1")
+    body = v1.create_namespaced_config_map.call_args.kwargs["body"]
+    assert "data" not in body
+    packed = base64.b64decode(body["binaryData"]["experiment.json.gz"])
+    assert gzip.decompress(packed).decode() == spec.pod.experiment_json
+    assert len(packed) * 5 < len(spec.pod.experiment_json)
+
+    pod = await create_pod(
+        Mock(), templates, spec, "ns", "abc", {"name": "exp"}, apply=False,
+        experiment_cm_name=name)
+    init = pod["spec"]["initContainers"][0]
+    assert init["image"] == "busybox:1.36.1"
+    assert init["command"][-2:] == [
+        "/home/svc/packed/experiment.json.gz",
+        "/home/svc/unpacked/experiment.json"]
+    mounts = pod["spec"]["containers"][0]["volumeMounts"]
+    assert {"name": "chaostoolkit-experiment-unpacked",
+            "mountPath": "/home/svc/experiment.json",
+            "subPath": "experiment.json", "readOnly": True} in mounts
+    volumes = {v["name"]: v for v in pod["spec"]["volumes"]}
+    assert volumes["chaostoolkit-experiment"]["configMap"]["name"] == name
+    assert volumes["chaostoolkit-experiment-unpacked"] == {
+        "name": "chaostoolkit-experiment-unpacked", "emptyDir": {}}
+    # unpacked before it could be handed over
+    assert WarmPod.from_pod(pod, {}) is None
+
+    # small ones are kept as they are
+    spec = ExperimentSpec.from_dict({"pod": {"experiment": {
+        "content": {"title": "small"}}}})
+    assert not spec.pod.experiment_gzip
+
+
+@pytest.mark.asyncio
+async def test_experiments_larger_than_annotations_can_be():
+    import base64
+    import json
+    from kopf._cogs.structs import bodies
+
+    content = {"title": "huge", "method": [
+        {"type": "probe", "name": f"probe-{i}", "provider": {
+            "type": "process", "path": "curl",
+            "arguments": f"-s http://app-{i}.svc/health?verbose=true"}}
+        for i in range(3000)]}
+    body = bodies.Body({
+        "apiVersion": "chaostoolkit.org/v1",
+        "kind": "ChaosToolkitExperiment",
+        "metadata": {"namespace": "chaostoolkit-crd", "name": "exp",
+                     "uid": "uid-exp"},
+        "spec": {"pod": {"experiment": {"content": content}}}})
+    assert len(json.dumps(content)) > 256 * 1024
+
+    # kopf keeps the last handled spec without the experiment
+    settings = kopf.OperatorSettings()
+    await configure_persistence(settings=settings)
+    storage = settings.persistence.diffbase_storage
+    patch_ = kopf.Patch()
+    storage.store(body=body, patch=patch_, essence=storage.build(body=body))
+    last_handled = patch_["metadata"]["annotations"][LAST_HANDLED_ANNOTATION]
+    assert "probe-0" not in last_handled and len(last_handled) < 1024
+
+    # its configmap stays well below the limit of objects
+    v1 = Mock()
+    v1.patch_namespaced_config_map.side_effect = ApiException(status=404)
+    memo = kopf.Memo()
+    memo.shared_objects = SharedObjects(v1)
+    spec = ExperimentSpec.from_dict(body["spec"])
+    await provision_experiment_config_map(memo, v1, "ns", spec, "uid-exp")
+    cm = v1.create_namespaced_config_map.call_args.kwargs["body"]
+    packed = base64.b64decode(cm["binaryData"]["experiment.json.gz"])
+    assert len(packed) < 64 * 1024
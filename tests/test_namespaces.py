@@ -0,0 +1,84 @@
+from typing import Any, Dict, List
+from unittest.mock import Mock, patch
+
+import kopf
+import pytest
+from kubernetes.client.rest import ApiException
+
+from controller import parse_templates, ExperimentSpec, create_ns, Shards
+
+
+@pytest.mark.asyncio
+async def test_create_ns_skips_namespaces_known_to_exist():
+    templates = parse_templates("chaostoolkit-crd", "ns-tpls", "1", {
+        "chaostoolkit-ns.yaml": "apiVersion: v1\nkind: Namespace\n"
+                                "metadata:\n  name: chaostoolkit-run\n"})
+    spec = ExperimentSpec.from_dict({})
+    v1 = Mock()
+
+    index = {"chaostoolkit-run": ["Active"]}
+    assert await create_ns(v1, templates, spec, index) == (
+        "chaostoolkit-run", None)
+    v1.create_namespace.assert_not_called()
+
+    # unknown or terminating namespaces are created as before
+    for index in [{}, {"chaostoolkit-run": ["Terminating"]}, None]:
+        ns_name, _ = await create_ns(v1, templates, spec, index)
+        assert ns_name == "chaostoolkit-run"
+    assert v1.create_namespace.call_count == 3
+
+    # never applied over an existing namespace, even in server-side mode
+    v1.create_namespace.side_effect = ApiException(status=409)
+    with patch("controller.APPLY_MODE", "server-side"):
+        assert await create_ns(v1, templates, spec, {}) == (
+            "chaostoolkit-run", None)
+    v1.patch_namespace.assert_not_called()
+    for c in v1.create_namespace.call_args_list:
+        labels = c.kwargs["body"]["metadata"]["labels"]
+        assert labels == {"chaostoolkit.org/namespace": "true"}
+
+
+def test_only_objects_of_the_operator_are_watched():
+    from kopf._cogs.structs import bodies, references
+    from kopf._core.intents import causes
+
+    registry = kopf.get_default_registry()
+
+    def indexed(group: str, plural: str, metadata: Dict[str, Any],
+                **fields: Any) -> List[str]:
+        cause = causes.IndexingCause(
+            logger=Mock(), indices={}, memo=kopf.Memo(),
+            resource=references.Resource(group, "v1", plural),
+            patch=kopf.Patch(),
+            body=bodies.Body({"metadata": metadata, **fields}))
+        return [h.id for h in registry._indexing.get_handlers(cause)]
+
+    data = {"chaostoolkit-pod.yaml": ""}
+    assert indexed(
+        "", "configmaps", {"namespace": "chaostoolkit-crd", "name": "t"},
+        data=data) == ["templates_index"]
+    assert indexed(
+        "", "configmaps", {"namespace": "team-a", "name": "t"},
+        data=data) == []
+
+    assert indexed(
+        "", "namespaces",
+        {"name": "chaostoolkit-run",
+         "labels": {"chaostoolkit.org/namespace": "true"}}) == [
+             "namespaces_index"]
+    assert indexed("", "namespaces", {"name": "team-a"}) == []
+
+    memo = kopf.Memo()
+    memo.shards = Shards(Mock(), "")
+    for namespace, handlers in (("chaostoolkit-crd", 1), ("team-a", 0)):
+        cause = causes.ChangingCause(
+            logger=Mock(), indices={}, memo=memo,
+            resource=references.Resource(
+                "chaostoolkit.org", "v1", "chaosexperiments"),
+            patch=kopf.Patch(),
+            body=bodies.Body({
+                "metadata": {"namespace": namespace, "name": "exp",
+                             "uid": "uid-exp"},
+                "spec": {}}),
+            initial=False, reason=causes.Reason.CREATE)
+        assert len(registry._changing.get_handlers(cause)) == handlers
@@ -0,0 +1,87 @@
+import asyncio
+
+import kopf
+import pytest
+from kubernetes.client.rest import ApiException
+
+from controller import run_async, run_dependency_graph, METRICS, observe_step, \
+    TRACER, InMemorySpanExporter, LoggingSpanExporter, load_span_exporter, \
+    observe_handler
+
+
+@pytest.mark.asyncio
+async def test_metrics_of_api_calls_and_steps():
+    pytest.importorskip("prometheus_client")
+
+    def create_namespaced_pod(**kwargs):
+        raise ApiException(status=409, reason="Conflict")
+
+    @observe_step
+    async def create_something():
+        with pytest.raises(ApiException):
+            await run_async(create_namespaced_pod, namespace="ns", body={})
+
+    def sample(name: str, **labels) -> float:
+        return METRICS.registry.get_sample_value(name, labels) or 0
+
+    conflicts = sample("chaostoolkit_crd_api_calls_total", verb="create",
+                       resource="pod", code="409")
+    await create_something()
+
+    assert sample("chaostoolkit_crd_api_calls_total", verb="create",
+                  resource="pod", code="409") == conflicts + 1
+    assert sample("chaostoolkit_crd_step_duration_seconds_count",
+                  step="create_something") == 1
+    assert sample("chaostoolkit_crd_executor_queue_depth") == 0
+
+    with METRICS.in_flight("create"):
+        assert sample("chaostoolkit_crd_experiments_in_flight",
+                      operation="create") == 1
+    assert sample("chaostoolkit_crd_experiments_in_flight",
+                  operation="create") == 0
+
+
+@pytest.mark.asyncio
+async def test_tracing_spans_nest_across_tasks():
+    @observe_step
+    async def create_thing():
+        await asyncio.sleep(0.01)
+
+    exporter = InMemorySpanExporter()
+    TRACER.add_exporter(exporter)
+    try:
+        with observe_handler("create", "abc123"):
+            await run_dependency_graph({
+                "a": ([], lambda r: create_thing()),
+                "b": (["a"], lambda r: create_thing()),
+            })
+            with pytest.raises(RuntimeError):
+                with TRACER.span("bind_namespace", namespace="other-ns"):
+                    raise RuntimeError("boom")
+    finally:
+        TRACER.remove_exporter(exporter)
+
+    root = exporter.spans[-1]
+    assert root.name == "create_chaos_experiment"
+    assert root.parent_id is None
+    children = exporter.spans[:-1]
+    assert [s.name for s in children] == [
+        "create_thing", "create_thing", "bind_namespace"]
+    for span in children:
+        assert span.trace_id == root.trace_id
+        assert span.parent_id == root.span_id
+        assert span.attributes["name_suffix"] == "abc123"
+        assert span.duration <= root.duration
+    assert children[0].end <= children[1].start
+    assert children[0].duration >= 0.01
+    assert children[2].attributes["namespace"] == "other-ns"
+    assert children[2].error == "boom"
+
+
+def test_load_span_exporter():
+    assert isinstance(load_span_exporter("log"), LoggingSpanExporter)
+    assert isinstance(
+        load_span_exporter("controller:InMemorySpanExporter"),
+        InMemorySpanExporter)
+    with pytest.raises(kopf.PermanentError):
+        load_span_exporter("controller:NoSuchExporter")
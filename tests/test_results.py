@@ -0,0 +1,84 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.fakeapi import FakeApiServer
+from controller import ApiClients, RunResult, ResultCollector
+
+
+def test_run_result_is_summarized_line_by_line():
+    result = RunResult()
+    log = (
+        b"[2024-05-02 10:00:00 INFO] Validating the experiment's syntax\n"
+        b"[2024-05-02 10:00:01 CRITICAL] Steady state probe 'app-up' is not "
+        b"in the given tolerance so failing this experiment\n"
+        b"some output " + b"x" * 100000 + b"\n"
+        b"[2024-05-02 10:01:05 INFO] Experiment ended with status: deviated\n"
+        b"[2024-05-02 10:01:06 INFO] Let's rollback...")
+    for i in range(0, len(log), 7):
+        result.feed(log[i:i + 7])
+        assert len(result.line) <= 16 * 1024
+    assert result.summary() == {
+        "status": "deviated", "deviatedProbes": ["app-up"], "duration": 66}
+    assert RunResult().summary() == {"status": "unknown"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["asyncio", "thread"])
+async def test_results_are_collected_from_pod_logs(
+        mode: str, fake_api_server: FakeApiServer):
+    server = fake_api_server
+    api_clients = ApiClients(mode=mode, config_file=server.kubeconfig)
+    try:
+        await api_clients.open()
+        for name in ["run-1", "run-2"]:
+            server.add("pods", "ns", {"metadata": {"name": name}})
+            server.logs[("ns", name)] = b"".join(
+                b"[2024-05-02 10:00:%02d INFO] step\n" % (i % 60)
+                for i in range(2000)
+            ) + b"[2024-05-02 10:01:00 INFO] Experiment ended with " \
+                b"status: completed\n"
+
+        results = {}
+        collector = ResultCollector(api_clients, streams=1)
+        for name in ["run-1", "run-2", "run-1", "gone"]:
+            collector.collect(
+                "ns", name, lambda r, name=name: results.setdefault(name, r))
+        assert len(collector.tasks) == 3
+        await asyncio.gather(*collector.tasks)
+
+        assert results == {
+            name: {"status": "completed", "duration": 60}
+            for name in ["run-1", "run-2"]}
+        pod = server.objects[("pods", "ns", "run-1")]
+        assert pod["metadata"]["annotations"] == {
+            "chaostoolkit.org/result": "1"}
+        assert not collector.collecting
+        assert server.requests[("GET", "pods/log")] == 3
+        patches = server.requests[("PATCH", "pods")]
+
+        # disabled: neither the log is read nor the pod annotated
+        server.add("pods", "ns", {"metadata": {"name": "run-3"}})
+        disabled = ResultCollector(api_clients, streams=0)
+        disabled.collect("ns", "run-3", results.update)
+        assert not disabled.tasks and not disabled.collecting
+        await asyncio.sleep(0.05)
+        assert server.requests[("GET", "pods/log")] == 3
+        assert server.requests[("PATCH", "pods")] == patches
+        assert "annotations" not in (
+            server.objects[("pods", "ns", "run-3")]["metadata"])
+        assert set(results) == {"run-1", "run-2"}
+
+        # a broken stream is logged and the pod left to be read again
+        failing = ResultCollector(api_clients, streams=1)
+        with patch.object(failing, "read_result",
+                          side_effect=asyncio.TimeoutError()), \
+                patch("controller.logging.getLogger") as get_logger:
+            failing.collect("ns", "run-3", results.update)
+            await asyncio.gather(*failing.tasks)
+        assert not failing.collecting
+        get_logger.return_value.warning.assert_called_once()
+        assert set(results) == {"run-1", "run-2"}
+    finally:
+        await api_clients.close()
@@ -0,0 +1,147 @@
+import copy
+from typing import Callable
+from unittest.mock import Mock, patch
+
+import kopf
+import pytest
+
+from benchmarks.e2e import experiment
+from benchmarks.fakeapi import FakeApiServer
+from controller import ApiClients, HashRing, Shards, \
+    LAST_HANDLED_ANNOTATION, generate_name_suffix, create_chaos_experiment, \
+    delete_chaos_experiment, open_api_clients
+
+
+def test_hash_ring_moves_only_the_share_of_a_leaving_replica():
+    suffixes = [f"{i * 1099511627:010x}"[-10:] for i in range(2000)]
+    ring = HashRing(["a", "b", "c"])
+    owners = {s: ring.owner(s) for s in suffixes}
+    for member in "abc":
+        assert 0.2 < list(owners.values()).count(member) / 2000 < 0.47
+
+    smaller = HashRing(["a", "b"])
+    for suffix, owner in owners.items():
+        if owner != "c":
+            assert smaller.owner(suffix) == owner
+    assert HashRing([]).owner("abc") is None
+
+
+@pytest.mark.asyncio
+async def test_shards_share_experiments_through_leases(
+        fake_api_server: FakeApiServer, api_clients: ApiClients):
+    server = fake_api_server
+    lost = []
+    a = Shards(api_clients, "a", "ns", on_lost=lost.extend)
+    b = Shards(api_clients, "b", "ns")
+    unsharded = Shards(api_clients, "")
+    await a.join()
+    assert a.ring.members == {"a"}
+    await b.join()
+    assert b.ring.members == {"a", "b"}
+    a.ring = HashRing(await a.members())
+    assert a.ring.members == {"a", "b"}
+    assert ("leases", "ns", "chaostoolkit-crd-shard-b") in server.objects
+
+    assert a.owns("0123456789") != b.owns("0123456789")
+    assert unsharded.owns("0123456789")
+
+    await b.leave()
+    assert await a.members() == {"a"}
+    await a.leave()
+    assert not [k for k in server.objects if k[0] == "leases"]
+
+    # claims the unsettled experiments it gets, forgets those it loses
+    def listed(name: str, settled: bool) -> dict:
+        annotations = {LAST_HANDLED_ANNOTATION: "{}"} if settled else {}
+        return {"metadata": {"namespace": "default", "name": name,
+                             "uid": f"uid-{name}",
+                             "annotations": annotations}}
+
+    mock_clients = Mock()
+    mock_clients.custom.list_cluster_custom_object.return_value = {
+        "items": [listed(f"exp-{i}", settled=i % 2 == 0)
+                  for i in range(40)]}
+    a = Shards(mock_clients, "a", on_lost=lost.extend)
+    a.ring = HashRing(["a"])
+    await a.rebalance(HashRing(["a", "b"]))
+    owned_by_b = [f"default/exp-{i}" for i in range(40)
+                  if not a.owns(generate_name_suffix(
+                      listed(f"exp-{i}", False)))]
+    assert owned_by_b and lost == owned_by_b
+    assert not mock_clients.custom.patch_namespaced_custom_object.called
+
+    b = Shards(mock_clients, "b")
+    b.ring = HashRing(["a", "b"])
+    await b.rebalance(HashRing(["b"]))
+    claims = mock_clients.custom.patch_namespaced_custom_object.call_args_list
+    assert sorted(f"default/{c.kwargs['name']}" for c in claims) == sorted(
+        f"default/exp-{i}" for i in range(1, 40, 2)
+        if f"default/exp-{i}" not in owned_by_b)
+    assert claims[0].kwargs["body"] == {
+        "metadata": {"annotations": {"chaostoolkit.org/shard": "b"}}}
+
+
+@pytest.mark.asyncio
+async def test_shards_hold_their_experiments_with_a_shared_finalizer(
+        fake_api_server: FakeApiServer, api_clients: ApiClients,
+        operator_memo: Callable[..., kopf.Memo]):
+    from kopf._cogs.structs import bodies, references
+    from kopf._core.intents import causes
+
+    # runs are only counted per replica
+    with patch("controller.SHARD_ID", "a"), patch("controller.MAX_RUNS", 2):
+        with pytest.raises(kopf.PermanentError):
+            await open_api_clients(memo=kopf.Memo(), logger=Mock())
+
+    server = fake_api_server
+    body = experiment({})
+    server.add("chaosexperiments", "chaostoolkit-crd", body)
+    key = ("chaosexperiments", "chaostoolkit-crd", body["metadata"]["name"])
+    ring = HashRing(["a", "b"])
+    owner = ring.owner(generate_name_suffix(body))
+    replicas = {}
+    for shard_id in "ab":
+        memo = operator_memo(shards=Shards(api_clients, shard_id))
+        memo.shards.ring = ring
+        replicas[shard_id] = memo
+
+        # the other replica is blind to the experiment, so kopf never runs
+        # its handlers there
+        cause = causes.ChangingCause(
+            logger=Mock(), indices={}, memo=memo,
+            resource=references.Resource(
+                "chaostoolkit.org", "v1", "chaosexperiments"),
+            patch=kopf.Patch(), body=bodies.Body(body), initial=True,
+            reason=causes.Reason.CREATE)
+        assert kopf.get_default_registry()._changing.prematch(cause) == (
+            shard_id == owner)
+
+    def fresh() -> bodies.Body:
+        return bodies.Body(copy.deepcopy(server.objects[key]))
+
+    kwargs = dict(spec=body["spec"], namespace="chaostoolkit-crd",
+                  logger=Mock(), memo=replicas[owner])
+    stale = fresh()
+    patch_ = kopf.Patch()
+    await create_chaos_experiment(
+        meta=stale["metadata"], body=stale, patch=patch_, **kwargs)
+    assert server.objects[key]["metadata"]["finalizers"] == [
+        "chaostoolkit.org/experiment"]
+
+    # finalizers changed meanwhile are not overwritten
+    stale = fresh()
+    server.store(key, server.objects[key])
+    with pytest.raises(kopf.TemporaryError):
+        await delete_chaos_experiment(
+            meta=stale["metadata"], body=stale, status=patch_.status,
+            **kwargs)
+    assert server.objects[key]["metadata"]["finalizers"] == [
+        "chaostoolkit.org/experiment"]
+
+    # the experiment goes once its objects are deleted
+    deleted = fresh()
+    await delete_chaos_experiment(
+        meta=deleted["metadata"], body=deleted, status=patch_.status,
+        **kwargs)
+    assert server.objects[key]["metadata"]["finalizers"] == []
+    assert not [k for k in server.objects if k[0] == "pods"]
@@ -0,0 +1,182 @@
+from typing import Callable
+from unittest.mock import Mock, patch
+
+import kopf
+import pytest
+
+from benchmarks.e2e import experiment
+from benchmarks.fakeapi import FakeApiServer
+from controller import ApiClients, parse_templates, ExperimentSpec, \
+    SharedObjects, shared_rbac_suffix, provision_env_config_map, \
+    provision_experiment_config_map, create_chaos_experiment, \
+    delete_chaos_experiment
+
+
+@pytest.mark.asyncio
+async def test_config_maps_are_content_addressed(
+        fake_api_server: FakeApiServer, api_clients: ApiClients):
+    server = fake_api_server
+    v1 = api_clients.core
+    memo = kopf.Memo(shared_objects=SharedObjects(v1))
+
+    # no env at all, no configmap
+    spec = ExperimentSpec.from_dict({})
+    assert await provision_env_config_map(
+        memo, v1, "ns", spec, "uid-1") == (None, False)
+    assert await provision_experiment_config_map(
+        memo, v1, "ns", spec, "uid-1") == (None, False)
+    assert not server.objects
+
+    spec = ExperimentSpec.from_dict({"pod": {
+        "env": {"variables": {"A": "1", "B": 2}},
+        "experiment": {"content": {"title": "hello", "method": []}},
+    }})
+    names = set()
+    for uid in ("uid-1", "uid-2"):
+        env_name, shared = await provision_env_config_map(
+            memo, v1, "ns", spec, uid)
+        assert shared
+        experiment_name, shared = await provision_experiment_config_map(
+            memo, v1, "ns", spec, uid)
+        assert shared
+        names.update([env_name, experiment_name])
+
+    # created once, then shared by both experiments
+    bodies = {
+        name: obj for (kind, _, name), obj in server.objects.items()
+        if kind == "configmaps"}
+    assert set(bodies) == names
+    env, experiment = (
+        bodies[name] for name in sorted(names))
+    assert env["data"] == {"A": "1", "B": "2"}
+    assert env["immutable"] is True
+    assert experiment["data"] == {
+        "experiment.json": '{"method":[],"title":"hello"}'}
+    for body in bodies.values():
+        assert body["metadata"]["annotations"] == {
+            "chaostoolkit.org/shared": "ready",
+            "users.chaostoolkit.org/uid-1": "",
+            "users.chaostoolkit.org/uid-2": ""}
+
+    with pytest.raises(kopf.PermanentError):
+        ExperimentSpec.from_dict({"pod": {"experiment": {
+            "asFile": False, "content": {"title": "hello"}}}})
+
+
+def test_shared_rbac_suffix():
+    templates = parse_templates("chaostoolkit-crd", "rbac-tpls", "1", {
+        "chaostoolkit-sa.yaml": "metadata:\n  name: chaostoolkit\n",
+        "chaostoolkit-role.yaml": "metadata:\n  name: chaostoolkit\n",
+        "chaostoolkit-role-binding.yaml": "metadata:\n  name: chaostoolkit\n",
+    })
+
+    def suffix(spec):
+        return shared_rbac_suffix(templates, ExperimentSpec.from_dict(spec))
+
+    binds = {"role": {"binds_to_namespaces": ["a", "b"]}}
+    assert suffix(binds) == suffix(
+        {"role": {"binds_to_namespaces": ["b", "a"]}, "verbose": True})
+    assert suffix(binds).startswith("shared-")
+    assert suffix(binds) != suffix({})
+    assert suffix({}) != suffix({"namespace": "other"})
+
+
+@pytest.mark.asyncio
+async def test_shared_objects_count_their_users_on_the_cluster(
+        fake_api_server: FakeApiServer, api_clients: ApiClients):
+    server = fake_api_server
+
+    # two replicas of the operator, or one before and after a restart
+    a = SharedObjects(api_clients.core)
+    b = SharedObjects(api_clients.core)
+    record = {"apiVersion": "v1", "kind": "ConfigMap",
+              "metadata": {"name": "chaostoolkit-shared-abc"}}
+    key = ("configmaps", "ns", "chaostoolkit-shared-abc")
+
+    assert await a.acquire("ns", record, "uid-1") is True
+    # not created yet by the first user
+    assert await b.acquire("ns", record, "uid-2") is True
+    await a.ready("ns", "chaostoolkit-shared-abc")
+    assert await b.acquire("ns", record, "uid-3") is False
+
+    deleted = []
+
+    async def delete():
+        deleted.append(True)
+        return {"roles in 'ns'": None}
+
+    assert await b.release(
+        "ns", "chaostoolkit-shared-abc", "uid-1", delete) == {}
+    assert await a.release(
+        "ns", "chaostoolkit-shared-abc", "uid-2", delete) == {}
+    assert not deleted
+    assert await a.release(
+        "ns", "chaostoolkit-shared-abc", "uid-3", delete) == {
+        "roles in 'ns'": None,
+        "configmap 'ns/chaostoolkit-shared-abc'": None}
+    assert deleted and key not in server.objects
+    # released again, when the delete handler is retried
+    assert await a.release(
+        "ns", "chaostoolkit-shared-abc", "uid-3", delete) == {}
+
+    # a user coming while the last one leaves keeps the objects
+    assert await a.acquire("ns", record, "uid-4") is True
+    apply = server.apply
+
+    def apply_meanwhile(*args, **kwargs):
+        response = apply(*args, **kwargs)
+        # another experiment acquires the objects right after this patch
+        if b"uid-4" in args[3]:
+            server.objects[key]["metadata"]["annotations"][
+                "users.chaostoolkit.org/uid-5"] = ""
+            server.store(key, server.objects[key])
+        return response
+
+    with patch.object(server, "apply", side_effect=apply_meanwhile):
+        assert await a.release(
+            "ns", "chaostoolkit-shared-abc", "uid-4", delete) == {}
+    assert server.objects[key]["metadata"]["annotations"] == {
+        "users.chaostoolkit.org/uid-5": ""}
+
+    # no user joins objects being deleted
+    server.objects[key]["metadata"]["annotations"][
+        "chaostoolkit.org/shared"] = "deleting"
+    with pytest.raises(kopf.TemporaryError):
+        await b.acquire("ns", record, "uid-6")
+
+
+@pytest.mark.asyncio
+async def test_shared_rbac_outlives_the_replica_which_created_it(
+        fake_api_server: FakeApiServer,
+        operator_memo: Callable[..., kopf.Memo]):
+    server = fake_api_server
+
+    def rbac_objects():
+        return sorted(
+            (kind, name) for kind, _, name in server.objects
+            if kind in ("serviceaccounts", "roles", "rolebindings"))
+
+    replicas = [operator_memo() for _ in range(2)]
+    experiments = []
+    with patch("controller.RBAC_MODE", "shared"):
+        for memo in replicas:
+            body = experiment({})
+            patch_ = kopf.Patch()
+            await create_chaos_experiment(
+                meta=body["metadata"], body=body, spec=body["spec"],
+                namespace="chaostoolkit-crd", logger=Mock(), memo=memo,
+                patch=patch_)
+            experiments.append((body, dict(patch_.status)))
+        shared = rbac_objects()
+        assert len(shared) == 3
+
+        # deleted by the other replica, which never saw it created
+        for (body, status), memo in zip(experiments, replicas[::-1]):
+            assert rbac_objects() == shared
+            await delete_chaos_experiment(
+                meta=body["metadata"], body=body, spec=body["spec"],
+                namespace="chaostoolkit-crd", logger=Mock(), memo=memo,
+                status=status)
+    assert rbac_objects() == []
+    assert ("configmaps", "chaostoolkit-run",
+            f"chaostoolkit-{status['rbac']}") not in server.objects
@@ -0,0 +1,79 @@
+import os
+
+import kopf
+import pytest
+import yaml
+
+from controller import ExperimentSpec
+
+
+def test_experiment_spec_targets():
+    spec = ExperimentSpec.from_dict({"targets": [
+        {"name": "app-a", "env": {"TARGET_URL": "http://a", "PORT": 80}},
+        {"name": "app-b"}]})
+    assert [(t.name, t.env) for t in spec.targets] == [
+        ("app-a", {"TARGET_URL": "http://a", "PORT": "80"}), ("app-b", {})]
+
+    for bad in ([{"name": "App"}], [{"name": "a"}, {"name": "a"}],
+                [{"env": {}}], [{"name": "a", "env": ["X=1"]}]):
+        with pytest.raises(kopf.PermanentError):
+            ExperimentSpec.from_dict({"targets": bad})
+
+
+def test_experiment_spec_defaults():
+    spec = ExperimentSpec.from_dict({})
+    assert spec.namespace == "chaostoolkit-run"
+    assert spec.templates_name == "chaostoolkit-resources-templates"
+    assert spec.sa_name is None
+    assert spec.binds_to_namespaces == []
+    assert not spec.is_scheduled
+    assert spec.pod.env_enabled is True
+    assert spec.pod.env_config_map_name == "chaostoolkit-env"
+    assert spec.pod.settings_enabled is False
+    assert spec.pod.experiment_file_name == "experiment.json"
+    assert spec.pod.template is None
+    assert spec.priority == 0
+    assert not hasattr(spec, "__dict__")
+
+
+def test_experiment_spec_rejects_invalid_spec():
+    for bad in ({"namspace": "typo"},
+                {"pod": {"env": {"enabled": "no"}}},
+                {"pod": {"experiment": {"asfile": False}}},
+                {"pod": {"template": "[not, a, pod]"}},
+                {"role": {"binds_to_namespaces": "other-ns"}},
+                {"schedule": {"kind": "deployment", "value": "* * * * *"}},
+                {"schedule": {"kind": "cronJob"}},
+                {"priority": "high"}, {"priority": True}):
+        with pytest.raises(kopf.PermanentError):
+            ExperimentSpec.from_dict(bad)
+
+
+def test_experiment_spec_accepts_crd_schema(topdir: str):
+    with open(os.path.join(
+            topdir, "manifests", "base", "common", "crd.yaml")) as f:
+        crd = yaml.safe_load(f)
+    schema = crd["spec"]["versions"][0]["schema"]["openAPIV3Schema"]
+
+    def sample(prop: dict):
+        if prop.get("type") == "object":
+            return {
+                k: sample(v) for k, v in prop.get("properties", {}).items()}
+        if prop.get("type") == "array":
+            return [sample(prop["items"])]
+        if "enum" in prop:
+            return prop["enum"][0]
+        if "pattern" in prop:
+            return "abc"
+        if prop.get("type") == "boolean":
+            return True
+        if prop.get("type") == "integer":
+            return 1
+        if prop is schema["properties"]["spec"]["properties"]["pod"][
+                "properties"]["template"]:
+            return "spec: {containers: []}"
+        return "x"
+
+    spec = ExperimentSpec.from_dict(sample(schema["properties"]["spec"]))
+    assert spec.is_scheduled
+    assert spec.pod.template == {"spec": {"containers": []}}
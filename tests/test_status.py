@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+import pytest
+
+from controller import StatusUpdates, pod_run_status, job_run_status, \
+    batch_phase
+
+
+def test_batch_phase_is_rolled_up_from_targets():
+    assert batch_phase([]) is None
+    assert batch_phase([None, "Pending"]) == "Pending"
+    assert batch_phase(["Running", None]) == "Running"
+    assert batch_phase(["Succeeded", "Pending"]) == "Running"
+    assert batch_phase(["Succeeded", "Succeeded"]) == "Succeeded"
+    assert batch_phase(["Succeeded", "Failed"]) == "Failed"
+
+
+@pytest.mark.asyncio
+async def test_status_updates_are_coalesced_per_experiment():
+    api_clients = Mock()
+    api_clients.custom.get_namespaced_custom_object.return_value = {
+        "spec": {"targets": [{"name": "a"}, {"name": "b"}]},
+        "status": {"targets": {"b": {"phase": "Succeeded"}}}}
+    updates = StatusUpdates(api_clients, delay=0.01)
+
+    updates.update("ns", "exp", {"phase": "Pending", "pod": "p"})
+    updates.update("ns", "exp", {"phase": "Running"})
+    updates.update("ns", "exp", {"targets": {"a": {"phase": "Running"}}})
+    updates.update("ns", "other", {"phase": "Pending"})
+    await asyncio.sleep(0.05)
+
+    patch_status = api_clients.custom.patch_namespaced_custom_object
+    assert patch_status.call_count == 2
+    bodies = {c.kwargs["name"]: c.kwargs["body"]
+              for c in patch_status.call_args_list}
+    assert bodies["exp"] == {"status": {
+        "phase": "Running", "pod": "p",
+        "targets": {"a": {"phase": "Running"}}}}
+
+    # the batch is done once all its targets are
+    updates.update("ns", "exp", {"targets": {"a": {"phase": "Failed"}}})
+    await updates.close()
+    assert patch_status.call_count == 3
+    assert patch_status.call_args.kwargs["body"] == {"status": {
+        "phase": "Failed", "targets": {"a": {"phase": "Failed"}}}}
+    assert not updates.pending
+
+    # experiments leaving the queue are annotated to be started
+    updates.admitted("ns/exp")
+    await updates.close()
+    body = patch_status.call_args.kwargs["body"]
+    assert body["status"] == {"phase": "Admitted"}
+    assert "chaostoolkit.org/admitted" in body["metadata"]["annotations"]
+
+    # errors other than those of the API are logged, not lost in the task
+    patch_status.side_effect = asyncio.TimeoutError()
+    updates.update("ns", "exp", {"phase": "Failed"})
+    with patch("controller.logging.getLogger") as get_logger:
+        await asyncio.sleep(0.05)
+    assert not updates.tasks and not updates.pending
+    assert "TimeoutError" in get_logger.return_value.warning.call_args[0][0]
+
+
+def test_run_status_from_pod_and_job():
+    pod = {"metadata": {"name": "chaostoolkit-abc"}, "status": {
+        "phase": "Failed", "startTime": "2024-01-01T00:00:00Z",
+        "containerStatuses": [{"name": "chaostoolkit", "state": {
+            "terminated": {"exitCode": 1,
+                           "finishedAt": "2024-01-01T00:01:00Z"}}}]}}
+    assert pod_run_status(pod) == {
+        "pod": "chaostoolkit-abc", "phase": "Failed",
+        "startTime": "2024-01-01T00:00:00Z",
+        "finishTime": "2024-01-01T00:01:00Z", "exitCode": 1}
+
+    job = {"metadata": {"name": "chaostoolkit-abc-1"}, "status": {
+        "startTime": "2024-01-01T00:00:00Z",
+        "completionTime": "2024-01-01T00:01:00Z",
+        "conditions": [{"type": "Complete", "status": "True"}]}}
+    assert job_run_status(job) == {
+        "job": "chaostoolkit-abc-1", "phase": "Succeeded",
+        "startTime": "2024-01-01T00:00:00Z",
+        "finishTime": "2024-01-01T00:01:00Z"}
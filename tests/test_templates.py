@@ -0,0 +1,77 @@
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+import yaml
+
+from controller import set_chaos_cmd_args, set_experiment_config_map_name, \
+    parse_templates, get_config_map, PodTemplateBuilder, set_image_name, \
+    set_env_config_map_name, add_env_secret, set_settings_secret_name, \
+    set_verbose_chaos, ExperimentSpec, PodSpec, Resource
+
+
+def test_templates_are_parsed_once_per_resource_version():
+    data = {
+        "chaostoolkit-sa.yaml": "kind: ServiceAccount\nmetadata:\n  name: ctk"
+    }
+    templates = parse_templates("chaostoolkit-crd", "tpls", "1", data)
+    assert parse_templates("chaostoolkit-crd", "tpls", "1", data) is templates
+    assert parse_templates("chaostoolkit-crd", "tpls", "2", data) \
+        is not templates
+
+    sa = templates.get("chaostoolkit-sa.yaml")
+    sa["metadata"]["name"] = "changed"
+    assert templates.get("chaostoolkit-sa.yaml")["metadata"]["name"] == "ctk"
+
+
+@pytest.mark.asyncio
+async def test_get_config_map_from_index_does_not_call_the_api():
+    templates = parse_templates("chaostoolkit-crd", "my-tpls", "1", {})
+    v1 = Mock()
+    index = {("chaostoolkit-crd", "my-tpls"): [templates]}
+
+    cm = await get_config_map(
+        v1, ExperimentSpec.from_dict({"template": {"name": "my-tpls"}}),
+        "chaostoolkit-crd", index)
+    assert cm is templates
+    v1.read_namespaced_config_map.assert_not_called()
+
+
+def test_pod_template_builder_matches_mutators(generic: List['Resource']):
+    resource = generic[4]
+    pod_spec = {
+        "image": "chaostoolkit/chaostoolkit:latest",
+        "env": {"secretName": "my-secret"},
+        "settings": {"enabled": True, "secretName": "my-settings"},
+        "experiment": {
+            "configMapName": "my-cfg",
+            "configMapExperimentFileName": "experiment.yaml"
+        },
+        "chaosArgs": ["run", "$(EXPERIMENT_PATH)", ""],
+    }
+
+    expected = yaml.safe_load(resource["data"]["chaostoolkit-pod.yaml"])
+    set_image_name(expected, "chaostoolkit/chaostoolkit:latest")
+    set_env_config_map_name(expected, "chaostoolkit-env")
+    add_env_secret(expected, "my-secret")
+    set_settings_secret_name(expected, "my-settings")
+    set_experiment_config_map_name(expected, "my-cfg", "experiment.yaml")
+    set_chaos_cmd_args(expected, ["run", "$(EXPERIMENT_PATH)"])
+    set_verbose_chaos(expected)
+
+    ctk_pod = yaml.safe_load(resource["data"]["chaostoolkit-pod.yaml"])
+    PodTemplateBuilder(ctk_pod).apply_overrides(
+        PodSpec.from_dict(pod_spec), verbose=True)
+    assert yaml.safe_dump(ctk_pod, sort_keys=False) == \
+        yaml.safe_dump(expected, sort_keys=False)
+
+
+def test_pod_template_builder_set_env():
+    tpl = {"spec": {"containers": [{
+        "name": "chaostoolkit",
+        "env": [{"name": "A", "valueFrom": {"fieldRef": {}}}]}]}}
+
+    PodTemplateBuilder(tpl).set_env({"A": "x", "B": 2})
+
+    assert tpl["spec"]["containers"][0]["env"] == [
+        {"name": "A", "value": "x"}, {"name": "B", "value": "2"}]
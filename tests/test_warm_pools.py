@@ -0,0 +1,167 @@
+import datetime
+from typing import Callable
+from unittest.mock import Mock, patch
+
+import kopf
+import pytest
+from kubernetes.client.rest import ApiException
+
+from benchmarks.e2e import experiment
+from benchmarks.fakeapi import FakeApiServer
+from controller import ApiClients, ExperimentSpec, ResourceTemplates, \
+    WarmPod, WarmPool, create_pod, create_chaos_experiment, delete_pod
+
+
+@pytest.mark.asyncio
+async def test_runs_are_handed_over_to_warm_pods(
+        templates: ResourceTemplates, fake_api_server: FakeApiServer,
+        api_clients: ApiClients):
+    spec = ExperimentSpec.from_dict({"serviceaccount": {"name": "runner"}})
+    meta = {"namespace": "chaostoolkit-crd", "labels": {"team": "a"}}
+
+    async def render(suffix: str) -> dict:
+        return await create_pod(
+            Mock(), templates, spec, "chaostoolkit-run", suffix,
+            dict(meta, name=f"exp-{suffix}"), apply=False,
+            env_cm_name="env", experiment_cm_name=f"exp-{suffix}")
+
+    # runs differing only by name and experiment share their idle pod
+    warm = WarmPod.from_pod(await render("aaaa"), meta)
+    assert warm.key == WarmPod.from_pod(await render("bbbb"), meta).key
+    container = warm.idle_tpl["spec"]["containers"][0]
+    assert "env" not in container and "args" not in container
+    assert warm.run_script([{"GREETING": "hello world"}]) == (
+        "export GREETING='hello world'\n"
+        "export CHAOSTOOLKIT_IN_POD=true\n"
+        "export EXPERIMENT_PATH=/home/svc/trigger/experiment.json\n"
+        'exec chaos run "${EXPERIMENT_PATH}"\n')
+
+    # the entrypoint of the image is unknown without a command
+    tpl = await render("cccc")
+    del tpl["spec"]["containers"][0]["command"]
+    with patch("controller.logging.getLogger") as get_logger:
+        assert WarmPod.from_pod(tpl, meta) is None
+    get_logger.return_value.debug.assert_called_once()
+    assert "has no command" in get_logger.return_value.debug.call_args[0][0]
+
+    server = fake_api_server
+    server.add("configmaps", "chaostoolkit-run", {
+        "metadata": {"name": "exp-aaaa"},
+        "data": {"experiment.json": "{}"}})
+    server.add("configmaps", "chaostoolkit-run", {
+        "metadata": {"name": "env"}, "data": {}})
+    pool = WarmPool(size=2)
+
+    # no idle pod yet, the run starts cold and the pool fills up
+    tpl = await render("aaaa")
+    assert await pool.hand_over(api_clients.core, tpl, meta, {}) is None
+    await pool.refills[("chaostoolkit-run", warm.key)]
+    idle = [server.objects[k] for k in server.objects if k[0] == "pods"]
+    assert len(idle) == 2
+    index = {("chaostoolkit-run", warm.key): [
+        (p["metadata"]["name"], p["metadata"]["resourceVersion"],
+         "Running") for p in idle]}
+
+    pod = await pool.hand_over(api_clients.core, tpl, meta, index)
+    name = pod.metadata.name
+    assert name == idle[0]["metadata"]["name"]
+    assert pod.metadata.labels["chaostoolkit.org/experiment"] == "aaaa"
+    assert "chaostoolkit.org/warm-pool" not in pod.metadata.labels
+    trigger = server.objects[("configmaps", "chaostoolkit-run", name)]
+    assert trigger["metadata"]["ownerReferences"][0]["name"] == name
+    assert set(trigger["data"]) == {"experiment.json",
+                                    "chaostoolkit-run.sh"}
+
+    # claimed pods are not offered again, stale versions lose the claim
+    other = idle[1]["metadata"]["name"]
+    index[("chaostoolkit-run", warm.key)][1] = (other, "0", "Running")
+    assert await pool.hand_over(api_clients.core, tpl, meta, index) is None
+    assert pool.claimed[("chaostoolkit-run", warm.key)] == {name}
+    assert "chaostoolkit.org/warm-pool" in (
+        server.objects[("pods", "chaostoolkit-run", other)]
+        ["metadata"]["labels"])
+
+
+@pytest.mark.asyncio
+async def test_runs_with_their_own_service_account_start_cold(
+        fake_api_server: FakeApiServer,
+        operator_memo: Callable[..., kopf.Memo]):
+    pool = WarmPool(size=2)
+    assert not pool.accepts(ExperimentSpec.from_dict({}))
+    assert pool.accepts(
+        ExperimentSpec.from_dict({"serviceaccount": {"name": "runner"}}))
+    with patch("controller.RBAC_MODE", "shared"):
+        assert pool.accepts(ExperimentSpec.from_dict({}))
+    assert not WarmPool(size=0).accepts(
+        ExperimentSpec.from_dict({"serviceaccount": {"name": "runner"}}))
+
+    memo = operator_memo(warm_pool=pool)
+    for _ in range(2):
+        body = experiment({})
+        await create_chaos_experiment(
+            meta=body["metadata"], body=body, spec=body["spec"],
+            namespace="chaostoolkit-crd", logger=Mock(), memo=memo,
+            patch=kopf.Patch(), warm_pods_index={})
+
+    # each run got its own pod, and no pool was filled for them
+    pods = [obj for key, obj in fake_api_server.objects.items()
+            if key[0] == "pods"]
+    assert len(pods) == 2
+    assert all("chaostoolkit.org/warm-pool" not in p["metadata"]["labels"]
+               for p in pods)
+    assert not pool.refills and not pool.started
+
+
+@pytest.mark.asyncio
+async def test_unused_warm_pools_are_trimmed():
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    def idle_pod(name: str, pool: str, age: float) -> Mock:
+        pod = Mock()
+        pod.metadata.name = name
+        pod.metadata.namespace = "run"
+        pod.metadata.labels = {"chaostoolkit.org/warm-pool": pool}
+        pod.metadata.resource_version = f"v-{name}"
+        pod.metadata.creation_timestamp = now - datetime.timedelta(
+            seconds=age)
+        return pod
+
+    api = Mock()
+    api.list_pod_for_all_namespaces.return_value = Mock(items=[
+        idle_pod("old-1", "old", 7200), idle_pod("old-2", "old", 3600),
+        idle_pod("used-1", "used", 7200), idle_pod("used-2", "used", 60),
+    ])
+    api.delete_namespaced_pod.side_effect = [
+        None, ApiException(status=409, reason="Conflict")]
+    pool = WarmPool(size=2, idle_timeout=1800)
+    pool.claimed[("run", "old")] = {"old-0"}
+
+    await pool.trim(api)
+    api.list_pod_for_all_namespaces.assert_called_once_with(
+        label_selector="chaostoolkit.org/warm-pool,"
+                       "!chaostoolkit.org/experiment")
+    deleted = api.delete_namespaced_pod.call_args_list
+    assert [c.kwargs["name"] for c in deleted] == ["old-1", "old-2"]
+    # a pod claimed by a run meanwhile is not deleted
+    assert deleted[1].kwargs["body"] == {
+        "preconditions": {"resourceVersion": "v-old-2"}}
+    assert ("run", "old") not in pool.claimed
+
+    # started and stopped with the operator
+    pool.start(api)
+    assert pool.task is not None
+    await pool.close()
+    assert pool.task is None
+
+
+@pytest.mark.asyncio
+async def test_delete_pod_deletes_pods_handed_over_to_warm_pools(
+        templates: ResourceTemplates):
+    v1 = Mock()
+    v1.delete_namespaced_pod.side_effect = ApiException(status=404)
+
+    await delete_pod(v1, templates, ExperimentSpec.from_dict({}), "ns", "abc")
+    v1.delete_namespaced_pod.assert_called_once_with(
+        name="chaostoolkit-abc", namespace="ns")
+    v1.delete_collection_namespaced_pod.assert_called_once_with(
+        namespace="ns", label_selector="chaostoolkit.org/experiment=abc")